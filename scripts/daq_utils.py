@@ -11,6 +11,8 @@ import subprocess
 import time
 from subprocess import PIPE
 
+from get_info import resolve_hutch
+
 DAQMGR_HUTCHES = ["tmo", "rix", "txi", "xpp", "ued", "mfx"]
 LOCALHOST = socket.gethostname()
 SLURM_PARTITION = "drpq"
@@ -94,7 +96,7 @@ class SbatchManager:
 class DaqManager:
     def __init__(self, verbose=False, cnf=None):
         self.verbose = verbose
-        self.hutch = call_subprocess("get_info", "--gethutch")
+        self.hutch = (resolve_hutch() or "").lower()
         if len(self.hutch) != 3:
             raise ValueError(f"Invalid hutch name found (hutch: '{self.hutch}')")
 
@@ -1,40 +1,36 @@
+"""
+Hutch, station and logbook information for the current host.
+
+The command line tool is a thin wrapper, other python code can import
+resolve_hutch and resolve_station directly instead of calling get_info in a
+subprocess. Only the standard library is needed to resolve the hutch; requests
+is imported the first time the logbook is queried.
+
+Logbook queries are bounded by --timeout, retried and optionally hedged, see
+LogbookClient. If the logbook can't be reached in time, get_info logs an
+error and exits with DEGRADED_EXIT_CODE (3). --exp still prints the last
+known experiment from the cache in that case.
+
+Set GET_INFO_WS_URL to point get_info at a different logbook server, e.g. a
+local stand-in for testing.
+"""
 import argparse
+import getpass
+import json
 import logging
 import os
+import queue
+import random
 import socket
 import sys
-import getpass
-
-import requests
-
-parser = argparse.ArgumentParser()
-parser.add_argument("--run", help="get last run", action='store_true')
-parser.add_argument("--exp", help="get experiment name", action='store_true')
-parser.add_argument("--live", help="ongoing?", action='store_true')
-parser.add_argument("--ended", help="ended", action='store_true')
-parser.add_argument("--daq", help="get DAQ type", action='store_true')
-parser.add_argument("--hutch", help="get experiment for hutch xxx")
-parser.add_argument("--station", help="optional station for hutch with two daqs, e.g. cxi and mfx")
-parser.add_argument("--getHutch", help="get hutch (uppercase)", action='store_true')
-parser.add_argument("--gethutch", help="get hutch (lowercase)", action='store_true')
-parser.add_argument("--getstation", help="get hutch station (for multiple daqs)",
-                    action='store_true')
-parser.add_argument("--getbase",
-                    help="get base daq name (hutch_station if multiple daqs, otherwise hutch)",
-                    action='store_true')
-parser.add_argument("--getinstrument",
-                    help="get instrument (HUTCH_station if multiple daqs, otherwise hutch)",
-                    action='store_true')
-parser.add_argument("--getcnf", help="get cnf file name)", action='store_true')
-parser.add_argument("--files_for_run", help="get xtc files for run")
-parser.add_argument("--nfiles_for_run", help="get xtc files for run")
-parser.add_argument("--setExp", help="set experiment name")
-args = parser.parse_args()
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 hutches = ['tmo', 'txi', 'rix', 'xpp', 'xcs', 'mfx', 'cxi', 'mec', 'ued', 'det',
            'lfe', 'kfe', 'tst', 'las', 'hpl']
-foundHutch = False
-hutch = ''
 
 # populate hutch-specific subnets here:
 hutch_subnets = {'tmo': ['28', '132', '133', '134', '135'],
@@ -53,76 +49,450 @@ hutch_subnets = {'tmo': ['28', '132', '133', '134', '135'],
                  'las': ['35', '160', '161', '162', '163'],
                  'hpl': ['64']}
 
-if args.hutch:
-    hutch = args.hutch
-    if hutch in hutches:
-        hutch = hutch.upper()
-    else:
+# the same table keyed by subnet, first hutch in the list wins
+subnet_hutches = {}
+for _hutch in hutches:
+    for _subnet in hutch_subnets[_hutch]:
+        subnet_hutches.setdefault(_subnet, _hutch)
+
+psusr_hutches = {'psusr13': 'xpp',
+                 'psusr21': 'xcs',
+                 'psusr22': 'cxi',
+                 'psusr23': 'mec',
+                 'psusr24': 'mfx'}
+
+# hutches with two daqs, e.g. 'mfx' and 'cxi'
+multi_station_hutches = ['cxi']
+
+ws_url = os.environ.get("GET_INFO_WS_URL", "https://pswww.slac.stanford.edu/ws/lgbk")
+DEGRADED_EXIT_CODE = 3
+logger = logging.getLogger(__name__)
+
+# The active experiment changes a few times a week, so remember it on disk for a
+# few minutes and share it between all the tools that call get_info.
+cache_dir = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+                         "get_info")
+cache_ttl = float(os.environ.get("GET_INFO_CACHE_TTL", 300))
+
+
+def check_txi_user(hutch):
+    # txi shares subnets and hosts with tmo and rix, tell them apart by user
+    if hutch in ("TMO", "RIX") and getpass.getuser()[:3].upper() == "TXI":
+        return "TXI"
+    return hutch
+
+
+@lru_cache(maxsize=None)
+def resolve_hutch(hutch=None, exp=None):
+    """
+    Find the hutch, in uppercase, or None if it can't be determined.
+
+    With hutch, it is matched against the known hutches. Otherwise we guess
+    from the host's subnet, the hostname, the current directory and finally
+    the first three letters of exp. The answer is remembered for the rest of
+    the process.
+    """
+    if hutch:
+        if hutch in hutches:
+            return hutch.upper()
         for ihutch in hutches:
             if hutch.find(ihutch.upper()) >= 0:
-                hutch = ihutch.upper()
-                foundHutch = True
-                break
-        if not foundHutch:
-            print('unknown_hutch')
-            sys.exit()
-else:
+                return ihutch.upper()
+        return None
+
     hostname = socket.gethostname()
     ip = socket.gethostbyname(hostname)
     subnet = ip.split('.')[2]
-    for ihutch in hutches:  # use the IP address to match the host to a hutch by subnet
-        if subnet in hutch_subnets.get(ihutch):
-            hutch = ihutch.upper()
-            if hutch in ("TMO", "RIX"):
-                user = getpass.getuser()
-                if user[:3].upper() == "TXI":
-                    hutch = "TXI"
-            foundHutch = True
-            break
-    if not foundHutch:
+    # use the IP address to match the host to a hutch by subnet
+    if subnet in subnet_hutches:
+        return check_txi_user(subnet_hutches[subnet].upper())
+    for ihutch in hutches:
+        if hostname.find(ihutch) >= 0:
+            return check_txi_user(ihutch.upper())
+    if hostname.find('psusr') >= 0:
+        for psusr, ihutch in psusr_hutches.items():
+            if hostname.find(psusr) >= 0:
+                return ihutch.upper()
+    else:
+        # then check current path
+        path = os.getcwd()
+        found = None
         for ihutch in hutches:
-            if hostname.find(ihutch) >= 0:
-                hutch = ihutch.upper()
-                if hutch in ("TMO", "RIX"):
-                    user = getpass.getuser()
-                    if user[:3].upper() == "TXI":
-                        hutch = "TXI"
-                foundHutch = True
+            if path.find(ihutch) >= 0:
+                found = ihutch.upper()
                 break
-    if not foundHutch:
-        if hostname.find('psusr') >= 0:
-            if hostname.find('psusr13') >= 0:
-                hutch = 'XPP'
-            elif hostname.find('psusr21') >= 0:
-                hutch = 'XCS'
-            elif hostname.find('psusr22') >= 0:
-                hutch = 'CXI'
-            elif hostname.find('psusr23') >= 0:
-                hutch = 'MEC'
-            elif hostname.find('psusr24') >= 0:
-                hutch = 'MFX'
-            if hutch != '':
-                foundHutch = True
+        if (found is None and path.find('xrt')+hostname.find('xrt') >= -1
+                or path.find('xtod') + hostname.find('xtod') >= -1):
+            found = 'LFE'  # because we have so many names for the same subnet.
+        if found is not None:
+            return found
+    if exp:
+        return exp[:3].upper()
+    return None
+
+
+def resolve_station(hutch, station=None):
+    """
+    Find the daq station number for the hutch.
+
+    Hutches with two daqs use station 1 on monitor hosts and 0 elsewhere,
+    unless a station is given. Raises ValueError for a station the hutch
+    doesn't have.
+    """
+    if hutch.lower() in multi_station_hutches:
+        nstations = 2
+        if station is not None:
+            station = int(station)
+        elif 'monitor' in socket.gethostname():
+            station = 1
         else:
-            # then check current path
-            path = os.getcwd()
-            for ihutch in hutches:
-                if path.find(ihutch) >= 0:
-                    hutch = ihutch.upper()
-                    foundHutch = True
-                    break
-            if (not foundHutch and path.find('xrt')+hostname.find('xrt') >= -1
-                    or path.find('xtod') + hostname.find('xtod') >= -1):
-                hutch = 'LFE'  # because we have so many names for the same subnet.
-                foundHutch = True
-    if not foundHutch:
-        if args.setExp:
-            hutch = args.setExp[:3].upper()
-            foundHutch = True
+            station = 0
+    elif hutch.lower() in ['rix']:
+        return 2
+    else:
+        nstations = 1
+        station = int(station) if station else 0
+    if station >= nstations:
+        raise ValueError("Invalid --station={:} keyword set for hutch {:}".format(
+            station, hutch))
+    return station
+
+
+def get_daq_base(hutch, station):
+    """hutch_station if multiple daqs, otherwise hutch"""
+    if hutch.lower() in multi_station_hutches:
+        return '{:}_{:}'.format(hutch.lower(), station)
+    return hutch.lower()
+
+
+def get_instrument(hutch, station):
+    """HUTCH:station if multiple daqs, otherwise HUTCH"""
+    if hutch.lower() in multi_station_hutches:
+        return '{:}:{:}'.format(hutch.upper(), station)
+    return hutch.upper()
+
+
+class LogbookUnavailable(Exception):
+    """The logbook did not answer within the time allowed"""
+
+
+class LogbookClient:
+    """
+    Logbook queries with bounded latency, over one pooled session.
+
+    Each query gets at most timeout seconds in total. Within that budget,
+    connection errors, timeouts and 5xx responses are retried up to retries
+    times with jittered exponential backoff. With hedge_after, a duplicate
+    request is sent if the first hasn't answered after hedge_after seconds
+    and the first answer wins. Raises LogbookUnavailable once the budget or
+    the retries run out.
+    """
+    def __init__(self, url=None, timeout=10., connect_timeout=3.05, retries=2,
+                 backoff=0.2, hedge_after=None):
+        import requests
+        self.url = url or ws_url
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.session = requests.Session()
+
+    def get(self, path, params=None):
+        """GET url + path and return the decoded json"""
+        import requests
+        deadline = time.monotonic() + self.timeout
+        for attempt in range(self.retries + 1):
+            try:
+                return self._hedged_get(path, params, deadline)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = exc
+            except requests.HTTPError as exc:
+                if exc.response is None or exc.response.status_code < 500:
+                    raise
+                error = exc
+            delay = self.backoff * 2**attempt * random.uniform(0.5, 1.5)
+            if attempt == self.retries or time.monotonic() + delay >= deadline:
+                break
+            logger.debug("Retrying %s in %.2f s after: %s", path, delay, error)
+            time.sleep(delay)
+        raise LogbookUnavailable("{:} failed after {:} attempts: {:}".format(
+            path, attempt + 1, error))
+
+    def _get_once(self, path, params, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LogbookUnavailable("{:} took longer than {:} s".format(path, self.timeout))
+        resp = self.session.get(self.url + path, params=params,
+                                timeout=(min(self.connect_timeout, remaining), remaining))
+        resp.raise_for_status()
+        return resp.json()
+
+    def _hedged_get(self, path, params, deadline):
+        # The read timeout only bounds each read, so a slow trickle of data
+        # could outlive the deadline. Waiting on the queue bounds the whole
+        # request, with or without hedging.
+        results = queue.Queue()
+
+        def request():
+            try:
+                results.put((True, self._get_once(path, params, deadline)))
+            except Exception as exc:
+                results.put((False, exc))
+
+        # Daemon threads, so the process can exit without waiting for a late request
+        threading.Thread(target=request, daemon=True).start()
+        sent = 1
+        if not self.hedge_after:
+            ok, result = self._next_result(results, path, deadline)
         else:
-            # then ask.....outside of python
-            print('unknown_hutch')
-            sys.exit()
+            try:
+                ok, result = results.get(timeout=self.hedge_after)
+            except queue.Empty:
+                logger.debug("Hedging %s after %s s", path, self.hedge_after)
+                threading.Thread(target=request, daemon=True).start()
+                sent = 2
+                ok, result = self._next_result(results, path, deadline)
+        if not ok and sent == 2:
+            # the other request may still succeed
+            error = result
+            ok, result = self._next_result(results, path, deadline)
+            if not ok:
+                result = error
+        if not ok:
+            raise result
+        return result
+
+    def _next_result(self, results, path, deadline):
+        try:
+            return results.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            raise LogbookUnavailable("{:} took longer than {:} s".format(path, self.timeout))
+
+
+_client = None
+
+
+def get_client():
+    """The shared LogbookClient, created with the defaults on first use"""
+    if _client is None:
+        configure_client()
+    return _client
+
+
+def configure_client(**kwargs):
+    """Replace the shared LogbookClient, see LogbookClient for the arguments"""
+    global _client
+    _client = LogbookClient(**kwargs)
+    return _client
+
+
+def get_cache_path(hutch, station):
+    name = "activeexperiment_{:}_{:}.json".format(hutch.lower(), station)
+    return os.path.join(cache_dir, name)
+
+
+def read_cached_experiment(hutch, station, max_age=None):
+    """The cached experiment, if it is younger than max_age (default cache_ttl)"""
+    if max_age is None:
+        max_age = cache_ttl
+    try:
+        with open(get_cache_path(hutch, station)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or time.time() - entry.get("time", 0) > max_age:
+        return None
+    return entry.get("experiment")
+
+
+def write_cached_experiment(hutch, station, exp):
+    # Write then rename, so a concurrent reader never sees a partial file
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"experiment": exp, "time": time.time()}, f)
+        os.replace(tmp_path, get_cache_path(hutch, station))
+    except OSError:
+        logger.debug("Could not write the experiment cache", exc_info=True)
+
+
+@lru_cache(maxsize=None)
+def fetch_active_experiment(hutch, station):
+    resp = get_client().get("/lgbk/ws/activeexperiment_for_instrument_station",
+                            params={"instrument_name": hutch, "station": station})
+    return resp.get("value", {}).get("name")
+
+
+def get_active_experiment(hutch, station, fresh=False, use_cache=True):
+    """
+    The active experiment, from the on-disk cache if it is recent enough.
+    Use fresh=True to always ask the logbook, use_cache=False to also skip
+    updating the cache.
+    """
+    if not fresh and use_cache:
+        exp = read_cached_experiment(hutch, station)
+        if exp is not None:
+            return exp
+    exp = fetch_active_experiment(hutch, station)
+    if use_cache and exp is not None:
+        write_cached_experiment(hutch, station, exp)
+    return exp
+
+
+def get_current_run(exp):
+    return get_client().get("/lgbk/" + exp + "/ws/current_run")["value"]
+
+
+def get_files_for_run(exp, run):
+    return get_client().get("/lgbk/" + exp + "/ws/" + str(run)
+                            + "/files_for_live_mode")["value"]
+
+
+def stat_files(paths, max_workers=16):
+    """
+    Stat the files concurrently, with at most max_workers threads.
+    Returns {path: size in bytes, or None if the file is missing}.
+    """
+    def get_size(path):
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return None
+
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        return dict(zip(paths, executor.map(get_size, paths)))
+
+
+def wait_for_files(paths, timeout=None, poll=1., max_poll=30.):
+    """
+    Like stat_files, but keep checking the missing files until they all exist.
+    The time between checks doubles from poll up to max_poll. Gives up after
+    timeout seconds, if set, and returns the sizes found so far.
+    """
+    sizes = stat_files(paths)
+    start = time.monotonic()
+    while True:
+        missing = [path for path, size in sizes.items() if size is None]
+        if not missing:
+            return sizes
+        delay = poll
+        if timeout:
+            delay = min(delay, start + timeout - time.monotonic())
+            if delay <= 0:
+                return sizes
+        logger.info("Waiting for %d of %d files", len(missing), len(sizes))
+        time.sleep(delay)
+        poll = min(poll*2, max_poll)
+        sizes.update(stat_files(missing))
+
+
+def get_daq_type(exp):
+    counts = get_client().get("/lgbk/" + exp + "/ws/file_counts_by_extension")["value"]
+    if "xtc2" in counts:
+        return 'LCLS2'
+    return 'LCLS1'
+
+
+def get_summary(hutch, station, exp=None, use_cache=True):
+    """
+    Everything --json reports. The run and DAQ type queries only depend on
+    the experiment, so they go out together on the shared session.
+    """
+    if exp is None:
+        exp = get_active_experiment(hutch, station, fresh=True, use_cache=use_cache)
+    summary = {"hutch": hutch.lower(), "station": station, "experiment": exp,
+               "run": None, "live": None, "last_ended_run": None, "daq": None}
+    if exp is None:
+        return summary
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        rundoc = executor.submit(get_current_run, exp)
+        daq = executor.submit(get_daq_type, exp)
+        try:
+            rundoc = rundoc.result()
+        except LogbookUnavailable:
+            raise
+        except Exception:
+            logger.exception("No runs?")
+            rundoc = None
+        if rundoc:
+            summary["run"] = int(rundoc['num'])
+            summary["live"] = not rundoc.get('end_time', None)
+            if summary["live"]:
+                summary["last_ended_run"] = summary["run"] - 1
+            else:
+                summary["last_ended_run"] = summary["run"]
+        try:
+            summary["daq"] = daq.result()
+        except LogbookUnavailable:
+            raise
+        except Exception:
+            logger.exception("Could not get the DAQ type")
+    return summary
+
+
+def build_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--run", help="get last run", action='store_true')
+    parser.add_argument("--exp", help="get experiment name", action='store_true')
+    parser.add_argument("--live", help="ongoing?", action='store_true')
+    parser.add_argument("--ended", help="ended", action='store_true')
+    parser.add_argument("--daq", help="get DAQ type", action='store_true')
+    parser.add_argument("--hutch", help="get experiment for hutch xxx")
+    parser.add_argument("--station",
+                        help="optional station for hutch with two daqs, e.g. cxi and mfx")
+    parser.add_argument("--getHutch", help="get hutch (uppercase)", action='store_true')
+    parser.add_argument("--gethutch", help="get hutch (lowercase)", action='store_true')
+    parser.add_argument("--getstation", help="get hutch station (for multiple daqs)",
+                        action='store_true')
+    parser.add_argument("--getbase",
+                        help="get base daq name (hutch_station if multiple daqs, otherwise hutch)",
+                        action='store_true')
+    parser.add_argument("--getinstrument",
+                        help="get instrument (HUTCH_station if multiple daqs, otherwise hutch)",
+                        action='store_true')
+    parser.add_argument("--getcnf", help="get cnf file name)", action='store_true')
+    parser.add_argument("--files_for_run", help="get xtc files for run")
+    parser.add_argument("--nfiles_for_run", help="get xtc files for run")
+    parser.add_argument("--check", help="with --files_for_run, print whether each file is"
+                        " present or missing and its size, exit 1 if any are missing",
+                        action='store_true')
+    parser.add_argument("--wait", type=float, nargs='?', const=0, metavar="SECONDS",
+                        help="with --check, keep checking until all files are present,"
+                        " for at most SECONDS if given")
+    parser.add_argument("--setExp", help="set experiment name")
+    parser.add_argument("--json", help="get hutch, station, experiment, run, live and DAQ"
+                        " type in one json object", action='store_true')
+    parser.add_argument("--no-cache", help="always ask the logbook for the active experiment",
+                        action='store_true')
+    parser.add_argument("--timeout", type=float, default=10., metavar="SECONDS",
+                        help="give up on each logbook query after this long, including"
+                        " retries, and exit with code 3 (default 10)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="retry failed logbook queries this many times (default 2)")
+    parser.add_argument("--hedge", type=float, metavar="SECONDS",
+                        help="send a duplicate logbook query if the first hasn't answered"
+                        " after this long")
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.check and not args.files_for_run:
+        parser.error("--check only works with --files_for_run")
+    if args.wait is not None and not args.check:
+        parser.error("--wait only works with --check")
+    logging.basicConfig(level=logging.INFO)
+
+    hutch = resolve_hutch(args.hutch, exp=None if args.hutch else args.setExp)
+    if hutch is None:
+        # then ask.....outside of python
+        print('unknown_hutch')
+        sys.exit()
     if args.getHutch:
         print(hutch.upper())
         sys.exit()
@@ -130,128 +500,136 @@ else:
         print(hutch.lower())
         sys.exit()
 
-# if hutch.lower() in ['mfx','cxi']:
-if hutch.lower() in ['cxi']:
-    nstations = 2
-    if args.station is not None:
-        station = int(args.station)
-    else:
-        hostname = socket.gethostname()
-        if 'monitor' in hostname:
-            station = 1
-        else:
-            station = 0
-    daq_base = '{:}_{:}'.format(hutch.lower(), station)
-    instrument = '{:}:{:}'.format(hutch.upper(), station)
-elif hutch.lower() in ['rix']:
-    station = 2
-else:
-    daq_base = hutch.lower()
-    instrument = hutch.upper()
-    nstations = 1
-    if args.station:
-        station = int(args.station)
-    else:
-        station = 0
-
-if hutch.lower() != 'rix' and station >= nstations:
-    print("Invalid --station={:} keyword set for hutch {:}".format(station, hutch))
-    sys.exit()
-
-if args.getstation:
-    print(station)
-    sys.exit()
-elif args.getinstrument:
-    print(instrument)
-    sys.exit()
-elif args.getbase:
-    print(daq_base)
-    sys.exit()
-elif args.getcnf:
-    print(daq_base+'.cnf')
-    sys.exit()
-
-ws_url = "https://pswww.slac.stanford.edu/ws/lgbk"
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+    try:
+        station = resolve_station(hutch, args.station)
+    except ValueError as exc:
+        print(exc)
+        sys.exit()
 
-if args.exp:
-    resp = requests.get(ws_url + "/lgbk/ws/activeexperiment_for_instrument_station",
-                        {"instrument_name": hutch, "station": station})
-    exp = resp.json().get("value", {}).get("name")
-    print(exp)
+    if args.getstation:
+        print(station)
+        sys.exit()
+    elif args.getinstrument:
+        print(get_instrument(hutch, station))
+        sys.exit()
+    elif args.getbase:
+        print(get_daq_base(hutch, station))
+        sys.exit()
+    elif args.getcnf:
+        print(get_daq_base(hutch, station)+'.cnf')
+        sys.exit()
 
-if args.run:
+    configure_client(timeout=args.timeout, retries=args.retries, hedge_after=args.hedge)
     try:
-        resp = requests.get(ws_url + "/lgbk/ws/activeexperiment_for_instrument_station",
-                            {"instrument_name": hutch, "station": station})
-        exp = resp.json().get("value", {}).get("name")
-        rundoc = requests.get(ws_url + "/lgbk/" + exp + "/ws/current_run").json()["value"]
-        if not rundoc:
-            #  logger.error("Invalid response from server")
+        degraded = run_queries(args, hutch, station)
+    except LogbookUnavailable as exc:
+        logger.error("The logbook is unavailable: %s", exc)
+        sys.exit(DEGRADED_EXIT_CODE)
+    if degraded:
+        sys.exit(DEGRADED_EXIT_CODE)
+
+
+def run_queries(args, hutch, station):
+    """
+    Answer the logbook queries from the command line. Returns True if an
+    answer came from the expired cache because the logbook was unavailable.
+    """
+    use_cache = not args.no_cache
+    degraded = False
+    if args.json:
+        summary = get_summary(hutch, station, exp=args.setExp, use_cache=use_cache)
+        print(json.dumps(summary))
+
+    if args.exp:
+        try:
+            exp = get_active_experiment(hutch, station, use_cache=use_cache)
+        except LogbookUnavailable:
+            exp = read_cached_experiment(hutch, station, max_age=float('inf'))
+            if not use_cache or exp is None:
+                raise
+            logger.warning("The logbook is unavailable, using the last known experiment")
+            degraded = True
+        print(exp)
+
+    if args.run:
+        try:
+            # Never report a run number for a stale experiment
+            exp = get_active_experiment(hutch, station, fresh=True, use_cache=use_cache)
+            rundoc = get_current_run(exp)
+            if not rundoc:
+                #  logger.error("Invalid response from server")
+                print('No runs taken yet')
+            else:
+                if args.ended:
+                    if rundoc.get('end_time', None) is not None:
+                        print(int(rundoc['num']))
+                    else:
+                        #  Really bogus way to determine this; but copying over from previous code.
+                        print(int(rundoc['num'] - 1))
+                else:
+                    print(int(rundoc['num']))
+                    if args.live:
+                        if not rundoc.get('end_time', None):
+                            print('live')
+                        else:
+                            print('ended')
+        except LogbookUnavailable:
+            raise
+        except Exception:
+            logger.exception("No runs?")
             print('No runs taken yet')
+
+    if args.daq:
+        if args.setExp:
+            exp = args.setExp
         else:
-            if args.ended:
-                if rundoc.get('end_time', None) is not None:
-                    print(int(rundoc['num']))
+            exp = get_active_experiment(hutch, station, use_cache=use_cache)
+        print(get_daq_type(exp))
+
+    if args.files_for_run or args.nfiles_for_run:
+        if args.files_for_run:
+            run = int(args.files_for_run)
+        if args.nfiles_for_run:
+            run = int(args.nfiles_for_run)
+
+        if args.setExp:
+            exp = args.setExp
+        else:
+            exp = get_active_experiment(hutch, station, fresh=True, use_cache=use_cache)
+
+        currundoc = get_current_run(exp)
+        runLast = int(currundoc['num'])
+        if run > runLast:
+            print('run %s not taken yet, last run is %s' % (run, runLast))
+        else:
+            file_list = get_files_for_run(exp, run)
+            if args.files_for_run:
+                paths = ['/reg/d/psdm/' + tfile for tfile in file_list]
+                if not args.check:
+                    for path in paths:
+                        print(path)
+                    return degraded
+                if args.wait is not None:
+                    sizes = wait_for_files(paths, timeout=args.wait)
                 else:
-                    #  Really bogus way to determine this; but copying over from previous code.
-                    print(int(rundoc['num'] - 1))
-            else:
-                print(int(rundoc['num']))
-                if args.live:
-                    if not rundoc.get('end_time', None):
-                        print('live')
+                    sizes = stat_files(paths)
+                for path, size in sizes.items():
+                    if size is None:
+                        print('missing -', path)
                     else:
-                        print('ended')
-    except Exception:
-        logger.exception("No runs?")
-        print('No runs taken yet')
-
-if args.daq:
-    if args.setExp:
-        exp = args.setExp
-    else:
-        resp = requests.get(ws_url + "/lgbk/ws/activeexperiment_for_instrument_station",
-                            {"instrument_name": hutch, "station": station})
-        exp = resp.json().get("value", {}).get("name")
-
-    r = requests.get(ws_url + "/lgbk/" + exp + "/ws"
-                                 + "/file_counts_by_extension")
-    r.raise_for_status()
-    if "xtc2" in r.json()["value"]:
-        print('LCLS2')
-    else:
-        print('LCLS1')
+                        print('present', size, path)
+                if None in sizes.values():
+                    sys.exit(1)
+            elif args.nfiles_for_run:
+                #  look at files, remove stream 80, only first chunk, return number.
+                nFiles = 0
+                for tfile in file_list:
+                    tfilename = '/reg/d/psdm/'+tfile
+                    if tfilename.find('c00') >= 0 and tfilename.find('-s8') < 0:
+                        nFiles = nFiles + 1
+                print('%d %d' % (nFiles, len(file_list)))
+    return degraded
 
-if args.files_for_run or args.nfiles_for_run:
-    if args.files_for_run:
-        run = int(args.files_for_run)
-    if args.nfiles_for_run:
-        run = int(args.nfiles_for_run)
 
-    if args.setExp:
-        exp = args.setExp
-    else:
-        resp = requests.get(ws_url + "/lgbk/ws/activeexperiment_for_instrument_station",
-                            {"instrument_name": hutch, "station": station})
-        exp = resp.json().get("value", {}).get("name")
-
-    currundoc = requests.get(ws_url + "/lgbk/" + exp + "/ws/current_run").json()["value"]
-    runLast = int(currundoc['num'])
-    if run > runLast:
-        print('run %s not taken yet, last run is %s' % (run, runLast))
-    else:
-        file_list = requests.get(ws_url + "/lgbk/" + exp + "/ws/" + str(run)
-                                 + "/files_for_live_mode").json()["value"]
-        if args.files_for_run:
-            for tfile in file_list:
-                print('/reg/d/psdm/' + tfile)
-        elif args.nfiles_for_run:
-            #  look at files, remove stream 80, only first chunk, return number.
-            nFiles = 0
-            for tfile in file_list:
-                tfilename = '/reg/d/psdm/'+tfile
-                if tfilename.find('c00') >= 0 and tfilename.find('-s8') < 0:
-                    nFiles = nFiles + 1
-            print('%d %d' % (nFiles, len(file_list)))
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,13 @@
 """
 ioc-deploy is a script for building and deploying ioc tags from github.
 
-It will take one of three different actions:
+It will take one of six different actions:
 - the normal deploy action
 - a write permissions change on an existing deployed release
 - a rebuild on an existing deployed release (perhaps on a new os)
+- an audit of all deployed releases for leftover write permissions
+- a dedupe that hardlinks identical files across write-protected releases
+- a list of the deployed releases
 
 The normal deploy action will create a shallow clone of your IOC in the
 standard release area at the correct path and "make" it.
@@ -32,6 +35,8 @@ then cd and make and chmod as appropriate.
 
 If the repository exists but the tag does not, the script will ask if you'd like
 to make a new tag and prompt you as appropriate.
+The list of tags from github is cached for a few minutes to make retries fast,
+you can pass --refresh-tags to skip the cache.
 
 The update-perms action will not do any git or make actions, it will only find the
 release directory and change the file and directory permissions.
@@ -51,30 +56,126 @@ It will conveniently temporarily remove write protections from the release for
 the duration of the make so you don't have to do this in multiple steps.
 Like update-perms, you can invoke this using similar commands as the deploy action.
 
+You can also pass --arch one or more times to run one build per EPICS host
+architecture, each with its own EPICS_HOST_ARCH and log file, while opening and
+closing write permissions only once. The builds run one after another in the
+release directory: they share its installed outputs (db, dbd, iocBoot, etc.),
+so running them at the same time would race. Every build also uses the
+compilers on the host you run this from, so each --arch must be for the same
+OS as this host's EPICS_HOST_ARCH (e.g. linux-x86_64 and linux-x86_64-debug
+from a linux-x86_64 host). Any other arch is refused: an arch for another OS
+(e.g. rhel9-x86_64 from a rhel7 host) must be rebuilt from a host running that OS.
+
 Example commands:
 
 "ioc-deploy rebuild -n ioc-common-foo -r R1.0.0"
 "ioc-deploy rebuild -p /cds/group/pcds/epics/ioc/common/foo/R1.0.0"
+"ioc-deploy rebuild -n ioc-common-foo -r R1.0.0 --arch linux-x86_64 --arch linux-x86_64-debug"
+
+Both deploy and rebuild can reuse earlier work: --ccache compiles through ccache,
+and --artifact-cache DIR (or $IOC_DEPLOY_ARTIFACT_CACHE) restores the outputs of
+an earlier build of the same commit, arch, and configure/RELEASE files, e.g. when
+the same commit is deployed again under a new tag. A release with uncommitted
+changes to its tracked files, e.g. sources edited in place before a rebuild,
+skips the artifact cache entirely. Only the arch's objects and
+libraries are restored; make still regenerates the shared outputs like envPaths
+and relinks the executables and shared libraries for the new path.
+
+The audit action checks every release in the ioc directory for writable files and
+directories, e.g. from an update-perms rw that was never undone.
+By default it reports the first writable entry it finds in each release,
+use --full to list all of them or --json for machine-readable output.
+The exit code is 3 if any release is writable or could not be fully checked,
+so cron jobs and scripts can act on the result.
+
+Example commands:
+
+"ioc-deploy audit"
+"ioc-deploy audit --full --json"
+
+The dedupe action hashes the files in every write-protected release and replaces
+byte-identical copies on the same filesystem with hardlinks. File hashes are kept
+in an index so that later runs only need to hash new files.
+Run it with --dry-run first to see how much space it would save.
+Making a release writable again with update-perms or rebuild will first give
+that release its own copy of each hardlinked file.
+
+Example commands:
+
+"ioc-deploy dedupe --dry-run"
+"ioc-deploy dedupe"
+
+The list action shows the deployed releases of one IOC, one area, or everything,
+along with when they were last modified and whether they are write-protected.
+Directory listings are cached and reused until the directory changes, and the
+same cache speeds up the casing checks in the other actions.
+
+Example commands:
+
+"ioc-deploy list ioc-common-foo"
+"ioc-deploy list ioc-common"
+
+Every action times each of its steps. Pass --timings to print a summary at exit,
+or --event-log (or set $IOC_DEPLOY_EVENT_LOG) to append the timings and results
+of each step to a file as JSON lines.
 """
 
 import argparse
+import asyncio
+import contextlib
 import enum
+import functools
+import hashlib
+import json
 import logging
 import os
 import os.path
+import shutil
+import socket
+import sqlite3
 import stat
 import subprocess
 import sys
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import List, Tuple
+from tempfile import NamedTemporaryFile, TemporaryDirectory, mkdtemp
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 EPICS_SITE_TOP_DEFAULT = "/cds/group/pcds/epics"
 GITHUB_ORG_DEFAULT = "pcdshub"
 CHMOD_SYMLINKS = os.chmod in os.supports_follow_symlinks
 PERMS_CMD = "update-perms"
 REBUILD_CMD = "rebuild"
-ALL_SUBCOMMANDS = (PERMS_CMD, REBUILD_CMD)
+AUDIT_CMD = "audit"
+DEDUPE_CMD = "dedupe"
+LIST_CMD = "list"
+ALL_SUBCOMMANDS = (PERMS_CMD, REBUILD_CMD, AUDIT_CMD, DEDUPE_CMD, LIST_CMD)
+# Subcommands that act on a whole ioc_dir rather than one release
+SWEEP_SUBCOMMANDS = (AUDIT_CMD, DEDUPE_CMD, LIST_CMD)
+ANY_WRITE = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+# Subdirectory of the per-deploy temp dir that holds the probe clone
+PROBE_REPO_DIR = "repo"
+# First git version with dependable blobless clones and batched blob prefetch
+PARTIAL_CLONE_MIN_GIT = (2, 25, 0)
+# Per-check timeouts in seconds for the concurrent deploy preflight checks
+PREFLIGHT_NETWORK_TIMEOUT = 30.0
+PREFLIGHT_LOCAL_TIMEOUT = 10.0
+CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", str(Path.home() / ".cache"))) / "ioc-deploy"
+)
+# Cached git ls-remote tag listings are reused for this many seconds
+TAG_CACHE_TTL = 300
+TAG_CACHE_DIR = CACHE_DIR / "tags"
+DEDUPE_INDEX_DEFAULT = CACHE_DIR / "dedupe-index.sqlite3"
+CATALOG_DIR = CACHE_DIR / "catalog"
+# Don't cache listings of directories modified this recently (seconds),
+# another change in the same mtime tick would go unnoticed
+CATALOG_RACY_SECONDS = 2.0
+# Read files in chunks of this many bytes when hashing them for dedupe
+HASH_CHUNK_SIZE = 1024 * 1024
 
 logger = logging.getLogger("ioc-deploy")
 
@@ -98,7 +199,17 @@ if sys.version_info >= (3, 7, 0):
         dry_run: bool
         verbose: bool
         version: bool
+        refresh_tags: bool
+        timings: bool
+        event_log: str
         permissions: str
+        arch: List[str]
+        full: bool
+        output_json: bool
+        jobs: int
+        index: str
+        ccache: bool
+        artifact_cache: str
 
     @dataclasses.dataclass(frozen=True)
     class DeployInfo:
@@ -110,11 +221,53 @@ if sys.version_info >= (3, 7, 0):
         pkg_name: str
         rel_name: str
 
+    @dataclasses.dataclass(frozen=True)
+    class PreflightInfo:
+        """
+        Results of the concurrent deploy preflight checks.
+
+        tags is None if we didn't need to check github for tags.
+        area and suffix are the casings found in the deploy area,
+        or empty strings if they were not found.
+        """
+
+        tags: Optional[List[str]]
+        area: str
+        suffix: str
+
+    @dataclasses.dataclass(frozen=True)
+    class AuditResult:
+        """
+        Writable files and directories found in one deployed release.
+
+        In summary mode, writable has at most one entry.
+        error is an empty string unless we couldn't finish checking.
+        """
+
+        release_dir: str
+        writable: List[str]
+        error: str
+
+    @dataclasses.dataclass(frozen=True)
+    class ReleaseInfo:
+        """
+        One deployed release, as shown by the list subcommand.
+        """
+
+        name: str
+        release: str
+        path: str
+        mtime: float
+        protected: bool
+
 else:
     from types import SimpleNamespace
 
     CliArgs = SimpleNamespace
     DeployInfo = SimpleNamespace
+    PreflightInfo = SimpleNamespace
+    AuditResult = SimpleNamespace
+    ReleaseInfo = SimpleNamespace
 
 
 # Separate from class def because still supporting rhel7 built-in python3 at 3.6.8
@@ -129,7 +282,17 @@ DEFAULT_ARGS = CliArgs(
     dry_run=False,
     verbose=False,
     version=False,
+    refresh_tags=False,
+    timings=False,
+    event_log=os.environ.get("IOC_DEPLOY_EVENT_LOG", ""),
     permissions="",
+    arch=[],
+    full=False,
+    output_json=False,
+    jobs=16,
+    index=str(DEDUPE_INDEX_DEFAULT),
+    ccache=False,
+    artifact_cache=os.environ.get("IOC_DEPLOY_ARTIFACT_CACHE", ""),
 )
 
 
@@ -162,7 +325,7 @@ def get_parser(subparser: str = "") -> argparse.ArgumentParser:
         type=force_lower,
         help="Select whether to make the deployment permissions read-only (ro) or read-write (rw).",
     )
-    # rebuild_parser doesn't have unique arguments but let's be consistent in our approach
+    # rebuild_parser unique arguments that should go first
     rebuild_parser = subparsers.add_parser(
         REBUILD_CMD,
         help=(
@@ -174,31 +337,168 @@ def get_parser(subparser: str = "") -> argparse.ArgumentParser:
             "This will briefly relax write permissions, run make, and then reapply permission restrictions."
         ),
     )
+    rebuild_parser.add_argument(
+        "--arch",
+        "-a",
+        action="append",
+        default=argparse.SUPPRESS,
+        help=(
+            "An EPICS host architecture to build for. "
+            "Pass this more than once to run the builds one after another, "
+            "each with its own EPICS_HOST_ARCH and log file. "
+            "All builds use this host's toolchain, so every arch must be for the same OS "
+            "as this host's EPICS_HOST_ARCH, others are refused. "
+            "If omitted, we'll run make once using your current environment."
+        ),
+    )
+    # audit_parser unique arguments that should go first
+    audit_parser = subparsers.add_parser(
+        AUDIT_CMD,
+        help=(
+            f"Use 'ioc-deploy {AUDIT_CMD}' to find deployed releases that are still writable. "
+            f"See 'ioc-deploy {AUDIT_CMD} --help' for more information."
+        ),
+        description=(
+            "Check every release in the ioc directory for writable files and directories. "
+            "By default, we stop checking a release at the first writable entry "
+            "and report one entry per release. "
+            f"Exits with code {int(ReturnCode.AUDIT_FAILED)} if any release is writable "
+            "or could not be fully checked, 0 otherwise."
+        ),
+    )
+    audit_parser.add_argument(
+        "--full",
+        action="store_true",
+        default=argparse.SUPPRESS,
+        help="Check every file in every release and report all of the writable entries.",
+    )
+    audit_parser.add_argument(
+        "--json",
+        action="store_true",
+        dest="output_json",
+        default=argparse.SUPPRESS,
+        help="Print the results as JSON instead of as a table.",
+    )
+    audit_parser.add_argument(
+        "--jobs",
+        "-j",
+        action="store",
+        type=int,
+        default=argparse.SUPPRESS,
+        help=f"The number of releases to check at once. Defaults to {DEFAULT_ARGS.jobs}.",
+    )
+    # dedupe_parser unique arguments that should go first
+    dedupe_parser = subparsers.add_parser(
+        DEDUPE_CMD,
+        help=(
+            f"Use 'ioc-deploy {DEDUPE_CMD}' to hardlink identical files across write-protected releases. "
+            f"See 'ioc-deploy {DEDUPE_CMD} --help' for more information."
+        ),
+        description=(
+            "Find byte-identical files across all write-protected releases in the ioc directory "
+            "and replace the duplicates with hardlinks to save space. "
+            "Releases with any writable entries are skipped. "
+            f"Use '{PERMS_CMD} rw' or '{REBUILD_CMD}' as usual afterwards, "
+            "these will give the release its own copy of each hardlinked file first."
+        ),
+    )
+    dedupe_parser.add_argument(
+        "--index",
+        action="store",
+        default=argparse.SUPPRESS,
+        help=(
+            "The file to keep file hashes in between runs, so that later runs only hash "
+            f"new or changed files. Defaults to {DEFAULT_ARGS.index}."
+        ),
+    )
+    dedupe_parser.add_argument(
+        "--jobs",
+        "-j",
+        action="store",
+        type=int,
+        default=argparse.SUPPRESS,
+        help=f"The number of releases or files to check at once. Defaults to {DEFAULT_ARGS.jobs}.",
+    )
+    dedupe_parser.add_argument(
+        "--auto-confirm",
+        "--confirm",
+        "--yes",
+        "-y",
+        action="store_true",
+        default=argparse.SUPPRESS,
+        help="Skip the confirmation prompt before creating hardlinks.",
+    )
+    dedupe_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        default=argparse.SUPPRESS,
+        help="Do not create any hardlinks, just report how much space we would save.",
+    )
+    # list_parser unique arguments that should go first
+    list_parser = subparsers.add_parser(
+        LIST_CMD,
+        help=(
+            f"Use 'ioc-deploy {LIST_CMD}' to see which releases are deployed. "
+            f"See 'ioc-deploy {LIST_CMD} --help' for more information."
+        ),
+        description=(
+            "List deployed releases with their last modified time and whether they are write-protected. "
+            "Directory listings are cached and reused until the directory changes."
+        ),
+    )
+    list_parser.add_argument(
+        "name",
+        nargs="?",
+        default=argparse.SUPPRESS,
+        help=(
+            "The IOC to list releases for, e.g. ioc-common-foo or foo. "
+            "Pass only ioc-area to list a whole area, or nothing to list everything."
+        ),
+    )
+    list_parser.add_argument(
+        "--json",
+        action="store_true",
+        dest="output_json",
+        default=argparse.SUPPRESS,
+        help="Print the results as JSON instead of as a table.",
+    )
+    list_parser.add_argument(
+        "--jobs",
+        "-j",
+        action="store",
+        type=int,
+        default=argparse.SUPPRESS,
+        help=f"The number of IOCs to check at once. Defaults to {DEFAULT_ARGS.jobs}.",
+    )
     # shared arguments
-    for parser in main_parser, perms_parser, rebuild_parser:
-        parser.add_argument(
-            "--name",
-            "-n",
-            action="store",
-            default=argparse.SUPPRESS,
-            help=(
-                "The name of the repository to deploy. "
-                "You must provide both the --name and --release arguments, "
-                "or the --path-override argument. "
-                "If it does not exist on github, we'll also try prepending with 'ioc-common-'."
-            ),
-        )
-        parser.add_argument(
-            "--release",
-            "-r",
-            action="store",
-            default=argparse.SUPPRESS,
-            help=(
-                "The version of the IOC to deploy. "
-                "You must provide both the --name and --release arguments, "
-                "or the --path-override argument."
-            ),
-        )
+    sweep_parsers = (audit_parser, dedupe_parser, list_parser)
+    for parser in (main_parser, perms_parser, rebuild_parser) + sweep_parsers:
+        # Some actions work on the whole ioc dir rather than one release
+        one_release = parser not in sweep_parsers
+        if one_release:
+            parser.add_argument(
+                "--name",
+                "-n",
+                action="store",
+                default=argparse.SUPPRESS,
+                help=(
+                    "The name of the repository to deploy. "
+                    "You must provide both the --name and --release arguments, "
+                    "or the --path-override argument. "
+                    "If it does not exist on github, we'll also try prepending with 'ioc-common-'."
+                ),
+            )
+            parser.add_argument(
+                "--release",
+                "-r",
+                action="store",
+                default=argparse.SUPPRESS,
+                help=(
+                    "The version of the IOC to deploy. "
+                    "You must provide both the --name and --release arguments, "
+                    "or the --path-override argument."
+                ),
+            )
         parser.add_argument(
             "--ioc-dir",
             "-i",
@@ -210,38 +510,76 @@ def get_parser(subparser: str = "") -> argparse.ArgumentParser:
                 f"With your current environment variables, this defaults to {DEFAULT_ARGS.ioc_dir}."
             ),
         )
+        if one_release:
+            parser.add_argument(
+                "--path-override",
+                "-p",
+                action="store",
+                default=argparse.SUPPRESS,
+                help=(
+                    "If provided, ignore all normal path-selection rules in favor of the specific provided path. "
+                    "This will let you deploy IOCs or apply protection rules to arbitrary specific paths."
+                ),
+            )
+            parser.add_argument(
+                "--auto-confirm",
+                "--confirm",
+                "--yes",
+                "-y",
+                action="store_true",
+                default=argparse.SUPPRESS,
+                help="Skip the confirmation promps, automatically saying yes to each one.",
+            )
+            parser.add_argument(
+                "--dry-run",
+                action="store_true",
+                default=argparse.SUPPRESS,
+                help="Do not deploy anything, just print what would have been done.",
+            )
         parser.add_argument(
-            "--path-override",
-            "-p",
-            action="store",
+            "--verbose",
+            "-v",
+            "--debug",
+            action="store_true",
             default=argparse.SUPPRESS,
-            help=(
-                "If provided, ignore all normal path-selection rules in favor of the specific provided path. "
-                "This will let you deploy IOCs or apply protection rules to arbitrary specific paths."
-            ),
+            help="Display additional debug information.",
         )
         parser.add_argument(
-            "--auto-confirm",
-            "--confirm",
-            "--yes",
-            "-y",
+            "--timings",
             action="store_true",
             default=argparse.SUPPRESS,
-            help="Skip the confirmation promps, automatically saying yes to each one.",
+            help="Print a summary of how long each step took before exiting.",
         )
         parser.add_argument(
-            "--dry-run",
-            action="store_true",
+            "--event-log",
+            action="store",
             default=argparse.SUPPRESS,
-            help="Do not deploy anything, just print what would have been done.",
+            help=(
+                "Append a JSON line with the timing and results of each step to this file. "
+                "This defaults to $IOC_DEPLOY_EVENT_LOG, or no event log if the environment variable is not set."
+            ),
         )
+    # build arguments
+    for parser in main_parser, rebuild_parser:
         parser.add_argument(
-            "--verbose",
-            "-v",
-            "--debug",
+            "--ccache",
             action="store_true",
             default=argparse.SUPPRESS,
-            help="Display additional debug information.",
+            help=(
+                "Compile through ccache, if it is installed, by wrapping the EPICS CC and CCC "
+                "compilers for gnu toolchains. Cache hits and misses are shown after the build."
+            ),
+        )
+        parser.add_argument(
+            "--artifact-cache",
+            action="store",
+            default=argparse.SUPPRESS,
+            help=(
+                "A directory to store build outputs in, keyed by commit, EPICS host arch, "
+                "and configure/RELEASE contents. Matching builds are restored from here "
+                "instead of being compiled again. Releases with uncommitted changes skip the cache. "
+                "This defaults to $IOC_DEPLOY_ARTIFACT_CACHE, or no cache if the environment variable is not set."
+            ),
         )
     # main_parser unique arguments that should go last
     main_parser.add_argument(
@@ -255,12 +593,27 @@ def get_parser(subparser: str = "") -> argparse.ArgumentParser:
             f"With your current environment variables, this defaults to {DEFAULT_ARGS.github_org}."
         ),
     )
+    main_parser.add_argument(
+        "--refresh-tags",
+        action="store_true",
+        default=DEFAULT_ARGS.refresh_tags,
+        help=(
+            "Ignore the cached list of tags from github and check github again. "
+            f"Tag lists are otherwise reused for {TAG_CACHE_TTL} seconds."
+        ),
+    )
     if not subparser:
         return main_parser
     elif subparser == PERMS_CMD:
         return perms_parser
     elif subparser == REBUILD_CMD:
         return rebuild_parser
+    elif subparser == AUDIT_CMD:
+        return audit_parser
+    elif subparser == DEDUPE_CMD:
+        return dedupe_parser
+    elif subparser == LIST_CMD:
+        return list_parser
     raise ValueError(f"Subparser argument must be empty string or one of {ALL_SUBCOMMANDS}, not {subparser}")
 
 
@@ -305,6 +658,85 @@ class ReturnCode(enum.IntEnum):
     SUCCESS = 0
     EXCEPTION = 1
     NO_CONFIRM = 2
+    AUDIT_FAILED = 3
+
+
+class PhaseTimer:
+    """
+    Records how long each phase of the script takes.
+
+    Each phase becomes an event dictionary with at least "phase",
+    "command", "host", "start" (unix time) and "duration" (seconds).
+    Code inside a phase can add more keys to the yielded event,
+    such as "returncode", "bytes_cloned", or "files_changed".
+
+    If an event log path is configured, each event is also appended
+    to it as one line of JSON so that many runs can be aggregated.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.event_log = ""
+        self.command = ""
+        self.host = socket.gethostname()
+        self._lock = threading.Lock()
+
+    def configure(self, command: str, event_log: str = "") -> None:
+        self.command = command
+        self.event_log = event_log
+
+    @contextlib.contextmanager
+    def phase(self, name: str, **info: Any) -> Iterator[Dict[str, Any]]:
+        event = {
+            "phase": name,
+            "command": self.command,
+            "host": self.host,
+            "start": time.time(),
+        }
+        event.update(info)
+        start = time.monotonic()
+        try:
+            yield event
+        except BaseException as exc:
+            event["error"] = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            event["duration"] = time.monotonic() - start
+            self.record(event)
+
+    def record(self, event: Dict[str, Any]) -> None:
+        """
+        Keep an event and write it to the event log, if we have one.
+
+        Failing to write the event log should never stop a deploy.
+        """
+        with self._lock:
+            self.events.append(event)
+            if not self.event_log:
+                return
+            try:
+                with open(self.event_log, "a") as fd:
+                    fd.write(json.dumps(event, default=str) + "\n")
+            except OSError as exc:
+                logger.warning(f"Unable to write to event log {self.event_log}: {exc}")
+                self.event_log = ""
+
+    def summary(self) -> str:
+        """
+        Return a human-readable table of the recorded phases, in order of completion.
+        """
+        lines = [f"{'phase':<16} {'seconds':>8}  details"]
+        for event in self.events:
+            details = ", ".join(
+                f"{key}={value}"
+                for key, value in event.items()
+                if key not in ("phase", "command", "host", "start", "duration")
+            )
+            lines.append(f"{event['phase']:<16} {event['duration']:>8.2f}  {details}")
+        return "\n".join(lines)
+
+
+phase_timer = PhaseTimer()
 
 
 def main_deploy(args: CliArgs) -> int:
@@ -315,15 +747,17 @@ def main_deploy(args: CliArgs) -> int:
 
     Will either return an int return code or raise.
     """
-    logger.info("Checking github connectivity")
-    if not get_github_available(verbose=args.verbose):
-        logger.error(
-            "Github is not reachable, please check to make sure you're on a psbuild host."
-        )
-        return ReturnCode.EXCEPTION
+    # One lightweight clone shared by the casing check, tagging, and the final clone
+    with TemporaryDirectory() as probe_dir:
+        return _deploy_with_probe(args=args, probe_dir=probe_dir)
+
 
-    logger.info("Checking repos and ioc deploy directories")
-    deploy_info = get_deploy_info(args)
+def _deploy_with_probe(args: CliArgs, probe_dir: str) -> int:
+    """
+    The steps of main_deploy that may reuse the probe clone in probe_dir.
+    """
+    logger.info("Checking github, repos, and ioc deploy directories")
+    deploy_info = get_deploy_info(args, probe_dir=probe_dir)
     deploy_dir = deploy_info.deploy_dir
     pkg_name = deploy_info.pkg_name
     rel_name = deploy_info.rel_name
@@ -343,25 +777,39 @@ def main_deploy(args: CliArgs) -> int:
         if not is_yes(user_text, error_on_empty=False):
             return ReturnCode.NO_CONFIRM
     logger.info(f"Cloning IOC to {deploy_dir}")
-    rval = clone_repo_tag(
-        name=pkg_name,
-        github_org=args.github_org,
-        release=rel_name,
-        deploy_dir=deploy_dir,
-        dry_run=args.dry_run,
-        verbose=args.verbose,
-    )
+    with phase_timer.phase("clone") as event:
+        rval = clone_repo_tag(
+            name=pkg_name,
+            github_org=args.github_org,
+            release=rel_name,
+            deploy_dir=deploy_dir,
+            dry_run=args.dry_run,
+            verbose=args.verbose,
+            probe_dir=probe_dir,
+        )
+        event["returncode"] = int(rval)
+        event["bytes_cloned"] = get_dir_size(str(Path(deploy_dir) / ".git"))
     if rval != ReturnCode.SUCCESS:
         logger.error(f"Nonzero return value {rval} from git clone")
         return rval
 
     logger.info(f"Building IOC at {deploy_dir}")
-    rval = make_in(deploy_dir=deploy_dir, dry_run=args.dry_run)
+    with phase_timer.phase("make") as event:
+        rval = make_in(
+            deploy_dir=deploy_dir,
+            dry_run=args.dry_run,
+            ccache=args.ccache,
+            artifact_cache=args.artifact_cache,
+        )
+        event["returncode"] = int(rval)
     if rval != ReturnCode.SUCCESS:
         logger.error(f"Nonzero return value {rval} from make")
         return rval
     logger.info(f"Applying write protection to {deploy_dir}")
-    set_permissions(deploy_dir=deploy_dir, allow_write=False, dry_run=args.dry_run)
+    with phase_timer.phase("chmod", allow_write=False) as event:
+        event["files_changed"] = set_permissions(
+            deploy_dir=deploy_dir, allow_write=False, dry_run=args.dry_run
+        )
     logger.info("IOC clone, make, and permission change complete!")
     return ReturnCode.SUCCESS
 
@@ -381,7 +829,8 @@ def main_perms(args: CliArgs) -> int:
         return ReturnCode.EXCEPTION
     allow_write = args.permissions == "rw"
 
-    deploy_dir = get_local_target(args)
+    with phase_timer.phase("find_target"):
+        deploy_dir = get_local_target(args)
 
     if allow_write:
         logger.info(f"Allowing writes to {deploy_dir}")
@@ -392,7 +841,11 @@ def main_perms(args: CliArgs) -> int:
         if not is_yes(user_text, error_on_empty=False):
             return ReturnCode.NO_CONFIRM
 
-    return set_permissions(deploy_dir=deploy_dir, allow_write=allow_write, dry_run=args.dry_run)
+    with phase_timer.phase("chmod", allow_write=allow_write) as event:
+        event["files_changed"] = set_permissions(
+            deploy_dir=deploy_dir, allow_write=allow_write, dry_run=args.dry_run
+        )
+    return ReturnCode.SUCCESS
 
 
 def main_rebuild(args: CliArgs) -> int:
@@ -403,23 +856,641 @@ def main_rebuild(args: CliArgs) -> int:
 
     Will either return an int code or raise.
     """
-    deploy_dir = get_local_target(args)
-    logger.info(f"Planning to rebuild {deploy_dir}")
+    with phase_timer.phase("find_target"):
+        deploy_dir = get_local_target(args)
+    if args.arch:
+        host_arch = os.environ.get("EPICS_HOST_ARCH", "")
+        foreign = get_foreign_arches(arches=args.arch, host_arch=host_arch)
+        if foreign:
+            logger.error(
+                f"Refusing to build {', '.join(foreign)} with this host's toolchain, "
+                f"its EPICS_HOST_ARCH is {host_arch or 'not set'}. "
+                "Rebuild those arches from a host running their OS."
+            )
+            return ReturnCode.EXCEPTION
+        logger.info(f"Planning to rebuild {deploy_dir} for {', '.join(args.arch)}")
+    else:
+        logger.info(f"Planning to rebuild {deploy_dir}")
     if not args.auto_confirm:
         user_text = input("Confirm target? yes/true or no/false\n")
         if not is_yes(user_text, error_on_empty=False):
             return ReturnCode.NO_CONFIRM
-    set_permissions(deploy_dir=deploy_dir, allow_write=True, dry_run=args.dry_run)
-    rval = make_in(deploy_dir=deploy_dir, dry_run=args.dry_run)
+    with phase_timer.phase("chmod", allow_write=True) as event:
+        event["files_changed"] = set_permissions(
+            deploy_dir=deploy_dir, allow_write=True, dry_run=args.dry_run
+        )
+    with phase_timer.phase("make") as event:
+        if args.arch:
+            rval = make_arches_in(
+                deploy_dir=deploy_dir,
+                arches=args.arch,
+                dry_run=args.dry_run,
+                ccache=args.ccache,
+                artifact_cache=args.artifact_cache,
+            )
+        else:
+            rval = make_in(
+                deploy_dir=deploy_dir,
+                dry_run=args.dry_run,
+                ccache=args.ccache,
+                artifact_cache=args.artifact_cache,
+            )
+        event["returncode"] = int(rval)
     if rval != ReturnCode.SUCCESS:
         logger.error(f"Nonzero return value {rval} from make")
+        logger.warning(
+            f"Leaving {deploy_dir} writable, use '{PERMS_CMD} ro' when you're done with it."
+        )
         return rval
-    set_permissions(deploy_dir=deploy_dir, allow_write=False, dry_run=args.dry_run)
+    with phase_timer.phase("chmod", allow_write=False) as event:
+        event["files_changed"] = set_permissions(
+            deploy_dir=deploy_dir, allow_write=False, dry_run=args.dry_run
+        )
     logger.info("Rebuild complete!")
     return rval
 
 
-def get_deploy_info(args: CliArgs) -> DeployInfo:
+def main_audit(args: CliArgs) -> int:
+    """
+    All main steps of the writable release audit.
+
+    This will be called when the audit subparser is included.
+
+    Will either return an int code or raise.
+    """
+    logger.info(f"Finding releases in {args.ioc_dir}")
+    with phase_timer.phase("find_releases") as event:
+        release_dirs = find_release_dirs(ioc_dir=args.ioc_dir, jobs=args.jobs)
+        event["releases"] = len(release_dirs)
+    logger.info(f"Checking {len(release_dirs)} releases for writable files")
+    with phase_timer.phase("audit", full=args.full) as event:
+        results = audit_releases(
+            release_dirs=release_dirs, full=args.full, jobs=args.jobs
+        )
+        num_writable = sum(1 for res in results if res.writable)
+        event["writable_releases"] = num_writable
+    if args.output_json:
+        print(
+            json.dumps(
+                [
+                    {
+                        "release_dir": res.release_dir,
+                        "writable": res.writable,
+                        "error": res.error,
+                    }
+                    for res in results
+                    if res.writable or res.error
+                ],
+                indent=2,
+            )
+        )
+    else:
+        print(format_audit_table(results=results, full=args.full))
+    for res in results:
+        if res.error:
+            logger.warning(f"Could not finish checking {res.release_dir}: {res.error}")
+    logger.info(f"Found {num_writable} writable releases out of {len(results)} checked")
+    if num_writable or any(res.error for res in results):
+        return ReturnCode.AUDIT_FAILED
+    return ReturnCode.SUCCESS
+
+
+def find_release_dirs(ioc_dir: str, jobs: int) -> List[str]:
+    """
+    Return every release directory in ioc_dir, sorted.
+
+    These are the ioc_dir/area/suffix/release directories that get_target_dir
+    points at. Each area is listed in its own thread to hide filesystem latency.
+    This always lists every directory; see ReleaseCatalog for cached listings.
+    Hidden directories and symlinks to directories are skipped.
+    """
+    areas = _list_subdirs(ioc_dir)
+    release_dirs = []
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        for area_releases in executor.map(_find_releases_in_area, areas):
+            release_dirs.extend(area_releases)
+    return sorted(release_dirs)
+
+
+def _find_releases_in_area(area_dir: str) -> List[str]:
+    """
+    Return every area_dir/suffix/release directory.
+    """
+    release_dirs = []
+    for suffix_dir in _list_subdirs(area_dir):
+        release_dirs.extend(_list_subdirs(suffix_dir))
+    return release_dirs
+
+
+def _list_subdirs(dir: str) -> List[str]:
+    """
+    Return the non-hidden, non-symlink subdirectories of dir, or nothing if unreadable.
+    """
+    try:
+        with os.scandir(dir) as it:
+            return [
+                entry.path
+                for entry in it
+                if not entry.name.startswith(".")
+                and entry.is_dir(follow_symlinks=False)
+            ]
+    except OSError as exc:
+        logger.warning(f"Unable to list {dir}: {exc}")
+        return []
+
+
+def audit_releases(release_dirs: List[str], full: bool, jobs: int) -> List[AuditResult]:
+    """
+    Check many releases for writable entries at once, in the same order as release_dirs.
+    """
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        return list(
+            executor.map(
+                functools.partial(audit_release, full=full),
+                release_dirs,
+            )
+        )
+
+
+def audit_release(release_dir: str, full: bool = False) -> AuditResult:
+    """
+    Find the files and directories in a release that anyone can write to.
+
+    This matches what set_permissions(allow_write=False) would change.
+    Symlinks are skipped because their own permissions are never used.
+    Unless full is True, we return as soon as we find the first writable entry.
+    """
+    writable = []
+    try:
+        if os.lstat(release_dir).st_mode & ANY_WRITE:
+            writable.append(release_dir)
+            if not full:
+                return AuditResult(release_dir=release_dir, writable=writable, error="")
+        to_check = [release_dir]
+        while to_check:
+            with os.scandir(to_check.pop()) as it:
+                for entry in it:
+                    if entry.is_symlink():
+                        continue
+                    if entry.stat(follow_symlinks=False).st_mode & ANY_WRITE:
+                        writable.append(entry.path)
+                        if not full:
+                            return AuditResult(
+                                release_dir=release_dir, writable=writable, error=""
+                            )
+                    if entry.is_dir(follow_symlinks=False):
+                        to_check.append(entry.path)
+    except OSError as exc:
+        return AuditResult(release_dir=release_dir, writable=writable, error=str(exc))
+    return AuditResult(release_dir=release_dir, writable=writable, error="")
+
+
+def format_audit_table(results: List[AuditResult], full: bool) -> str:
+    """
+    Return a human-readable table of the writable releases.
+
+    In summary mode this has one row per writable release with the first entry found.
+    In full mode every writable entry is listed under its release.
+    """
+    lines = []
+    for res in results:
+        if not res.writable:
+            continue
+        if full:
+            lines.append(f"{res.release_dir} ({len(res.writable)} writable)")
+            lines.extend(f"    {path}" for path in res.writable)
+        else:
+            lines.append(f"{res.release_dir}  first writable: {res.writable[0]}")
+    if not lines:
+        return "No writable releases found."
+    return "\n".join(lines)
+
+
+def main_dedupe(args: CliArgs) -> int:
+    """
+    All main steps of the identical file hardlinking action.
+
+    This will be called when the dedupe subparser is included.
+
+    Will either return an int code or raise.
+    """
+    logger.info(f"Finding write-protected releases in {args.ioc_dir}")
+    with phase_timer.phase("find_releases") as event:
+        release_dirs = find_release_dirs(ioc_dir=args.ioc_dir, jobs=args.jobs)
+        protected = [
+            res.release_dir
+            for res in audit_releases(release_dirs=release_dirs, full=False, jobs=args.jobs)
+            if not (res.writable or res.error)
+        ]
+        event["releases"] = len(release_dirs)
+        event["protected"] = len(protected)
+    logger.info(f"Checking files in {len(protected)} of {len(release_dirs)} releases")
+    with phase_timer.phase("list_files") as event:
+        files = list_release_files(release_dirs=protected, jobs=args.jobs)
+        event["files"] = len(files)
+    candidates = get_dedupe_candidates(files)
+    logger.info(f"Hashing {len(candidates)} files that share a size with another file")
+    with phase_timer.phase("hash") as event, open_hash_index(args.index) as index:
+        digests = hash_files(files=candidates, index=index, jobs=args.jobs)
+        event["files"] = len(digests)
+        event["index_hits"] = index.hits
+    links, saved = plan_hardlinks(files=candidates, digests=digests)
+    logger.info(
+        f"Found {len(links)} duplicate files, "
+        f"hardlinking would save about {format_bytes(saved)}"
+    )
+    if not links or args.dry_run:
+        for keep, path in links:
+            logger.debug(f"Dry-run: would replace {path} with a hardlink to {keep}")
+        return ReturnCode.SUCCESS
+    if not args.auto_confirm:
+        user_text = input("Replace duplicates with hardlinks? yes/true or no/false\n")
+        if not is_yes(user_text, error_on_empty=False):
+            return ReturnCode.NO_CONFIRM
+    with phase_timer.phase("hardlink") as event, open_hash_index(args.index) as index:
+        linked = 0
+        for keep, path in links:
+            try:
+                replace_with_hardlink(keep=keep, path=path, expected=candidates)
+            except OSError as exc:
+                logger.warning(f"Unable to hardlink {path}: {exc}")
+                continue
+            index.update(path=path, st=os.stat(path), digest=digests[keep])
+            linked += 1
+        event["files_changed"] = linked
+    logger.info(f"Replaced {linked} of {len(links)} duplicate files with hardlinks")
+    return ReturnCode.SUCCESS
+
+
+def list_release_files(release_dirs: List[str], jobs: int) -> Dict[str, os.stat_result]:
+    """
+    Return the lstat of every non-empty regular file in the releases, keyed by path.
+    """
+    files = {}
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        for release_files in executor.map(_list_files, release_dirs):
+            files.update(release_files)
+    return files
+
+
+def _list_files(top_dir: str) -> Dict[str, os.stat_result]:
+    """
+    Return the lstat of every non-empty regular file in top_dir, keyed by path.
+    """
+    files = {}
+    to_check = [top_dir]
+    while to_check:
+        try:
+            with os.scandir(to_check.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        to_check.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_size:
+                            files[entry.path] = st
+        except OSError as exc:
+            logger.warning(f"Unable to list files in {top_dir}: {exc}")
+    return files
+
+
+def get_dedupe_candidates(
+    files: Dict[str, os.stat_result]
+) -> Dict[str, os.stat_result]:
+    """
+    Return the files that could have an identical twin on another inode.
+
+    A file can only be a duplicate if another file on the same filesystem
+    has the same size. This lets us skip hashing most files.
+    """
+    inodes_by_size = {}
+    for st in files.values():
+        inodes_by_size.setdefault((st.st_dev, st.st_size), set()).add(st.st_ino)
+    return {
+        path: st
+        for path, st in files.items()
+        if len(inodes_by_size[(st.st_dev, st.st_size)]) > 1
+    }
+
+
+class HashIndex:
+    """
+    Persistent sqlite cache of file digests, so repeat dedupe runs are incremental.
+
+    A cached digest is only used if the file's device, inode, size and mtime
+    all still match what we saw when we hashed it.
+    """
+
+    def __init__(self, path: str):
+        self.hits = 0
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(path)
+            self._create_table()
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning(f"Unable to open hash index {path}, using a temporary one: {exc}")
+            self.conn = sqlite3.connect(":memory:")
+            self._create_table()
+
+    def _create_table(self) -> None:
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, dev INTEGER, ino INTEGER, "
+            "size INTEGER, mtime_ns INTEGER, digest TEXT)"
+        )
+
+    def get(self, path: str, st: os.stat_result) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT dev, ino, size, mtime_ns, digest FROM files WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is None or tuple(row[:4]) != (
+            st.st_dev,
+            st.st_ino,
+            st.st_size,
+            st.st_mtime_ns,
+        ):
+            return None
+        self.hits += 1
+        return row[4]
+
+    def update(self, path: str, st: os.stat_result, digest: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+            (path, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, digest),
+        )
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+
+@contextlib.contextmanager
+def open_hash_index(path: str) -> Iterator[HashIndex]:
+    """
+    Open the dedupe hash index, saving and closing it when we're done.
+    """
+    index = HashIndex(path)
+    try:
+        yield index
+    finally:
+        index.close()
+
+
+def hash_files(
+    files: Dict[str, os.stat_result], index: HashIndex, jobs: int
+) -> Dict[str, str]:
+    """
+    Return the sha256 hex digest of each file, keyed by path.
+
+    Digests come from the index when possible. The rest are hashed in a thread
+    pool (hashlib releases the GIL) and saved to the index.
+    Files we can't read are left out.
+    """
+    digests = {}
+    to_hash = []
+    for path, st in files.items():
+        digest = index.get(path=path, st=st)
+        if digest is None:
+            to_hash.append(path)
+        else:
+            digests[path] = digest
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        for path, digest in zip(to_hash, executor.map(hash_file, to_hash)):
+            if digest:
+                digests[path] = digest
+                index.update(path=path, st=files[path], digest=digest)
+    return digests
+
+
+def hash_file(path: str) -> str:
+    """
+    Return the sha256 hex digest of a file, or an empty string if it can't be read.
+    """
+    sha = hashlib.sha256()
+    try:
+        with open(path, "rb") as fd:
+            for chunk in iter(functools.partial(fd.read, HASH_CHUNK_SIZE), b""):
+                sha.update(chunk)
+    except OSError as exc:
+        logger.warning(f"Unable to hash {path}: {exc}")
+        return ""
+    return sha.hexdigest()
+
+
+def plan_hardlinks(
+    files: Dict[str, os.stat_result], digests: Dict[str, str]
+) -> Tuple[List[Tuple[str, str]], int]:
+    """
+    Decide which files to replace with hardlinks.
+
+    Files are only linked together if they are on the same filesystem and
+    have the same contents, permissions, and owners. In each set we keep
+    the inode that already has the most links.
+
+    Returns a list of (file to keep, file to replace) pairs and the number
+    of bytes this would free. Inodes that are also linked from outside of
+    the files we checked are not counted as freed.
+    """
+    groups = {}
+    for path, digest in digests.items():
+        st = files[path]
+        key = (st.st_dev, st.st_size, digest, st.st_mode, st.st_uid, st.st_gid)
+        groups.setdefault(key, {}).setdefault(st.st_ino, []).append(path)
+    links = []
+    saved = 0
+    for key, paths_by_inode in groups.items():
+        if len(paths_by_inode) < 2:
+            continue
+        keep_ino = max(
+            paths_by_inode, key=lambda ino: files[paths_by_inode[ino][0]].st_nlink
+        )
+        keep = sorted(paths_by_inode[keep_ino])[0]
+        for ino, paths in paths_by_inode.items():
+            if ino == keep_ino:
+                continue
+            links.extend((keep, path) for path in sorted(paths))
+            if files[paths[0]].st_nlink == len(paths):
+                saved += key[1]
+    return links, saved
+
+
+def replace_with_hardlink(
+    keep: str, path: str, expected: Dict[str, os.stat_result]
+) -> None:
+    """
+    Atomically replace path with a hardlink to keep.
+
+    expected has the lstat results from when we hashed both files.
+    If either file changed since then, we raise an OSError instead.
+
+    The parent directory is probably write-protected, so we allow
+    owner writes just long enough to swap in the link.
+    """
+    for check in (keep, path):
+        old_st = expected[check]
+        new_st = os.stat(check, follow_symlinks=False)
+        if (new_st.st_ino, new_st.st_size, new_st.st_mtime_ns) != (
+            old_st.st_ino,
+            old_st.st_size,
+            old_st.st_mtime_ns,
+        ):
+            raise OSError(f"{check} changed since it was hashed")
+    parent = os.path.dirname(path)
+    parent_mode = os.stat(parent).st_mode
+    tmp_path = os.path.join(parent, f".{os.path.basename(path)}.ioc-deploy-dedupe")
+    if not parent_mode & stat.S_IWUSR:
+        os.chmod(parent, parent_mode | stat.S_IWUSR)
+    try:
+        os.link(keep, tmp_path)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+    finally:
+        if not parent_mode & stat.S_IWUSR:
+            os.chmod(parent, parent_mode)
+    logger.debug(f"Replaced {path} with a hardlink to {keep}")
+
+
+def unshare_hardlink(path: str) -> None:
+    """
+    Give path its own copy of its contents, breaking any hardlinks.
+
+    This keeps edits or rebuilds in one release from changing files
+    in the other releases that dedupe linked it to.
+    The copy keeps the original permissions and timestamps.
+    """
+    tmp_path = os.path.join(
+        os.path.dirname(path), f".{os.path.basename(path)}.ioc-deploy-unshare"
+    )
+    shutil.copy2(path, tmp_path)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+def format_bytes(num: float) -> str:
+    """
+    Return a human-readable size, e.g. 1.5 GiB.
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(num) < 1024:
+            return f"{num:.1f} {unit}"
+        num /= 1024
+    return f"{num:.1f} TiB"
+
+
+def main_list(args: CliArgs) -> int:
+    """
+    All main steps of the release listing action.
+
+    This will be called when the list subparser is included.
+
+    Will either return an int code or raise.
+    """
+    catalog = get_catalog(args.ioc_dir)
+    with phase_timer.phase("list") as event:
+        releases = list_releases(catalog=catalog, name=args.name, jobs=args.jobs)
+        catalog.save()
+        event["releases"] = len(releases)
+    if args.output_json:
+        print(
+            json.dumps(
+                [
+                    {
+                        "name": info.name,
+                        "release": info.release,
+                        "path": info.path,
+                        "mtime": info.mtime,
+                        "protected": info.protected,
+                    }
+                    for info in releases
+                ],
+                indent=2,
+            )
+        )
+    elif releases:
+        width = max(len(info.name) for info in releases)
+        for info in releases:
+            state = "ro" if info.protected else "rw"
+            modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(info.mtime))
+            print(f"{info.name:<{width}}  {info.release:<12} {state}  {modified}")
+    else:
+        logger.warning("No matching releases found.")
+    return ReturnCode.SUCCESS
+
+
+def list_releases(
+    catalog: "ReleaseCatalog", name: str = "", jobs: int = 1
+) -> List[ReleaseInfo]:
+    """
+    Return the deployed releases that match name, sorted by IOC and release name.
+
+    name can be a full IOC name (ioc-common-foo), a common IOC's suffix (foo),
+    an area (ioc-common), or empty to list everything. Casing doesn't matter.
+    """
+    ioc_dir = catalog.ioc_dir
+    area = suffix = ""
+    if name:
+        if not name.startswith("ioc-"):
+            name = f"ioc-common-{name}"
+        parts = split_ioc_name(name)
+        area = find_casing_in_dir(dir=ioc_dir, name=parts[1], catalog=catalog)
+        if len(parts) > 2:
+            suffix = find_casing_in_dir(
+                dir=str(Path(ioc_dir) / area), name=parts[2], catalog=catalog
+            )
+    areas = [area] if area else catalog.list_subdirs(ioc_dir)
+    iocs = []
+    for area_name in areas:
+        if suffix:
+            iocs.append((area_name, suffix))
+        else:
+            iocs.extend(
+                (area_name, suffix_name)
+                for suffix_name in catalog.list_subdirs(str(Path(ioc_dir) / area_name))
+            )
+    releases = []
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        for ioc_releases in executor.map(
+            functools.partial(_list_ioc_releases, catalog), iocs
+        ):
+            releases.extend(ioc_releases)
+    return releases
+
+
+def _list_ioc_releases(
+    catalog: "ReleaseCatalog", ioc: Tuple[str, str]
+) -> List[ReleaseInfo]:
+    """
+    Return the releases of one (area, suffix) IOC with freshly checked details.
+    """
+    area, suffix = ioc
+    name = "-".join(("ioc", area, suffix))
+    releases = []
+    try:
+        for release in catalog.list_subdirs(str(Path(catalog.ioc_dir) / area / suffix)):
+            path = get_target_dir(name=name, ioc_dir=catalog.ioc_dir, release=release)
+            st = os.lstat(path)
+            releases.append(
+                ReleaseInfo(
+                    name=name,
+                    release=release,
+                    path=path,
+                    mtime=st.st_mtime,
+                    protected=not st.st_mode & ANY_WRITE,
+                )
+            )
+    except OSError as exc:
+        logger.warning(f"Unable to list releases for {name}: {exc}")
+    return releases
+
+
+def get_deploy_info(args: CliArgs, probe_dir: str = "") -> DeployInfo:
     """
     Normalize user inputs and figure out where to deploy to.
 
@@ -446,6 +1517,12 @@ def get_deploy_info(args: CliArgs) -> DeployInfo:
     1. start from a name and tag, get a path (--name, --release)
     2. start from a path, get a name and tag (--path-override)
     3. validate a name and tag, then use the path (all three args)
+
+    The github tag listing and the deploy area casing checks are independent,
+    so these are run concurrently up front via run_preflight.
+
+    If probe_dir is provided, any clone needed to create a tag or check
+    casing will be left there for clone_repo_tag to reuse.
     """
     deploy_dir = ""
 
@@ -478,24 +1555,40 @@ def get_deploy_info(args: CliArgs) -> DeployInfo:
         logger.warning(f"{name} is not an ioc name, trying {new_name}")
         name = new_name
 
+    # Implicitly check if github is reachable and if our repo exists here
+    # Let exceptions bubble up to _main
+    with phase_timer.phase("preflight"):
+        preflight = run_preflight(
+            name=name,
+            github_org=args.github_org,
+            ioc_dir=args.ioc_dir,
+            check_tags=bool(name and release and args.github_org),
+            refresh_tags=args.refresh_tags,
+            verbose=args.verbose,
+        )
+
     if name and release and args.github_org:
-        # Implicitly check if our repo exists here
-        # Let exceptions bubble up to _main
         release = finalize_tag(
             name=name,
             github_org=args.github_org,
             release=release,
             auto_confirm=args.auto_confirm,
             verbose=args.verbose,
+            probe_dir=probe_dir,
+            refresh_tags=args.refresh_tags,
+            tags=preflight.tags,
         )
 
     if name:
-        name = finalize_name(
-            name=name,
-            github_org=args.github_org,
-            ioc_dir=args.ioc_dir,
-            verbose=args.verbose,
-        )
+        with phase_timer.phase("finalize_name"):
+            name = finalize_name(
+                name=name,
+                github_org=args.github_org,
+                ioc_dir=args.ioc_dir,
+                verbose=args.verbose,
+                probe_dir=probe_dir,
+                local_casing=(preflight.area, preflight.suffix),
+            )
 
     if not args.path_override:
         deploy_dir = get_target_dir(name=name, ioc_dir=args.ioc_dir, release=release)
@@ -503,6 +1596,186 @@ def get_deploy_info(args: CliArgs) -> DeployInfo:
     return DeployInfo(deploy_dir=deploy_dir, pkg_name=name, rel_name=release)
 
 
+def run_preflight(
+    name: str,
+    github_org: str,
+    ioc_dir: str,
+    check_tags: bool,
+    refresh_tags: bool,
+    verbose: bool,
+) -> PreflightInfo:
+    """
+    Run the independent deploy checks concurrently and return their results.
+
+    This covers a quick github reachability probe, the github tag listing
+    (our access check) and the casing search in the deploy area.
+    The probe runs even when the tags come from the cache or aren't checked,
+    so an unreachable github is reported here rather than as a failed clone.
+    Each check has its own timeout, and the first check to fail
+    cancels the others and has its exception raised here.
+    """
+    # Not asyncio.run: we still need to support python 3.6
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(
+            _preflight(
+                name=name,
+                github_org=github_org,
+                ioc_dir=ioc_dir,
+                check_tags=check_tags,
+                refresh_tags=refresh_tags,
+                verbose=verbose,
+            )
+        )
+    finally:
+        loop.close()
+        asyncio.set_event_loop(None)
+
+
+async def _preflight(
+    name: str,
+    github_org: str,
+    ioc_dir: str,
+    check_tags: bool,
+    refresh_tags: bool,
+    verbose: bool,
+) -> PreflightInfo:
+    """
+    Coroutine implementation of run_preflight.
+    """
+    loop = asyncio.get_event_loop()
+    tags_task = None
+    casing_task = None
+    reachable_task = asyncio.ensure_future(
+        _with_timeout(
+            _preflight_reachable(verbose=verbose),
+            timeout=PREFLIGHT_NETWORK_TIMEOUT,
+            description="checking github connectivity",
+        )
+    )
+    if check_tags:
+        tags_task = asyncio.ensure_future(
+            _with_timeout(
+                _preflight_tags(
+                    name=name,
+                    github_org=github_org,
+                    refresh_tags=refresh_tags,
+                    verbose=verbose,
+                ),
+                timeout=PREFLIGHT_NETWORK_TIMEOUT,
+                description=f"checking {github_org}/{name} on github",
+            )
+        )
+    if name:
+        casing_task = asyncio.ensure_future(
+            _with_timeout(
+                loop.run_in_executor(None, _timed_find_local_casing, name, ioc_dir),
+                timeout=PREFLIGHT_LOCAL_TIMEOUT,
+                description=f"checking {ioc_dir}",
+            )
+        )
+    await _wait_first_exception(
+        {task for task in (reachable_task, tags_task, casing_task) if task is not None}
+    )
+
+    tags = None
+    area = suffix = ""
+    if tags_task is not None:
+        tags = tags_task.result()
+    if casing_task is not None:
+        area, suffix = casing_task.result()
+    return PreflightInfo(tags=tags, area=area, suffix=suffix)
+
+
+async def _with_timeout(awaitable, timeout: float, description: str):
+    """
+    Await with a timeout, raising a RuntimeError that describes the check on timeout.
+    """
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError as exc:
+        raise RuntimeError(f"Timed out after {timeout}s while {description}.") from exc
+
+
+async def _wait_first_exception(tasks: Set[asyncio.Future]) -> None:
+    """
+    Wait for all tasks, cancelling the rest as soon as any of them fails.
+    """
+    if not tasks:
+        return
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending)
+    # Raise the first failure, if any
+    for task in done:
+        task.result()
+
+
+def _timed_find_local_casing(name: str, ioc_dir: str) -> Tuple[str, str]:
+    """
+    find_local_casing as its own phase, for use in the preflight executor.
+    """
+    with phase_timer.phase("local_casing"):
+        return find_local_casing(name=name, ioc_dir=ioc_dir)
+
+
+async def _preflight_reachable(verbose: bool) -> None:
+    """
+    Raise if github can't be reached, e.g. when not on a psbuild host.
+    """
+    loop = asyncio.get_event_loop()
+    with phase_timer.phase("ping") as event:
+        available = await loop.run_in_executor(None, get_github_available, verbose)
+        event["available"] = available
+    if not available:
+        raise RuntimeError(
+            "Github is not reachable, please check to make sure you're on a psbuild host."
+        )
+
+
+async def _preflight_tags(
+    name: str,
+    github_org: str,
+    refresh_tags: bool,
+    verbose: bool,
+) -> List[str]:
+    """
+    Return the repo's tags from the cache or from github.
+
+    If the git ls-remote fails, we ping github to explain the failure,
+    in case it fails before the reachability probe in run_preflight is done.
+    """
+    if not refresh_tags:
+        tags = read_tag_cache(name=name, github_org=github_org)
+        if tags is not None:
+            logger.debug(f"Using cached tags for {github_org}/{name}")
+            return tags
+    try:
+        with phase_timer.phase("ls_remote"):
+            lines = await _ls_remote_async(
+                name=name, github_org=github_org, verbose=verbose
+            )
+    except subprocess.CalledProcessError as exc:
+        loop = asyncio.get_event_loop()
+        with phase_timer.phase("ping") as event:
+            available = await loop.run_in_executor(None, get_github_available, verbose)
+            event["available"] = available
+        if not available:
+            raise RuntimeError(
+                "Github is not reachable, please check to make sure you're on a psbuild host."
+            ) from exc
+        raise ValueError(
+            f"Unable to access {github_org}/{name}, "
+            "please make sure you have the correct access rights and the repository exists."
+        ) from exc
+    tags = tags_from_ls_remote(lines)
+    write_tag_cache(name=name, github_org=github_org, tags=tags)
+    return tags
+
+
 def get_local_target(args: CliArgs) -> str:
     """
     Normalize user inputs and figure out which directory to modify.
@@ -519,8 +1792,12 @@ def get_local_target(args: CliArgs) -> str:
         _, area, suffix = split_ioc_name(args.name)
     except ValueError:
         _, area, suffix = split_ioc_name(f"ioc-common-{args.name}")
-    area = find_casing_in_dir(dir=args.ioc_dir, name=area)
-    suffix = find_casing_in_dir(dir=str(Path(args.ioc_dir) / area), name=suffix)
+    catalog = get_catalog(args.ioc_dir)
+    area = find_casing_in_dir(dir=args.ioc_dir, name=area, catalog=catalog)
+    suffix = find_casing_in_dir(
+        dir=str(Path(args.ioc_dir) / area), name=suffix, catalog=catalog
+    )
+    catalog.save()
     full_name = "-".join(("ioc", area, suffix))
     try_release = release_permutations(args.release)
     for release in try_release:
@@ -530,53 +1807,174 @@ def get_local_target(args: CliArgs) -> str:
     raise RuntimeError("Unable to find existing release matching the inputs.")
 
 
-def find_casing_in_dir(dir: str, name: str) -> str:
+def find_casing_in_dir(
+    dir: str, name: str, catalog: Optional["ReleaseCatalog"] = None
+) -> str:
     """
     Find a file or directory in dir that matches name aside from casing.
 
+    If a catalog is provided, use its cached listing of dir when it is still valid.
+
     Raises a RuntimeError if nothing could be found.
     """
-    for path in Path(dir).iterdir():
-        if path.name.lower() == name.lower():
-            return path.name
+    if catalog is None:
+        names = [path.name for path in Path(dir).iterdir()]
+    else:
+        names = catalog.list_dir(dir)
+    for found in names:
+        if found.lower() == name.lower():
+            return found
     raise RuntimeError(f"Did not find {name} in {dir}")
 
 
-def finalize_name(name: str, github_org: str, ioc_dir: str, verbose: bool) -> str:
+class ReleaseCatalog:
+    """
+    Cached directory listings for the ioc_dir/area/suffix/release layout.
+
+    Each listing is reused until its directory's mtime changes, which happens
+    whenever an entry is added, removed, or renamed. This saves us from listing
+    large directories on every casing lookup.
+    Per-release details like write protection are not covered by the parent
+    directory's mtime, so those always come from a fresh lstat.
+
+    The listings are stored as JSON in CATALOG_DIR, one file per ioc_dir.
+    """
+
+    def __init__(self, ioc_dir: str):
+        self.ioc_dir = os.path.abspath(ioc_dir)
+        key = hashlib.sha1(self.ioc_dir.encode()).hexdigest()[:16]
+        self.path = CATALOG_DIR / f"{key}.json"
+        self.listings = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r") as fd:
+                info = json.load(fd)
+            if info["ioc_dir"] == self.ioc_dir:
+                self.listings = info["listings"]
+        except (OSError, ValueError, KeyError, TypeError):
+            ...
+
+    def list_dir(self, dir: str) -> Dict[str, bool]:
+        """
+        Return the entries in dir, mapping each name to whether it is a real directory.
+
+        Raises an OSError if dir can't be read.
+        """
+        key = os.path.relpath(os.path.abspath(dir), self.ioc_dir)
+        mtime_ns = os.stat(dir).st_mtime_ns
+        with self._lock:
+            cached = self.listings.get(key)
+        if cached is not None and cached["mtime_ns"] == mtime_ns:
+            return cached["entries"]
+        logger.debug(f"Listing {dir}")
+        with os.scandir(dir) as it:
+            entries = {entry.name: entry.is_dir(follow_symlinks=False) for entry in it}
+        if time.time() - mtime_ns / 1e9 > CATALOG_RACY_SECONDS:
+            with self._lock:
+                self.listings[key] = {"mtime_ns": mtime_ns, "entries": entries}
+                self.dirty = True
+        return entries
+
+    def list_subdirs(self, dir: str) -> List[str]:
+        """
+        Return the sorted names of the non-hidden real directories in dir.
+        """
+        return sorted(
+            name
+            for name, is_dir in self.list_dir(dir).items()
+            if is_dir and not name.startswith(".")
+        )
+
+    def save(self) -> None:
+        """
+        Write out the catalog if anything changed.
+
+        The catalog is a convenience, so failures are logged and ignored.
+        """
+        with self._lock:
+            if not self.dirty:
+                return
+            data = {"ioc_dir": self.ioc_dir, "listings": self.listings}
+            self.dirty = False
+        write_json_atomic(path=self.path, data=data)
+
+
+@functools.lru_cache(maxsize=None)
+def get_catalog(ioc_dir: str) -> ReleaseCatalog:
+    """
+    Return the shared ReleaseCatalog for ioc_dir.
+    """
+    return ReleaseCatalog(ioc_dir)
+
+
+def find_local_casing(name: str, ioc_dir: str) -> Tuple[str, str]:
+    """
+    Return the casing of name's area and suffix as found in the deploy area.
+
+    Either will be an empty string if it could not be found.
+    If the area is missing, we don't look for the suffix.
+    """
+    repo_dir = Path(
+        get_target_dir(name=name, ioc_dir=ioc_dir, release="placeholder")
+    ).parent
+    _, area, suffix = split_ioc_name(name)
+    if repo_dir.exists():
+        logger.debug(f"{repo_dir} exists, using as-is")
+        return area, suffix
+    logger.debug(f"{repo_dir} does not exist, checking for other casings")
+    catalog = get_catalog(ioc_dir)
+    try:
+        try:
+            area = find_casing_in_dir(dir=ioc_dir, name=area, catalog=catalog)
+        except RuntimeError:
+            return "", ""
+        try:
+            suffix = find_casing_in_dir(
+                dir=str(Path(ioc_dir) / area), name=suffix, catalog=catalog
+            )
+        except RuntimeError:
+            return area, ""
+        return area, suffix
+    finally:
+        catalog.save()
+
+
+def finalize_name(
+    name: str,
+    github_org: str,
+    ioc_dir: str,
+    verbose: bool,
+    probe_dir: str = "",
+    local_casing: Optional[Tuple[str, str]] = None,
+) -> str:
     """
     Fix name's casing if necessary, checking existing deployments and github as needed.
+
+    local_casing is the result of find_local_casing if it was already run.
     """
     logger.debug("Checking deploy area for casing")
     # GitHub URLs are case-insensitive, so we need further checks
     # REST API is most reliable but requires different auth
     # Checking existing directories is ideal because it ensures consistency with earlier releases
     # Check the readme last as a backup
-    repo_dir = Path(
-        get_target_dir(name=name, ioc_dir=ioc_dir, release="placeholder")
-    ).parent
-    if repo_dir.exists():
-        logger.debug(f"{repo_dir} exists, using as-is")
-        return name
-    logger.info(f"{repo_dir} does not exist, checking for other casings")
-    _, area, suffix = split_ioc_name(name)
+    if local_casing is None:
+        local_casing = find_local_casing(name=name, ioc_dir=ioc_dir)
+    area, suffix = local_casing
     # First, check for casing on area
-    try:
-        area = find_casing_in_dir(dir=ioc_dir, name=area)
-    except RuntimeError:
+    if not area:
         logger.info("This is a new area, checking readme for casing")
         name = casing_from_readme_clone(
-            name=name, github_org=github_org, verbose=verbose
+            name=name, github_org=github_org, verbose=verbose, probe_dir=probe_dir
         )
         logger.info(f"Using casing: {name}")
         return name
     logger.info(f"Using {area} as the area")
 
-    try:
-        suffix = find_casing_in_dir(dir=str(Path(ioc_dir) / area), name=suffix)
-    except RuntimeError:
+    if not suffix:
         logger.info("This is a new ioc, checking readme for casing")
         casing = casing_from_readme_clone(
-            name=name, github_org=github_org, verbose=verbose
+            name=name, github_org=github_org, verbose=verbose, probe_dir=probe_dir
         )
         # Use suffix from readme but keep area from directory search
         suffix = split_ioc_name(casing)[2]
@@ -594,28 +1992,58 @@ def split_ioc_name(name: str) -> Tuple[str, str, str]:
     return tuple(name.split("-", maxsplit=2))
 
 
-def casing_from_readme_clone(name: str, github_org: str, verbose: bool) -> str:
-    with TemporaryDirectory() as tmpdir:
+def casing_from_readme_clone(
+    name: str, github_org: str, verbose: bool, probe_dir: str = ""
+) -> str:
+    """
+    Returns the correct casing of name based on the repo's readme on github.
+
+    Only the readme files from the tip of the default branch are downloaded.
+    If probe_dir is provided, the probe clone is left there for later reuse.
+    """
+    with probe_dir_context(probe_dir) as probe_dir:
         try:
-            _clone(
-                name=name, github_org=github_org, working_dir=tmpdir, verbose=verbose
+            repo_dir = get_probe_repo(
+                name=name, github_org=github_org, probe_dir=probe_dir, verbose=verbose
             )
+            readme_text = read_readme_from_repo(repo_dir=repo_dir, verbose=verbose)
         except subprocess.CalledProcessError as exc:
             raise ValueError(
                 f"Error cloning repo, make sure {name} exists in {github_org} and check your permissions!"
             ) from exc
-        readme_text = ""
-        # Search for readme in any casing with any file extension
-        pattern = "".join(f"[{char.lower()}{char.upper()}]" for char in "readme") + "*"
-        for readme_path in (Path(tmpdir) / name).glob(pattern):
-            with open(readme_path, "r") as fd:
-                readme_text += fd.read()
+        if readme_text:
             logger.debug("Successfully read repo readme for casing check")
-        if not readme_text:
+        else:
             logger.debug("Unable to read repo readme for casing check")
     return casing_from_readme_text(name=name, readme_text=readme_text)
 
 
+def read_readme_from_repo(repo_dir: str, verbose: bool = False) -> str:
+    """
+    Return the combined text of all readme files at the top level of HEAD.
+
+    This reads from the git objects rather than the working tree so
+    it works on clones made without a checkout. In a blobless clone,
+    only the readme blobs will be downloaded.
+    """
+    readme_text = ""
+    for line in _git(
+        ["ls-tree", "HEAD"], working_dir=repo_dir, verbose=verbose, capture=True
+    ).splitlines():
+        # <mode> SP <type> SP <object> TAB <file>
+        info, filename = line.split("\t", maxsplit=1)
+        # Search for readme in any casing with any file extension
+        if info.split()[1] != "blob" or not filename.lower().startswith("readme"):
+            continue
+        readme_text += _git(
+            ["cat-file", "-p", info.split()[2]],
+            working_dir=repo_dir,
+            verbose=verbose,
+            capture=True,
+        )
+    return readme_text
+
+
 def casing_from_readme_text(name: str, readme_text: str) -> str:
     """
     Returns the correct casing of name in readme_text if available.
@@ -654,7 +2082,14 @@ def casing_from_text(uncased: str, casing_source: str) -> str:
 
 
 def finalize_tag(
-    name: str, github_org: str, release: str, auto_confirm: bool, verbose: bool
+    name: str,
+    github_org: str,
+    release: str,
+    auto_confirm: bool,
+    verbose: bool,
+    probe_dir: str = "",
+    refresh_tags: bool = False,
+    tags: Optional[List[str]] = None,
 ) -> str:
     """
     Check if release is present in the org.
@@ -665,26 +2100,45 @@ def finalize_tag(
     - R1.0.0
     - v1.0.0
     - 1.0.0
+
+    The tag listing may come from the local tag cache unless refresh_tags is True.
+    If the tags were already fetched, e.g. by run_preflight, pass them in as tags.
+    A cached or passed-in listing may miss tags pushed elsewhere within
+    TAG_CACHE_TTL, so before offering to create a tag we always check again
+    with a fresh listing.
+
+    If we need to create a tag, we'll do so from the probe clone in probe_dir,
+    leaving it there for later reuse if probe_dir is provided.
     """
     logger.debug(f"Getting all tags in {github_org}/{name}")
     if not release:
         raise ValueError("Recieved empty string as release name")
-    try:
-        tags = get_repo_tags(
-            name=name,
-            github_org=github_org,
-            verbose=verbose,
-        )
-    except subprocess.CalledProcessError as exc:
-        raise ValueError(
-            f"Unable to access {github_org}/{name}, "
-            "please make sure you have the correct access rights and the repository exists."
-        ) from exc
-    for rel in release_permutations(release=release):
-        logger.debug(f"Trying variant {rel}")
-        if rel in tags:
-            logger.info(f"Release {rel} exists in {github_org}/{name}")
-            return rel
+    fresh = tags is None and refresh_tags
+    while True:
+        if tags is None:
+            try:
+                tags = get_repo_tags(
+                    name=name,
+                    github_org=github_org,
+                    verbose=verbose,
+                    use_cache=not fresh,
+                )
+            except subprocess.CalledProcessError as exc:
+                raise ValueError(
+                    f"Unable to access {github_org}/{name}, "
+                    "please make sure you have the correct access rights and the repository exists."
+                ) from exc
+        for rel in release_permutations(release=release):
+            logger.debug(f"Trying variant {rel}")
+            if rel in tags:
+                logger.info(f"Release {rel} exists in {github_org}/{name}")
+                return rel
+        if fresh:
+            break
+        # Never offer to create a tag based on a possibly stale listing
+        logger.debug(f"Refreshing the tag listing for {github_org}/{name}")
+        tags = None
+        fresh = True
 
     logger.warning(f"Unable to find {release} in {github_org}/{name}")
     if release[0] == "R":
@@ -701,18 +2155,17 @@ def finalize_tag(
 
     logger.info(f"Creating a tag named {suggested_tag}")
 
-    with TemporaryDirectory() as tmpdir:
+    with probe_dir_context(probe_dir) as probe_dir:
         logger.info(f"Cloning {github_org}/{name}")
         try:
-            _clone(
-                name=name, github_org=github_org, working_dir=tmpdir, verbose=verbose
+            cloned_dir = get_probe_repo(
+                name=name, github_org=github_org, probe_dir=probe_dir, verbose=verbose
             )
         except subprocess.CalledProcessError as exc:
             raise ValueError(
                 f"Error cloning {github_org}/{name}, "
                 "please make sure you have the correct access rights and the repository exists."
             ) from exc
-        cloned_dir = str(Path(tmpdir) / name)
         tag_msg = ""
         if not auto_confirm:
             # Best effort to get context for the commit and show the default message
@@ -750,7 +2203,9 @@ def finalize_tag(
             verbose=verbose,
         )
         logger.info("Pushing tag to GitHub")
-        _push_tag(release=suggested_tag, working_dir=cloned_dir, verbose=verbose)
+        with phase_timer.phase("push_tag"):
+            _push_tag(release=suggested_tag, working_dir=cloned_dir, verbose=verbose)
+        invalidate_tag_cache(name=name, github_org=github_org)
 
     logger.info(f"{suggested_tag} created and pushed")
     logger.info("Remember to create a GitHub release later!")
@@ -791,9 +2246,13 @@ def clone_repo_tag(
     deploy_dir: str,
     dry_run: bool,
     verbose: bool,
+    probe_dir: str = "",
 ) -> int:
     """
     Create a shallow clone of the git repository in the correct location.
+
+    If an earlier step left a probe clone in probe_dir, we'll build the
+    deploy clone from it rather than downloading the repository again.
     """
     # Make sure the parent dir exists
     parent_dir = Path(deploy_dir).resolve().parent
@@ -806,6 +2265,15 @@ def clone_repo_tag(
     if dry_run:
         logger.debug("Dry-run: skip git clone")
         return ReturnCode.SUCCESS
+    elif probe_dir and (Path(probe_dir) / PROBE_REPO_DIR / ".git").is_dir():
+        return clone_from_probe(
+            name=name,
+            github_org=github_org,
+            release=release,
+            deploy_dir=deploy_dir,
+            repo_dir=str(Path(probe_dir) / PROBE_REPO_DIR),
+            verbose=verbose,
+        )
     else:
         return _clone(
             name=name,
@@ -816,21 +2284,461 @@ def clone_repo_tag(
         ).returncode
 
 
-def make_in(deploy_dir: str, dry_run: bool) -> int:
+def clone_from_probe(
+    name: str,
+    github_org: str,
+    release: str,
+    deploy_dir: str,
+    repo_dir: str,
+    verbose: bool,
+) -> int:
+    """
+    Create the shallow deploy clone using the probe clone at repo_dir as the source.
+
+    We fetch the release into the probe (trees only, if blobless) and check
+    it out there, which downloads all of the missing file contents in one batch.
+    The deploy clone is then a local copy with origin pointed back at github.
+    """
+    logger.debug(f"Reusing probe clone at {repo_dir}")
+    _git(
+        ["fetch", "--depth", "1", "origin", f"refs/tags/{release}:refs/tags/{release}"],
+        working_dir=repo_dir,
+        verbose=verbose,
+    )
+    _git(["checkout", "--quiet", release], working_dir=repo_dir, verbose=verbose)
+    rval = _clone(
+        name=name,
+        github_org=github_org,
+        release=release,
+        target_dir=deploy_dir,
+        url=Path(repo_dir).resolve().as_uri(),
+        verbose=verbose,
+    ).returncode
+    if rval == ReturnCode.SUCCESS:
+        _git(
+            ["remote", "set-url", "origin", get_repo_url(name=name, github_org=github_org)],
+            working_dir=deploy_dir,
+            verbose=verbose,
+        )
+    return rval
+
+
+def make_in(
+    deploy_dir: str, dry_run: bool, ccache: bool = False, artifact_cache: str = ""
+) -> int:
     """
     Shell out to make in the deploy dir
+
+    See cached_make for the ccache and artifact_cache options.
     """
     if dry_run:
         logger.info(f"Dry-run: skipping make in {deploy_dir}")
         return ReturnCode.SUCCESS
     else:
-        return subprocess.run(["make"], cwd=deploy_dir).returncode
+        return cached_make(
+            deploy_dir=deploy_dir,
+            arch=os.environ.get("EPICS_HOST_ARCH", ""),
+            ccache=ccache,
+            artifact_cache=artifact_cache,
+        )
+
+
+def make_arches_in(
+    deploy_dir: str,
+    arches: List[str],
+    dry_run: bool,
+    ccache: bool = False,
+    artifact_cache: str = "",
+) -> int:
+    """
+    Shell out to make in the deploy dir once per EPICS host arch, one at a time.
+
+    Each make gets its own copy of the environment with EPICS_HOST_ARCH set
+    and writes its combined output to its own log file in a new temp dir.
+    The log files are kept so they can be read after we exit.
+
+    The builds are not run concurrently: every arch's make installs into the
+    same release tree (db, dbd, iocBoot envPaths, etc.), and concurrent makes
+    would race on those shared outputs. They also all use this host's
+    toolchain, so main_rebuild only passes arches for this host's OS,
+    see get_foreign_arches.
+
+    Returns the first nonzero return code, or 0 if every build succeeded.
+    """
+    # Remove duplicates but keep the order
+    arches = list(dict.fromkeys(arches))
+    if dry_run:
+        logger.info(f"Dry-run: skipping make in {deploy_dir} for {', '.join(arches)}")
+        return ReturnCode.SUCCESS
+    log_dir = mkdtemp(prefix="ioc-deploy-rebuild-")
+    logger.info(f"Building {', '.join(arches)} in turn, writing logs to {log_dir}")
+    rval = ReturnCode.SUCCESS
+    for arch in arches:
+        log_path = Path(log_dir) / f"{arch}.log"
+        arch_rval, elapsed = make_arch_in(
+            deploy_dir=deploy_dir,
+            arch=arch,
+            log_path=str(log_path),
+            ccache=ccache,
+            artifact_cache=artifact_cache,
+        )
+        if arch_rval == ReturnCode.SUCCESS:
+            logger.info(f"Built {arch} in {elapsed:.1f}s, see {log_path}")
+        else:
+            logger.error(
+                f"Nonzero return value {arch_rval} from make for {arch} "
+                f"after {elapsed:.1f}s, see {log_path}"
+            )
+            if rval == ReturnCode.SUCCESS:
+                rval = arch_rval
+    return rval
+
+
+def get_foreign_arches(arches: List[str], host_arch: str) -> List[str]:
+    """
+    Return the arches whose OS, the part before the first dash, isn't the host arch's.
+
+    Those can't be built with this host's toolchain. If host_arch is empty,
+    we can't tell, so every arch is returned.
+    """
+    host_os = host_arch.split("-")[0]
+    return [arch for arch in arches if not host_os or arch.split("-")[0] != host_os]
+
+
+def make_arch_in(
+    deploy_dir: str,
+    arch: str,
+    log_path: str,
+    ccache: bool = False,
+    artifact_cache: str = "",
+) -> Tuple[int, float]:
+    """
+    Shell out to make in the deploy dir for one EPICS host arch.
+
+    See cached_make for the ccache and artifact_cache options.
+
+    Returns the return code and the elapsed time in seconds.
+    """
+    env = dict(os.environ, EPICS_HOST_ARCH=arch)
+    logger.debug(f"Building {arch} in {deploy_dir}, logging to {log_path}")
+    with phase_timer.phase("make_arch", arch=arch, log=log_path) as event:
+        with open(log_path, "w") as fd:
+            rval = cached_make(
+                deploy_dir=deploy_dir,
+                arch=arch,
+                ccache=ccache,
+                artifact_cache=artifact_cache,
+                set_arch=True,
+                env=env,
+                stdout=fd,
+                stderr=subprocess.STDOUT,
+            )
+        event["returncode"] = rval
+    return rval, event["duration"]
+
+
+def cached_make(
+    deploy_dir: str,
+    arch: str,
+    ccache: bool = False,
+    artifact_cache: str = "",
+    set_arch: bool = False,
+    **kwds,
+) -> int:
+    """
+    Run make in the deploy dir, using the optional build caches, and return its return code.
+
+    If ccache is True and ccache is installed, compile through ccache and
+    log its hit and miss counts for this build.
+
+    If artifact_cache is a directory, look there for the outputs of an earlier
+    build with the same commit, EPICS host arch, and configure/RELEASE contents.
+    Builds from a working tree with uncommitted changes skip the cache.
+    A match is restored before make runs, with fresh mtimes, so make finds
+    little to do beyond regenerating the shared outputs and relinking, see
+    restore_artifacts. After a successful build without a match, the arch's
+    new outputs are stored for next time.
+
+    If set_arch is True, arch is also passed to make as EPICS_HOST_ARCH.
+    Extra keyword arguments are passed through to subprocess.run.
+    """
+    ccache_path = ""
+    if ccache:
+        ccache_path = shutil.which("ccache") or ""
+        if not ccache_path:
+            logger.warning("ccache is not installed, building without it")
+    key = ""
+    cached = False
+    if artifact_cache and arch:
+        key = get_artifact_key(deploy_dir=deploy_dir, arch=arch)
+    if key:
+        cached = (Path(artifact_cache) / f"{key}.json").exists()
+        with phase_timer.phase("artifact_restore", arch=arch) as event:
+            restored = restore_artifacts(
+                cache_dir=artifact_cache, key=key, deploy_dir=deploy_dir
+            )
+            event["files"] = restored
+            event["hit"] = restored > 0
+        if restored:
+            logger.info(
+                f"Artifact cache hit for {arch}, restored {restored} earlier build outputs"
+            )
+        elif cached:
+            logger.info(f"Artifact cache for {arch} has nothing missing here to restore")
+        else:
+            logger.info(f"Artifact cache miss for {arch}")
+    cmd = get_make_cmd(arch=arch if set_arch else "", ccache_path=ccache_path)
+    with phase_timer.phase("compile", arch=arch) as event:
+        stats_before = get_ccache_stats() if ccache_path else {}
+        logger.debug(f"Calling '{' '.join(cmd)}' in {deploy_dir}")
+        rval = subprocess.run(cmd, cwd=deploy_dir, **kwds).returncode
+        event["returncode"] = rval
+        if ccache_path:
+            stats_after = get_ccache_stats()
+            hits = misses = 0
+            for stat_key in ("direct_cache_hit", "preprocessed_cache_hit"):
+                hits += stats_after.get(stat_key, 0) - stats_before.get(stat_key, 0)
+            misses = stats_after.get("cache_miss", 0) - stats_before.get("cache_miss", 0)
+            event["ccache_hits"] = hits
+            event["ccache_misses"] = misses
+            logger.info(f"ccache for {arch or 'this build'}: {hits} hits, {misses} misses")
+    if rval == ReturnCode.SUCCESS and key and not cached:
+        with phase_timer.phase("artifact_store", arch=arch) as event:
+            event["files"] = store_artifacts(
+                cache_dir=artifact_cache, key=key, deploy_dir=deploy_dir, arch=arch
+            )
+    return rval
+
+
+def get_make_cmd(arch: str = "", ccache_path: str = "") -> List[str]:
+    """
+    Return the make command line.
+
+    For ccache, we wrap the EPICS gnu toolchain compiler definitions.
+    These are passed unexpanded so make fills in each target's own
+    compiler path and prefix, which keeps cross builds working.
+    """
+    cmd = ["make"]
+    if arch:
+        cmd.append(f"EPICS_HOST_ARCH={arch}")
+    if ccache_path:
+        cmd.extend(
+            [
+                f"CC={ccache_path} $(GNU_BIN)/$(CMPLR_PREFIX)gcc$(CMPLR_SUFFIX)",
+                f"CCC={ccache_path} $(GNU_BIN)/$(CMPLR_PREFIX)g++$(CMPLR_SUFFIX)",
+            ]
+        )
+    return cmd
+
+
+def get_ccache_stats() -> Dict[str, int]:
+    """
+    Return ccache's machine-readable counters, or an empty dict if unavailable.
+    """
+    try:
+        output = subprocess.run(
+            ["ccache", "--print-stats"],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    stats = {}
+    for line in output.splitlines():
+        try:
+            name, value = line.split("\t")
+            stats[name] = int(value)
+        except ValueError:
+            ...
+    return stats
+
+
+def get_artifact_key(deploy_dir: str, arch: str) -> str:
+    """
+    Return the artifact cache key for a build, or an empty string if we can't make one.
+
+    The key covers the checked out commit, the EPICS host arch, and the contents
+    of the module RELEASE files, which may not all be tracked in git.
+    A working tree with uncommitted changes to tracked files gets no key, its
+    outputs don't belong to the commit and must never be stored or restored as such.
+    """
+    try:
+        commit = _git(
+            ["rev-parse", "HEAD"], working_dir=deploy_dir, capture=True
+        ).strip()
+        changes = _git(
+            ["status", "--porcelain", "--untracked-files=no"],
+            working_dir=deploy_dir,
+            capture=True,
+        ).strip()
+    except subprocess.CalledProcessError:
+        logger.debug(f"{deploy_dir} is not a git repo, skipping the artifact cache")
+        return ""
+    if changes:
+        logger.info(
+            f"{deploy_dir} has uncommitted changes, skipping the artifact cache for {arch}"
+        )
+        return ""
+    sha = hashlib.sha256()
+    release_files = sorted(Path(deploy_dir).glob("configure/RELEASE*"))
+    release_files.extend(Path(deploy_dir).glob("RELEASE_SITE"))
+    for path in release_files:
+        sha.update(str(path.relative_to(deploy_dir)).encode())
+        try:
+            sha.update(path.read_bytes())
+        except OSError:
+            ...
+    release_hash = sha.hexdigest()
+    logger.debug(f"Artifact key parts: {commit} {arch} {release_hash}")
+    return hashlib.sha256(f"{commit}\0{arch}\0{release_hash}".encode()).hexdigest()[:32]
+
+
+def is_arch_output(name: str, arch: str) -> bool:
+    """
+    Return True if name, relative to the top of the build, is an output of the arch's build.
+
+    These are the O.<arch> build directories and the installed bin/<arch>
+    and lib/<arch> directories. Shared outputs like db, dbd, and iocBoot
+    envPaths are left out, make regenerates them quickly.
+    """
+    parts = Path(name).parts
+    if f"O.{arch}" in parts:
+        return True
+    return len(parts) > 2 and parts[0] in ("bin", "lib") and parts[1] == arch
+
+
+def store_artifacts(cache_dir: str, key: str, deploy_dir: str, arch: str) -> int:
+    """
+    Save the arch's untracked build outputs in deploy_dir as a build output archive.
+
+    Only the arch's own outputs are stored, see is_arch_output.
+    The manifest records the deploy path so restore_artifacts can adjust
+    outputs that contain it when restoring elsewhere.
+
+    Returns the number of files stored. Failures are logged and ignored.
+    """
+    deploy_dir = os.path.abspath(deploy_dir)
+    try:
+        files = [
+            name
+            for name in _git(
+                ["ls-files", "--others", "-z"],
+                working_dir=deploy_dir,
+                capture=True,
+            ).split("\0")
+            if name and is_arch_output(name=name, arch=arch)
+        ]
+    except subprocess.CalledProcessError as exc:
+        logger.warning(f"Unable to list build outputs in {deploy_dir}: {exc}")
+        return 0
+    if not files:
+        logger.info(f"No build outputs for {arch} to store in the artifact cache")
+        return 0
+    archive = Path(cache_dir) / f"{key}.tar.gz"
+    try:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(dir=cache_dir, suffix=".tmp", delete=False) as fd:
+            with tarfile.open(fileobj=fd, mode="w:gz") as tar:
+                for name in files:
+                    tar.add(os.path.join(deploy_dir, name), arcname=name, recursive=False)
+        os.replace(fd.name, str(archive))
+    except OSError as exc:
+        logger.warning(f"Unable to store build outputs in {cache_dir}: {exc}")
+        return 0
+    write_json_atomic(
+        path=Path(cache_dir) / f"{key}.json",
+        data={
+            "arch": arch,
+            "deploy_dir": deploy_dir,
+            "files": len(files),
+            "created": time.time(),
+        },
+    )
+    logger.info(f"Stored {len(files)} build outputs for {arch} in the artifact cache")
+    return len(files)
+
+
+def restore_artifacts(cache_dir: str, key: str, deploy_dir: str) -> int:
+    """
+    Restore an earlier build's outputs into deploy_dir and return how many files we restored.
+
+    Existing files are never replaced, so a rebuild in place restores nothing.
+    Restored files get the current time as their mtime so they are newer than
+    the freshly cloned sources.
+
+    An EPICS build writes its deploy path into some outputs, e.g. the dependency
+    files and the rpaths of linked binaries. When restoring to a different path,
+    e.g. the same commit under a new tag, text files get the new path written in.
+    Object files and static libraries are restored as they are, only their debug
+    info names the old path. Other binaries with the old path, the linked
+    executables and shared libraries, are left out so make relinks them from the
+    restored objects with the right rpath.
+    """
+    deploy_dir = os.path.abspath(deploy_dir)
+    try:
+        with open(Path(cache_dir) / f"{key}.json", "r") as fd:
+            manifest = json.load(fd)
+    except (OSError, ValueError):
+        return 0
+    old_path = manifest.get("deploy_dir", deploy_dir).encode()
+    new_path = deploy_dir.encode()
+    kwds = {}
+    if hasattr(tarfile, "data_filter"):
+        kwds["filter"] = "data"
+    restored = relinked = 0
+    try:
+        with tarfile.open(Path(cache_dir) / f"{key}.tar.gz", mode="r:gz") as tar:
+            for member in tar:
+                target = os.path.join(deploy_dir, member.name)
+                if (
+                    os.path.isabs(member.name)
+                    or ".." in Path(member.name).parts
+                    or os.path.lexists(target)
+                ):
+                    continue
+                try:
+                    if member.isfile() and old_path != new_path:
+                        data = tar.extractfile(member).read()
+                        if old_path in data:
+                            if b"\0" not in data:
+                                data = data.replace(old_path, new_path)
+                            elif not member.name.endswith((".o", ".a")):
+                                relinked += 1
+                                continue
+                            os.makedirs(os.path.dirname(target), exist_ok=True)
+                            with open(target, "wb") as output:
+                                output.write(data)
+                            os.chmod(target, member.mode)
+                            restored += 1
+                            continue
+                    tar.extract(member, path=deploy_dir, **kwds)
+                except (tarfile.TarError, OSError) as exc:
+                    logger.debug(f"Unable to restore {member.name}: {exc}")
+                    continue
+                if not member.isdir():
+                    restored += 1
+                if not member.issym():
+                    os.utime(target)
+    except (tarfile.TarError, OSError) as exc:
+        logger.warning(f"Unable to read cached build outputs: {exc}")
+        return 0
+    if relinked:
+        logger.info(
+            f"Left out {relinked} linked outputs built for {old_path.decode()}, "
+            "make will relink them"
+        )
+    return restored
 
 
-def set_permissions(deploy_dir: str, allow_write: bool, dry_run: bool) -> None:
+def set_permissions(deploy_dir: str, allow_write: bool, dry_run: bool) -> int:
     """
     Apply or remove write permissions from a deploy repo.
 
+    Returns the number of files and directories we changed, or would have changed
+    in a dry run.
+
     allow_write=True involves adding "w" permissions to all files and directories
     for the owner and for the group. "w" permissions will never be added for other users.
     We will also add write permissions to the top-level directory.
@@ -843,14 +2751,17 @@ def set_permissions(deploy_dir: str, allow_write: bool, dry_run: bool) -> None:
         # Dry run has nothing to do if we didn't build the dir
         # Most things past this point will error out
         logger.info("Dry-run: skipping permission changes on never-made directory")
-        return
+        return 0
+    count = 0
     try:
-        set_one_permission(deploy_dir, allow_write=allow_write, dry_run=dry_run)
+        count += set_one_permission(deploy_dir, allow_write=allow_write, dry_run=dry_run)
 
         for dirpath, dirnames, filenames in os.walk(deploy_dir):
             for name in dirnames + filenames:
                 full_path = os.path.join(dirpath, name)
-                set_one_permission(full_path, allow_write=allow_write, dry_run=dry_run)
+                count += set_one_permission(
+                    full_path, allow_write=allow_write, dry_run=dry_run
+                )
     except OSError as exc:
         logger.error(f"OSError while changing permissions: {exc}")
         error_path = Path(exc.filename)
@@ -869,13 +2780,18 @@ def set_permissions(deploy_dir: str, allow_write: bool, dry_run: bool) -> None:
         raise
 
     logger.info("Write protection change complete!")
+    return count
 
 
-def set_one_permission(path: str, allow_write: bool, dry_run: bool) -> None:
+def set_one_permission(path: str, allow_write: bool, dry_run: bool) -> bool:
     """
     Given some file, adjust the permissions as needed for this script.
 
+    Returns True if we changed the permissions, or would have in a dry run.
+
     If allow_write is True, allow owner and group writes.
+    Files with more than one hardlink, e.g. from dedupe, are first
+    replaced with their own copy so that writes can't leak into other releases.
     If allow_write is False, prevent all writes.
 
     During a dry run, log what would be changed at info level without
@@ -884,12 +2800,22 @@ def set_one_permission(path: str, allow_write: bool, dry_run: bool) -> None:
     """
     if os.path.islink(path) and not CHMOD_SYMLINKS:
         logger.debug(f"Skip {path}, os doesn't support follow_symlinks in chmod.")
-        return
-    mode = os.stat(path, follow_symlinks=False).st_mode
+        return False
+    st = os.stat(path, follow_symlinks=False)
+    mode = st.st_mode
+    if allow_write and stat.S_ISREG(mode) and st.st_nlink > 1:
+        if dry_run:
+            logger.info(f"Dry-run: would copy {path} to break its hardlinks")
+        else:
+            logger.debug(f"Copying {path} to break its hardlinks")
+            unshare_hardlink(path)
     if allow_write:
         new_mode = mode | stat.S_IWUSR | stat.S_IWGRP
     else:
         new_mode = mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    if new_mode == mode:
+        logger.debug(f"Skip {path}, already {oct(mode)}")
+        return False
     if dry_run:
         logger.info(f"Dry-run: would change {path} from {oct(mode)} to {oct(new_mode)}")
     else:
@@ -898,6 +2824,21 @@ def set_one_permission(path: str, allow_write: bool, dry_run: bool) -> None:
             os.chmod(path, new_mode, follow_symlinks=False)
         else:
             os.chmod(path, new_mode)
+    return True
+
+
+def get_dir_size(path: str) -> int:
+    """
+    Return the total size in bytes of the files in path, or 0 if it doesn't exist.
+    """
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                ...
+    return total
 
 
 def get_version() -> str:
@@ -921,20 +2862,98 @@ def get_version() -> str:
         return "unknown.dev"
 
 
+def get_repo_url(name: str, github_org: str) -> str:
+    """
+    Return the ssh url for the repo on github.
+    """
+    return f"git@github.com:{github_org}/{name}"
+
+
+@contextlib.contextmanager
+def probe_dir_context(probe_dir: str = "") -> Iterator[str]:
+    """
+    Yield probe_dir if provided, otherwise a temporary directory.
+    """
+    if probe_dir:
+        yield probe_dir
+    else:
+        with TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+
+def get_probe_repo(name: str, github_org: str, probe_dir: str, verbose: bool) -> str:
+    """
+    Return the path to a lightweight clone of the repo in probe_dir, cloning if needed.
+
+    The probe clone is shallow and has no checkout. If our git supports it,
+    the clone is also blobless: only commits and trees are downloaded up front
+    and file contents are fetched on demand.
+
+    Raises a subprocess.CalledProcessError if the clone fails.
+    """
+    repo_dir = Path(probe_dir) / PROBE_REPO_DIR
+    if (repo_dir / ".git").is_dir():
+        logger.debug(f"Using existing probe clone at {repo_dir}")
+        return str(repo_dir)
+    blobless = git_supports_partial_clone()
+    with phase_timer.phase("probe_clone", blobless=blobless) as event:
+        _clone(
+            name=name,
+            github_org=github_org,
+            target_dir=str(repo_dir),
+            blobless=blobless,
+            no_checkout=True,
+            verbose=verbose,
+        )
+        event["bytes_cloned"] = get_dir_size(str(repo_dir / ".git"))
+    return str(repo_dir)
+
+
+@functools.lru_cache(maxsize=None)
+def git_supports_partial_clone() -> bool:
+    """
+    Return whether the installed git is new enough for our blobless clones.
+    """
+    try:
+        # e.g. "git version 2.39.3" or "git version 2.39.3 (Apple Git-146)"
+        output = subprocess.check_output(["git", "--version"], universal_newlines=True)
+        version = tuple(int(num) for num in output.split()[2].split(".")[:3])
+    except (subprocess.CalledProcessError, IndexError, ValueError):
+        return False
+    logger.debug(f"Found git version {version}")
+    return version >= PARTIAL_CLONE_MIN_GIT
+
+
 def _clone(
     name: str,
     github_org: str,
     release: str = "",
     working_dir: str = "",
     target_dir: str = "",
+    url: str = "",
+    blobless: bool = False,
+    no_checkout: bool = False,
     verbose: bool = False,
 ) -> subprocess.CompletedProcess:
     """
     Clone the repo or raise a subprocess.CalledProcessError
+
+    The url defaults to the repo on github. Pass a file:// url
+    to clone from a local repo while still respecting --depth.
     """
-    cmd = ["git", "clone", f"git@github.com:{github_org}/{name}", "--depth", "1"]
+    cmd = [
+        "git",
+        "clone",
+        url or get_repo_url(name=name, github_org=github_org),
+        "--depth",
+        "1",
+    ]
     if release:
         cmd.extend(["-b", release])
+    if blobless:
+        cmd.append("--filter=blob:none")
+    if no_checkout:
+        cmd.append("--no-checkout")
     if target_dir:
         cmd.append(target_dir)
     kwds = {"check": True}
@@ -947,6 +2966,32 @@ def _clone(
     return subprocess.run(cmd, **kwds)
 
 
+def _git(
+    args: List[str],
+    working_dir: str = "",
+    verbose: bool = False,
+    capture: bool = False,
+) -> str:
+    """
+    Run an arbitrary git command or raise a subprocess.CalledProcessError
+
+    Returns stdout if capture is True, otherwise an empty string.
+    """
+    cmd = ["git"] + args
+    kwds = {"check": True, "universal_newlines": True}
+    if working_dir:
+        kwds["cwd"] = working_dir
+    if capture or not verbose:
+        kwds["stdout"] = subprocess.PIPE
+    if not verbose:
+        kwds["stderr"] = subprocess.PIPE
+    logger.debug(f"Calling '{' '.join(cmd)}' with kwargs {kwds}")
+    proc = subprocess.run(cmd, **kwds)
+    if capture:
+        return proc.stdout
+    return ""
+
+
 def _tag(
     release: str,
     message: str = "",
@@ -1070,14 +3115,33 @@ def get_repo_tags(
     name: str,
     github_org: str,
     verbose: bool = False,
+    use_cache: bool = False,
 ) -> List[str]:
     """
     Get a list of tags that exist in the github repo.
 
+    If use_cache is True, reuse a listing from the tag cache
+    if it is newer than TAG_CACHE_TTL. Fresh listings are always
+    written to the tag cache.
+
     Raises a subprocess.CalledProcessError if the repo doesn't exist
     or we have insufficient permissions.
     """
+    if use_cache:
+        tags = read_tag_cache(name=name, github_org=github_org)
+        if tags is not None:
+            logger.debug(f"Using cached tags for {github_org}/{name}")
+            return tags
     lines = _ls_remote(name=name, github_org=github_org, verbose=verbose)
+    tags = tags_from_ls_remote(lines)
+    write_tag_cache(name=name, github_org=github_org, tags=tags)
+    return tags
+
+
+def tags_from_ls_remote(lines: List[str]) -> List[str]:
+    """
+    Return the tag names from the lines of git ls-remote's output.
+    """
     tags = []
     for line in lines:
         if "refs/tags/" not in line:
@@ -1086,6 +3150,77 @@ def get_repo_tags(
     return tags
 
 
+def get_tag_cache_path(name: str, github_org: str) -> Path:
+    """
+    Return the tag cache file for a repo.
+
+    Github names are case-insensitive, so neither are our cache keys.
+    """
+    return TAG_CACHE_DIR / github_org.lower() / f"{name.lower()}.json"
+
+
+def read_tag_cache(name: str, github_org: str) -> Optional[List[str]]:
+    """
+    Return the cached tags for a repo, or None if missing, expired, or unreadable.
+    """
+    path = get_tag_cache_path(name=name, github_org=github_org)
+    try:
+        with open(path, "r") as fd:
+            info = json.load(fd)
+        age = time.time() - info["timestamp"]
+        tags = info["tags"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not 0 <= age < TAG_CACHE_TTL:
+        logger.debug(f"Tag cache {path} is expired")
+        return None
+    return tags
+
+
+def write_tag_cache(name: str, github_org: str, tags: List[str]) -> None:
+    """
+    Atomically replace the cached tags for a repo.
+
+    The cache is a convenience, so failures are logged and ignored.
+    """
+    write_json_atomic(
+        path=get_tag_cache_path(name=name, github_org=github_org),
+        data={"timestamp": time.time(), "tags": tags},
+    )
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """
+    Atomically replace path with data as JSON, logging and ignoring failures.
+
+    This is for our caches, which are a convenience and should never stop a deploy.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(
+            "w", dir=str(path.parent), suffix=".tmp", delete=False
+        ) as fd:
+            json.dump(data, fd)
+        os.replace(fd.name, str(path))
+    except OSError as exc:
+        logger.debug(f"Unable to write cache file {path}: {exc}")
+
+
+def invalidate_tag_cache(name: str, github_org: str) -> None:
+    """
+    Remove the cached tags for a repo, e.g. after pushing a new tag.
+    """
+    path = get_tag_cache_path(name=name, github_org=github_org)
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        ...
+    except OSError as exc:
+        logger.debug(f"Unable to remove tag cache {path}: {exc}")
+    else:
+        logger.debug(f"Removed tag cache {path}")
+
+
 def _ls_remote(
     name: str,
     github_org: str,
@@ -1108,7 +3243,7 @@ def _ls_remote(
         "ls-remote",
         "--tags",
         "--refs",
-        f"git@github.com:{github_org}/{name}",
+        get_repo_url(name=name, github_org=github_org),
     ]
     kwds = {
         "stdout": subprocess.PIPE,
@@ -1132,6 +3267,47 @@ def _ls_remote(
     return output
 
 
+async def _ls_remote_async(
+    name: str,
+    github_org: str,
+    verbose: bool = False,
+) -> List[str]:
+    """
+    asyncio version of _ls_remote for use in the preflight checks.
+
+    The git process is killed if we are cancelled, e.g. due to a timeout.
+    """
+    cmd = [
+        "git",
+        "ls-remote",
+        "--tags",
+        "--refs",
+        get_repo_url(name=name, github_org=github_org),
+    ]
+    kwds = {"stdout": asyncio.subprocess.PIPE}
+    if not verbose:
+        kwds["stderr"] = asyncio.subprocess.PIPE
+    logger.debug(f"Calling '{' '.join(cmd)}' with kwargs {kwds}")
+    proc = await asyncio.create_subprocess_exec(*cmd, **kwds)
+    try:
+        stdout, _ = await proc.communicate()
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    output = []
+    for line in stdout.decode().splitlines():
+        if verbose:
+            print(line)
+        output.append(line.strip())
+    if proc.returncode:
+        raise subprocess.CalledProcessError(
+            returncode=proc.returncode,
+            cmd=cmd,
+        )
+    return output
+
+
 def print_help_text_for_readme():
     """
     Prints a text blob for me to paste into the release notes table.
@@ -1165,12 +3341,19 @@ def _main() -> int:
         fmt = "%(levelname)-8s %(name)s: %(message)s"
     logging.basicConfig(level=level, format=fmt)
     logger.debug(f"args are {args}")
+    phase_timer.configure(command=args.subparser or "deploy", event_log=args.event_log)
+    start_time = time.time()
+    start = time.monotonic()
     try:
         if args.version:
             print(get_version())
             return ReturnCode.SUCCESS
         logger.info("Checking inputs")
-        if not (args.name and args.release) and not args.path_override:
+        if (
+            args.subparser not in SWEEP_SUBCOMMANDS
+            and not (args.name and args.release)
+            and not args.path_override
+        ):
             logger.error(
                 "Must provide both --name and --release, or --path-override. "
                 "Check ioc-deploy --help for usage."
@@ -1182,6 +3365,12 @@ def _main() -> int:
             rval = main_perms(args)
         elif args.subparser == REBUILD_CMD:
             rval = main_rebuild(args)
+        elif args.subparser == AUDIT_CMD:
+            rval = main_audit(args)
+        elif args.subparser == DEDUPE_CMD:
+            rval = main_dedupe(args)
+        elif args.subparser == LIST_CMD:
+            rval = main_list(args)
         else:
             raise ValueError(f"Invalid subcommand {args.subparser}")
 
@@ -1200,6 +3389,22 @@ def _main() -> int:
         logger.error("ioc-deploy errored out")
     elif rval == ReturnCode.NO_CONFIRM:
         logger.warning("ioc-deploy cancelled")
+    elif rval == ReturnCode.AUDIT_FAILED:
+        logger.warning("ioc-deploy audit found writable or unchecked releases")
+    phase_timer.record(
+        {
+            "phase": "total",
+            "command": phase_timer.command,
+            "host": phase_timer.host,
+            "start": start_time,
+            "duration": time.monotonic() - start,
+            "returncode": int(rval),
+            "name": args.name,
+            "release": args.release,
+        }
+    )
+    if args.timings:
+        print(phase_timer.summary())
     return rval
 
 
@@ -4,18 +4,29 @@ positional & pointing stability standards.
 """
 
 import argparse
+import collections
+import csv
+import glob
+import importlib.util
 import os
+import re
+import sys
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Optional
 
-import matplotlib.pyplot as plt
 import numpy as np
 from colorama import Fore, Style
 from epics import PV, caget
-from matplotlib.figure import Figure
+from epics.ca import CAThread
 from numpy.typing import ArrayLike, NDArray
 
+if TYPE_CHECKING:
+    import h5py
+    from matplotlib.figure import Figure
+
 CAMERA_PIXEL_DICT = {'Manta_G046B': 8.3,
                      'Manta_G146B': 4.65,
                      'Manta_G146C': 4.65,
@@ -61,6 +72,11 @@ CAMERA_PIXEL_DICT = {'Manta_G046B': 8.3,
                      'Manta G-917C': 3.69,
                      'ProsilicaGC1350C': 4.65}
 
+# Seconds between progress updates while waiting for a capture
+POLL_PERIOD = 0.1
+# POSIX time of the EPICS epoch, 1990-01-01 UTC, that NDArray timestamps count from
+EPICS_EPOCH = 631152000
+
 
 def build_parser():
     """
@@ -75,10 +91,11 @@ def build_parser():
         ' determine the positional stability using ISO 11145:2018'
         ' Default is to use far-field calculations and a 10 cm focal length.',
         epilog='For more information on subcommands, use: '
-               'pointing_stability --help')
+               'pointing_stability analyze --help or pointing_stability render --help')
 
-    parser.add_argument('cam', type=str,
-                        help='PV prefix for the camera using ECS naming convention')
+    parser.add_argument('cam', type=str, nargs='+',
+                        help='PV prefix for the camera using ECS naming convention.\n'
+                        'Pass several prefixes to capture from several cameras at once.')
     parser.add_argument('-l', '--focal_length', type=float,
                         default=10.,
                         help='Focal length of the imaging lens in cm as a float. Defaults to 10 cm.')
@@ -92,19 +109,388 @@ def build_parser():
     parser.add_argument('-q', '--quiet', action='store_true',
                         default=False,
                         help='Supress the progressbar and graphs from printing to terminal')
+    parser.add_argument('--no_figures', action='store_true',
+                        default=False,
+                        help='Skip making the figures, e.g. for unattended scripts.\n'
+                        'Make them later from the saved data with pointing_stability render.')
     parser.add_argument('-n', '--near_field', action='store_true',
                         default=False,
                         help='Whether to perform calculations assuming near field imaging.')
     parser.add_argument('-s', '--size', type=int,
                         default=5000,
                         help='Total number of centroids to acquire before calculating'
-                        ' the pointing stability. Defaults to 5000 counts')
+                        ' the pointing stability. Defaults to 5000 counts.\n'
+                        'With several cameras, all of them stop when the first one is done.\n'
+                        'Use 0 to capture until Ctrl+C or --timeout. Only the last --window'
+                        ' samples are kept\nin memory, and the results and the CSV use just'
+                        ' those. hdf5 still saves every sample.')
+    parser.add_argument('-t', '--time_series', action='store_true',
+                        default=False,
+                        help='Capture with the Stats plugin time-series arrays instead of'
+                        ' per-frame monitors.\nThe IOC buffers every frame and we read the'
+                        ' arrays in bulk,\nwhich avoids dropped monitors at high frame rates.')
+    parser.add_argument('-i', '--image', action='store_true',
+                        default=False,
+                        help='Calculate the centroids from the Image1 arrays instead of the'
+                        ' Stats plugin.\nThis needs EPICS_CA_MAX_ARRAY_BYTES to fit a'
+                        ' whole image.')
+    parser.add_argument('--threshold', type=float,
+                        default=0,
+                        help='For --image, ignore pixels below this many counts after'
+                        ' background subtraction.\nDefaults to 0.')
+    parser.add_argument('--roi', type=str,
+                        help='For --image, only use this region of interest, given as'
+                        ' x,y,width,height in pixels.')
+    parser.add_argument('--background', type=str,
+                        help='For --image, a .npy file with a background image to subtract'
+                        ' from every frame.')
+    parser.add_argument('--timeout', type=float,
+                        help='Give up if the capture takes longer than this many seconds.'
+                        ' Defaults to no limit.\nWith --size 0, stop the capture normally'
+                        ' after this many seconds instead.')
+    parser.add_argument('--stall_timeout', type=float,
+                        default=10.,
+                        help='Give up if no new samples arrive for this many seconds.'
+                        ' Defaults to 10 s.\nUse 0 to wait forever.')
+    parser.add_argument('-w', '--window', type=int,
+                        default=0,
+                        help='Show the live stability estimate over only the last WINDOW'
+                        ' samples.\nDefaults to using every sample so far. The saved results'
+                        ' use every sample,\nexcept with --size 0, which needs a window.')
+    parser.add_argument('--format', type=str, choices=['csv', 'hdf5'],
+                        default='csv',
+                        help='Output data format. Defaults to csv.\n'
+                        'hdf5 appends the raw centroids to the file in chunks during the'
+                        ' capture,\nalong with the camera settings, so long runs are'
+                        ' compact and survive interruption.')
+    parser.add_argument('--psd', action='store_true',
+                        default=False,
+                        help='Add the jitter power spectral density and the integrated RMS'
+                        ' to the figure,\nand save the positional stability in each'
+                        ' frequency band.')
+    parser.add_argument('--bands', type=str,
+                        default='0,1,10,100',
+                        help='Comma-separated frequency band edges in Hz for --psd.'
+                        ' Defaults to 0,1,10,100.\nThe last band runs up to the Nyquist'
+                        ' frequency.')
+    return parser
+
+
+class RunningStats:
+    """
+    Welford's online mean and variance for the X and Y centroids.
+
+    Each new sample updates the estimate in constant time, so we can show
+    the stability while the capture is still running. With a window, only
+    the most recent samples are included and older ones are removed as new
+    ones arrive.
+
+    Parameters
+    -----------
+    window (int, optional):
+        Number of recent samples to include. Defaults to 0, all samples.
+    """
+    def __init__(self, window: int = 0):
+        if window < 0 or window == 1:
+            raise ValueError('The window must be 0 or at least 2 samples.')
+        self.window = window
+        self.count = 0
+        self.mean = np.zeros(2)
+        self._m2 = np.zeros(2)
+        self._history = collections.deque()
+
+    def add(self, x: float, y: float):
+        """Add one sample"""
+        value = np.array([x, y], dtype=float)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta/self.count
+        self._m2 += delta*(value - self.mean)
+        if self.window:
+            self._history.append(value)
+            if len(self._history) > self.window:
+                self._remove(self._history.popleft())
+
+    def extend(self, x: ArrayLike, y: ArrayLike):
+        """Add a batch of samples, merging the batch statistics in one step"""
+        if self.window:
+            for _x, _y in zip(x, y):
+                self.add(_x, _y)
+            return
+        values = np.stack((x, y), axis=1).astype(float)
+        count = len(values)
+        if not count:
+            return
+        mean = values.mean(axis=0)
+        m2 = ((values - mean)**2).sum(axis=0)
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta*count/total
+        self._m2 = self._m2 + m2 + delta**2*self.count*count/total
+        self.count = total
+
+    def _remove(self, value: NDArray):
+        self.count -= 1
+        delta = value - self.mean
+        self.mean -= delta/self.count
+        self._m2 -= delta*(value - self.mean)
+
+    @property
+    def std(self) -> NDArray:
+        """The sample standard deviation (N-1) in X and Y"""
+        if self.count < 2:
+            return np.full(2, np.nan)
+        return np.sqrt(np.maximum(self._m2, 0)/(self.count - 1))
+
+
+class CentroidCapture:
+    """
+    Pair the X and Y centroid monitor updates into fixed-size chunks.
+
+    The Stats plugin updates CentroidX_RBV and CentroidY_RBV from the same
+    NDArray, so both updates carry the same EPICS timestamp. We use that
+    timestamp to match each X to its Y. Updates that never find a partner,
+    e.g. because CA coalesced or dropped one of the monitors, are counted
+    as unpaired. Gaps in the plugin's UniqueId are counted as dropped frames.
+
+    Samples are stored in chunks of chunk_size as they arrive instead of
+    preallocating the whole capture. With spool, each full chunk is also
+    queued for take_chunks, e.g. for CaptureWriter to append to disk, and
+    keep limits how many of the latest samples stay in memory for finish.
+
+    Parameters
+    -----------
+    size (int):
+        Number of paired samples to capture, 0 to capture until stopped.
+    max_pending (int, optional):
+        Number of unmatched updates to hold per axis while waiting for a
+        partner. Defaults to 100.
+    stats (RunningStats, optional):
+        Running statistics to update with each paired sample.
+    wake (threading.Event, optional):
+        Set as soon as the capture is full. Share one event between
+        captures to wake up when any of them is full.
+    spool (bool, optional):
+        Queue the full chunks for take_chunks. Defaults to False.
+    keep (int, optional):
+        Number of the latest samples to keep in memory, 0 to keep none.
+        Defaults to keeping every sample.
+    """
+    chunk_size = 4096
+
+    def __init__(self, size: int, max_pending: int = 100,
+                 stats: Optional[RunningStats] = None,
+                 wake: Optional[threading.Event] = None,
+                 spool: bool = False, keep: Optional[int] = None):
+        self.size = size
+        self.max_pending = max_pending
+        self.stats = stats
+        self.wake = wake or threading.Event()
+        self.spool = spool
+        self.keep = keep
+        self.count = 0
+        self.unpaired = 0
+        self.dropped = 0
+        self._pending = {'x': {}, 'y': {}}
+        self._last_unique_id = None
+        self._stopped = False
+        self._lock = threading.Lock()
+        # Rows of x, y, and timestamp
+        self._chunk = np.empty((3, self.chunk_size))
+        self._filled = 0
+        self._chunks = collections.deque()
+        self._kept = 0
+        self._spooled = []
+
+    @property
+    def done(self) -> bool:
+        return self._stopped or 0 < self.size <= self.count
+
+    def stop(self):
+        """Stop accepting updates, e.g. to end several captures at the same point"""
+        with self._lock:
+            self._stopped = True
+
+    def add_x(self, value, timestamp=None, **kw):
+        """Callback for the CentroidX_RBV monitor"""
+        self._add('x', 'y', value, timestamp)
+
+    def add_y(self, value, timestamp=None, **kw):
+        """Callback for the CentroidY_RBV monitor"""
+        self._add('y', 'x', value, timestamp)
+
+    def add_dropped(self, count: int):
+        """Count frames that were dropped for some other reason"""
+        with self._lock:
+            self.dropped += count
+
+    def add_unique_id(self, value, **kw):
+        """Callback for the UniqueId_RBV monitor, used to count dropped frames"""
+        with self._lock:
+            if self._last_unique_id is not None and value > self._last_unique_id + 1:
+                self.dropped += value - self._last_unique_id - 1
+            self._last_unique_id = value
+
+    def _add(self, axis: str, other: str, value, timestamp):
+        with self._lock:
+            if self.done:
+                return
+            # Monitors arrive in order, so an older update from the other
+            # axis can no longer be matched by anything on this axis.
+            stale = [_ts for _ts in self._pending[other] if _ts < timestamp]
+            for _ts in stale:
+                del self._pending[other][_ts]
+            self.unpaired += len(stale)
+            partner = self._pending[other].pop(timestamp, None)
+            if partner is None:
+                pending = self._pending[axis]
+                pending[timestamp] = value
+                if len(pending) > self.max_pending:
+                    del pending[min(pending)]
+                    self.unpaired += 1
+                return
+            x_value, y_value = (value, partner) if axis == 'x' else (partner, value)
+            self._chunk[:, self._filled] = x_value, y_value, timestamp
+            self._filled += 1
+            self.count += 1
+            if self._filled == self.chunk_size:
+                self._seal_chunk()
+            if self.stats is not None:
+                self.stats.add(x_value, y_value)
+            if self.done:
+                self.wake.set()
+
+    def _seal_chunk(self):
+        """Move the current chunk to the kept and spooled chunks, with the lock held"""
+        chunk = self._chunk[:, :self._filled]
+        self._chunk = np.empty((3, self.chunk_size))
+        self._filled = 0
+        if self.spool:
+            self._spooled.append(chunk)
+        if self.keep == 0:
+            return
+        self._chunks.append(chunk)
+        self._kept += chunk.shape[1]
+        # Drop the oldest chunks once the newer ones alone hold enough samples
+        while self.keep is not None and self._kept - self._chunks[0].shape[1] >= self.keep:
+            self._kept -= self._chunks.popleft().shape[1]
+
+    def extend(self, x: ArrayLike, y: ArrayLike, timestamps: ArrayLike):
+        """
+        Add already paired samples in bulk, e.g. from the time-series arrays.
+        Samples past the capture size are ignored.
+        """
+        with self._lock:
+            if self.done:
+                return
+            count = len(x) if not self.size else min(len(x), self.size - self.count)
+            data = np.stack((x[:count], y[:count], timestamps[:count]))
+            start = 0
+            while start < count:
+                added = min(count - start, self.chunk_size - self._filled)
+                self._chunk[:, self._filled:self._filled + added] = data[:, start:start + added]
+                self._filled += added
+                start += added
+                if self._filled == self.chunk_size:
+                    self._seal_chunk()
+            self.count += count
+            if self.stats is not None:
+                self.stats.extend(x[:count], y[:count])
+            if self.done:
+                self.wake.set()
+
+    def take_chunks(self) -> list[NDArray]:
+        """
+        Return the full chunks queued since the last call and forget them.
+        Each chunk has rows of x, y, and timestamps.
+        """
+        with self._lock:
+            chunks, self._spooled = self._spooled, []
+        return chunks
+
+    def finish(self) -> tuple[NDArray, NDArray, NDArray]:
+        """
+        Stop accepting updates and return the x, y, and timestamp arrays kept
+        in memory. The last partial chunk is queued for take_chunks.
+        Anything still waiting for a partner is counted as unpaired.
+        """
+        with self._lock:
+            self.unpaired += sum(len(_pending) for _pending in self._pending.values())
+            self._pending = {'x': {}, 'y': {}}
+            self._stopped = True
+            if self._filled:
+                self._seal_chunk()
+            data = np.concatenate([np.empty((3, 0))] + list(self._chunks), axis=1)
+        if self.keep is not None:
+            data = data[:, max(data.shape[1] - self.keep, 0):]
+        return data[0], data[1], data[2]
+
+
+def build_analyze_parser():
+    """
+    Constructs the parser for the analyze subcommand.
+    Returns:
+        parser: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog='pointing_stability analyze',
+        formatter_class=argparse.RawTextHelpFormatter,
+        description='Recalculate the stabilities for saved captures, optionally'
+        ' with a different pixel size or focal length,\nand summarize them in one table.')
+
+    parser.add_argument('paths', type=str, nargs='+',
+                        help='Saved capture files (.csv or .h5), or directories to search'
+                        ' for data_*.csv and *.h5 files.')
+    parser.add_argument('-l', '--focal_length', type=float,
+                        help='Focal length of the imaging lens in cm.'
+                        ' Defaults to the one used for each capture.')
+    parser.add_argument('-p', '--pixel_size', type=float,
+                        help='Pixel size in micron. Defaults to the one used for each capture.\n'
+                        'CSV files from before the pixel size was saved are left as they are.')
+    parser.add_argument('-n', '--near_field', action='store_true',
+                        default=False,
+                        help='Skip the angular calculations, assuming near field imaging.')
+    parser.add_argument('-j', '--jobs', type=int,
+                        default=os.cpu_count(),
+                        help='Number of processes to load files with. Defaults to the cpu count.')
+    parser.add_argument('-o', '--output', type=str,
+                        help='Save the summary table to this CSV file.')
+    parser.add_argument('--plot', type=str,
+                        help='Save a plot of the stabilities over time to this file.')
     return parser
 
 
-def build_data(data: list, value, **kw):
-    """Simple callback for appending camonitor output to a list"""
-    data.append(value)
+def build_render_parser():
+    """
+    Constructs the parser for the render subcommand.
+    Returns:
+        parser: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog='pointing_stability render',
+        formatter_class=argparse.RawTextHelpFormatter,
+        description='Make the figures for saved captures. Each figure is saved next to its'
+        ' data file.')
+
+    parser.add_argument('paths', type=str, nargs='+',
+                        help='Saved capture files (.csv or .h5), or directories to search'
+                        ' for data_*.csv and *.h5 files.')
+    parser.add_argument('-l', '--focal_length', type=float,
+                        help='Focal length of the imaging lens in cm.'
+                        ' Defaults to the one used for each capture.')
+    parser.add_argument('-p', '--pixel_size', type=float,
+                        help='Pixel size in micron. Defaults to the one used for each capture.')
+    parser.add_argument('-n', '--near_field', action='store_true',
+                        default=False,
+                        help='Skip the angular plot, assuming near field imaging.')
+    parser.add_argument('--psd', action='store_true',
+                        default=False,
+                        help='Add the jitter spectrum panels.')
+    parser.add_argument('--bands', type=str,
+                        default='0,1,10,100',
+                        help='Comma-separated frequency band edges in Hz for --psd.'
+                        ' Defaults to 0,1,10,100.')
+    return parser
 
 
 def print_progress_bar(iteration: int, total: int,
@@ -141,25 +527,443 @@ def print_progress_bar(iteration: int, total: int,
     print(color + f'\r{prefix} |{bar}| {percent}% {suffix}' + Style.RESET_ALL, end=end)
 
 
-def connect_centroids(cam_prefix: str) -> list[PV]:
+def connect_centroids(cam_prefix: str,
+                      connection_callback: Optional[Callable] = None) -> list[PV]:
     """
-    Connect to the centroid PVs and wait for the PV objects to connect.
+    Connect to the centroid and UniqueId PVs and wait for the PV objects to connect.
     Parameters
     -----------
     cam_prefix (str):
         Camera PV prefix.
+    connection_callback (Callable, optional):
+        Called by pyepics whenever one of the PVs connects or disconnects.
     Returns
     -----------
     list[epics.PV]:
-        list of the PV objects
+        list of the PV objects: centroid x, centroid y, unique id
     """
-    centroid_x = PV(f'{cam_prefix}Stats2:CentroidX_RBV', connection_timeout=5)
-    centroid_y = PV(f'{cam_prefix}Stats2:CentroidY_RBV', connection_timeout=5)
+    centroid_x = PV(f'{cam_prefix}Stats2:CentroidX_RBV', connection_timeout=5,
+                    connection_callback=connection_callback)
+    centroid_y = PV(f'{cam_prefix}Stats2:CentroidY_RBV', connection_timeout=5,
+                    connection_callback=connection_callback)
+    unique_id = PV(f'{cam_prefix}Stats2:UniqueId_RBV', connection_timeout=5,
+                   connection_callback=connection_callback)
 
     centroid_x.wait_for_connection(timeout=5)
     centroid_y.wait_for_connection(timeout=5)
+    unique_id.wait_for_connection(timeout=5)
+
+    return centroid_x, centroid_y, unique_id
+
+
+class CaptureWriter:
+    """
+    Append captured samples to an HDF5 file while the capture runs.
+
+    Each camera gets a group with resizable, chunked x, y, and timestamp
+    datasets of the raw centroids in pixels, and the camera settings as
+    attributes. The captures must spool their chunks; call update
+    periodically to append the full chunks taken since the last update.
+    The file is flushed after every update, so an interrupted run keeps
+    everything but the last partial chunk of each camera.
+
+    Parameters
+    -----------
+    path (str):
+        The HDF5 file to create.
+    focal_length (float):
+        Focal length of the imaging lens in cm.
+    near_field (bool):
+        Whether the capture uses near field imaging.
+    """
+    def __init__(self, path: str, focal_length: float, near_field: bool):
+        import h5py
+        self.path = path
+        self.file = h5py.File(path, 'w')
+        self.file.attrs['focal_length_cm'] = focal_length
+        self.file.attrs['near_field'] = near_field
+        self._cameras = []
 
-    return centroid_x, centroid_y
+    def add_camera(self, name: str, capture: CentroidCapture, settings: dict) -> 'h5py.Group':
+        """Create the group and datasets for one camera's capture"""
+        group = self.file.create_group(name)
+        for key in ['x_px', 'y_px', 'timestamp']:
+            group.create_dataset(key, shape=(0,), maxshape=(None,), dtype='f8',
+                                 chunks=(capture.chunk_size,))
+        group.attrs.update(settings)
+        self._cameras.append([group, capture, 0])
+        return group
+
+    def update(self):
+        """Append the chunks captured since the last update"""
+        for camera in self._cameras:
+            group, capture, written = camera
+            for chunk in capture.take_chunks():
+                end = written + chunk.shape[1]
+                for key, data in zip(['x_px', 'y_px', 'timestamp'], chunk):
+                    group[key].resize((end,))
+                    group[key][written:end] = data
+                written = end
+            camera[2] = written
+        self.file.flush()
+
+    def read(self, group: 'h5py.Group') -> tuple[NDArray, NDArray, NDArray]:
+        """Read one camera's x, y, and timestamp arrays back from the file"""
+        return group['x_px'][:], group['y_px'][:], group['timestamp'][:]
+
+    def close(self):
+        self.update()
+        self.file.close()
+
+
+def open_capture(path: str) -> 'h5py.File':
+    """
+    Open an HDF5 capture file for reading.
+
+    There is one group per camera, with x_px, y_px, and timestamp datasets
+    and the camera settings and results in its attrs. The datasets are
+    only read from disk when sliced, so large captures can be loaded lazily.
+    """
+    import h5py
+    return h5py.File(path, 'r')
+
+
+def calc_image_centroids(frames: NDArray, background: Optional[NDArray] = None,
+                         threshold: float = 0,
+                         roi: Optional[tuple[int, int, int, int]] = None
+                         ) -> tuple[NDArray, NDArray]:
+    """
+    First image moments for a batch of frames in one vectorized pass.
+
+    Each frame is cropped to the ROI, background subtracted, and thresholded,
+    then reduced to its x and y projections so the moments only need one
+    pass over the pixels.
+
+    Parameters
+    -----------
+    frames (NDArray):
+        Images with shape (n_frames, height, width).
+    background (NDArray, optional):
+        Background image to subtract, with the full frame shape.
+    threshold (float, optional):
+        Pixels below this value are ignored. Defaults to 0.
+    roi (tuple[int, int, int, int], optional):
+        Region of interest as x, y, width, height.
+
+    Returns
+    --------
+    tuple[NDArray, NDArray]: the x and y centroids in full frame pixels,
+    NaN for frames with no signal above the threshold.
+    """
+    x_offset = y_offset = 0
+    if roi is not None:
+        x_offset, y_offset, width, height = roi
+        frames = frames[:, y_offset:y_offset + height, x_offset:x_offset + width]
+        if background is not None:
+            background = background[y_offset:y_offset + height, x_offset:x_offset + width]
+    data = frames.astype(np.float32)
+    if background is not None:
+        data -= background
+    data[data < max(threshold, 0)] = 0
+    x_projection = data.sum(axis=1)
+    y_projection = data.sum(axis=2)
+    total = x_projection.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = x_projection @ np.arange(data.shape[2], dtype=np.float32)/total + x_offset
+        y = y_projection @ np.arange(data.shape[1], dtype=np.float32)/total + y_offset
+    empty = total <= 0
+    x[empty] = np.nan
+    y[empty] = np.nan
+    return x, y
+
+
+class ImageCentroider:
+    """
+    Calculate centroids from the Image1 array monitor in vectorized batches.
+
+    The monitor callback only queues the frames. Each call to process
+    centroids everything queued so far in one pass and adds it to the capture.
+    Frames with no signal above the threshold are counted as dropped.
+
+    Parameters
+    -----------
+    capture (CentroidCapture):
+        The capture to fill.
+    shape (tuple[int, int]):
+        The image height and width.
+    background (NDArray, optional):
+        Background image to subtract.
+    threshold (float, optional):
+        Pixels below this value are ignored. Defaults to 0.
+    roi (tuple[int, int, int, int], optional):
+        Region of interest as x, y, width, height.
+    """
+    def __init__(self, capture: CentroidCapture, shape: tuple[int, int],
+                 background: Optional[NDArray] = None, threshold: float = 0,
+                 roi: Optional[tuple[int, int, int, int]] = None):
+        self.capture = capture
+        self.shape = shape
+        self.background = background
+        self.threshold = threshold
+        self.roi = roi
+        self._frames = collections.deque()
+
+    def add_frame(self, value, timestamp=None, **kw):
+        """Callback for the ArrayData monitor"""
+        self._frames.append((value, timestamp))
+        # Wake up the main thread to process the batch that fills the capture
+        if 0 < self.capture.size <= self.capture.count + len(self._frames):
+            self.capture.wake.set()
+
+    def process(self):
+        """Centroid the queued frames and add them to the capture"""
+        frames = []
+        timestamps = []
+        size = self.shape[0]*self.shape[1]
+        while self._frames:
+            value, timestamp = self._frames.popleft()
+            frames.append(np.asarray(value)[:size])
+            timestamps.append(timestamp)
+        if not frames:
+            return
+        x, y = calc_image_centroids(np.stack(frames).reshape(-1, *self.shape),
+                                    background=self.background,
+                                    threshold=self.threshold, roi=self.roi)
+        valid = np.isfinite(x)
+        self.capture.add_dropped(int(np.count_nonzero(~valid)))
+        self.capture.extend(x[valid], y[valid], np.asarray(timestamps, dtype=float)[valid])
+
+
+def print_capture_progress(captures: list[CentroidCapture], scales: list[NDArray],
+                           focal_length: Optional[float] = None,
+                           extra: int = 0) -> None:
+    """
+    Print the progressbar for the captures in progress. With a single camera,
+    include the live stability estimate from the capture's running statistics.
+
+    Parameters
+    -----------
+    captures (list[CentroidCapture]):
+        The captures in progress.
+    scales (list[NDArray]):
+        Microns per pixel in X and Y for each capture, including binning.
+    focal_length (float, optional):
+        Focal length in micron, to include the angular estimate.
+    extra (int, optional):
+        Samples taken but not yet added to the capture. Defaults to 0.
+    """
+    suffix = ''
+    capture = max(captures, key=lambda _capture: _capture.count)
+    stats = captures[0].stats if len(captures) == 1 else None
+    if stats is not None and stats.count > 1:
+        std = stats.std*scales[0]
+        suffix = ('\u0394 ('
+                  + ', '.join([f'{4*_s:2.3e}' for _s in std])
+                  + ') \u03bcm')
+        if focal_length:
+            # Small angle approximation of calc_angular_displacement
+            suffix += ('  \u03b8 std_dev ('
+                       + ', '.join([f'{_s/focal_length*1E6:2.3e}' for _s in std])
+                       + ') \u03bcrad')
+    if not capture.size:
+        # Nothing to show progress towards, just count the samples
+        print(Fore.LIGHTYELLOW_EX + f'\rCollecting data... {capture.count + extra} samples'
+              f' {suffix}' + Style.RESET_ALL, end='\r')
+        return
+    print_progress_bar(capture.count + extra + 1, total=capture.size,
+                       prefix='Collecting data...', suffix=suffix,
+                       length=40, fill="\u2588")
+
+
+def record_disconnect(disconnected: list[str], wake: threading.Event,
+                      pvname: str = '', conn: bool = True, **kw):
+    """Connection callback that notes which PVs disconnected and wakes the waiter"""
+    if not conn:
+        disconnected.append(pvname)
+        wake.set()
+
+
+def wait_for_captures(captures: list[CentroidCapture],
+                      progress: Optional[Callable] = None,
+                      process: Optional[Callable] = None,
+                      timeout: Optional[float] = None,
+                      stall_timeout: Optional[float] = None,
+                      disconnected: Optional[list[str]] = None) -> None:
+    """
+    Wait until the first capture is full.
+
+    The captures set their shared wake event when they are full, so this
+    returns as soon as that happens instead of at the next poll. In between,
+    we wake up every POLL_PERIOD to show progress and check for problems.
+    Ctrl+C stops the wait early, keeping the samples taken so far.
+
+    Parameters
+    -----------
+    captures (list[CentroidCapture]):
+        The captures in progress, sharing one wake event.
+    progress (Callable, optional):
+        Called on every wake up to show progress.
+    process (Callable, optional):
+        Called on every wake up before checking the captures, e.g. to
+        centroid queued frames.
+    timeout (float, optional):
+        Raise if the captures aren't full after this many seconds.
+        Unbounded captures just stop instead.
+    stall_timeout (float, optional):
+        Raise if no new samples arrive for this many seconds.
+    disconnected (list[str], optional):
+        Filled in by record_disconnect. Raise if any PV disconnects.
+    """
+    wake = captures[0].wake
+    start = time.monotonic()
+    last_count = 0
+    last_change = start
+    try:
+        while True:
+            wake.clear()
+            if process is not None:
+                process()
+            if any(_capture.done for _capture in captures):
+                return
+            if progress is not None:
+                progress()
+            if disconnected:
+                raise Exception(f'Lost connection to {", ".join(disconnected)}.')
+            now = time.monotonic()
+            count = sum(_capture.count for _capture in captures)
+            if count != last_count:
+                last_count = count
+                last_change = now
+            elif stall_timeout and now - last_change > stall_timeout:
+                raise Exception(f'No new samples for {stall_timeout} s,'
+                                ' is the camera acquiring?')
+            if timeout and now - start > timeout:
+                if not any(_capture.size for _capture in captures):
+                    return
+                raise Exception(f'The capture did not finish within {timeout} s.')
+            wake.wait(POLL_PERIOD)
+    except KeyboardInterrupt:
+        ...
+
+
+def capture_time_series(cam_prefix: str, capture: CentroidCapture,
+                        progress: Optional[Callable] = None,
+                        stop: Optional[threading.Event] = None,
+                        timeout: Optional[float] = None,
+                        stall_timeout: Optional[float] = None) -> None:
+    """
+    Fill the capture using the Stats plugin time-series arrays.
+
+    The plugin records the centroid of every frame it processes into the
+    TSCentroidX and TSCentroidY arrays, so we only need one array read per
+    chunk instead of one monitor per frame. Captures larger than the arrays
+    are taken in several chunks, one after another. The plugin does not
+    record anything between one chunk filling up and the next Erase/Start,
+    so those frames are lost. Every frame the plugin processes bumps its
+    UniqueId_RBV, so the frames it dropped and the frames lost between
+    chunks are both counted as dropped from how far UniqueId_RBV moved
+    beyond the points read.
+
+    TSTimestamp holds the NDArray timestamps, which count from the EPICS
+    epoch, and is converted to POSIX time. If the IOC does not provide it,
+    the timestamps are spread evenly across each chunk's wall-clock duration.
+
+    A KeyboardInterrupt, or setting the stop event from another thread,
+    stops the capture early, keeping the samples taken so far.
+
+    Parameters
+    -----------
+    cam_prefix (str):
+        Camera PV prefix.
+    capture (CentroidCapture):
+        The capture to fill.
+    progress (Callable, optional):
+        Called with extra=<samples in the current chunk> to show progress.
+    stop (threading.Event, optional):
+        Set this to stop the capture early.
+    timeout (float, optional):
+        Raise if the capture isn't done after this many seconds.
+        An unbounded capture just stops instead.
+    stall_timeout (float, optional):
+        Raise if the plugin takes no new points for this many seconds.
+    """
+    stats = f'{cam_prefix}Stats2:'
+    wake = threading.Event()
+    disconnected = []
+    pvs = {_name: PV(f'{stats}{_name}', connection_timeout=5,
+                     connection_callback=partial(record_disconnect, disconnected, wake))
+           for _name in ['TSControl', 'TSNumPoints', 'TSCurrentPoint',
+                         'TSCentroidX', 'TSCentroidY', 'TSTimestamp',
+                         'UniqueId_RBV']}
+    for _name, _pv in pvs.items():
+        if not _pv.wait_for_connection(timeout=5) and _name != 'TSTimestamp':
+            raise Exception(f'Could not connect to {_pv.pvname}.')
+    # An unavailable TSTimestamp is expected, it isn't a disconnect
+    disconnected.clear()
+    has_timestamps = pvs['TSTimestamp'].connected
+    max_points = pvs['TSCentroidX'].nelm
+    last_unique_id = pvs['UniqueId_RBV'].get(use_monitor=False)
+    # Wake up as soon as the chunk is complete
+    num_points = 0
+    current_index = pvs['TSCurrentPoint'].add_callback(
+        lambda value, **kw: wake.set() if value >= num_points else None)
+    capture_start = time.monotonic()
+
+    try:
+        while not capture.done:
+            num_points = max_points
+            if capture.size:
+                num_points = min(capture.size - capture.count, max_points)
+            pvs['TSNumPoints'].put(num_points, wait=True)
+            start = time.time()
+            pvs['TSControl'].put('Erase/Start', wait=True)
+            current = last_current = 0
+            last_change = time.monotonic()
+            interrupted = False
+            try:
+                while current < num_points:
+                    if stop is not None and stop.is_set():
+                        raise KeyboardInterrupt
+                    wake.wait(POLL_PERIOD)
+                    wake.clear()
+                    if disconnected:
+                        raise Exception(f'Lost connection to {", ".join(disconnected)}.')
+                    current = pvs['TSCurrentPoint'].get()
+                    if progress is not None:
+                        progress(extra=current)
+                    now = time.monotonic()
+                    if current != last_current:
+                        last_current = current
+                        last_change = now
+                    elif stall_timeout and now - last_change > stall_timeout:
+                        raise Exception(f'No new points in {stats}TSCurrentPoint for'
+                                        f' {stall_timeout} s, is the camera acquiring?')
+                    if timeout and now - capture_start > timeout:
+                        if not capture.size:
+                            raise KeyboardInterrupt
+                        raise Exception(f'The capture did not finish within {timeout} s.')
+            except KeyboardInterrupt:
+                interrupted = True
+                pvs['TSControl'].put('Stop', wait=True)
+                num_points = pvs['TSCurrentPoint'].get()
+            end = time.time()
+            # Anything processed since the last chunk and not in this one is lost
+            unique_id = pvs['UniqueId_RBV'].get(use_monitor=False)
+            capture.add_dropped(max(unique_id - last_unique_id - num_points, 0))
+            last_unique_id = unique_id
+            pvs['TSControl'].put('Read', wait=True)
+            x = pvs['TSCentroidX'].get(count=num_points, use_monitor=False)
+            y = pvs['TSCentroidY'].get(count=num_points, use_monitor=False)
+            if has_timestamps:
+                timestamps = (pvs['TSTimestamp'].get(count=num_points, use_monitor=False)
+                              + EPICS_EPOCH)
+            else:
+                timestamps = np.linspace(start, end, num_points)
+            capture.extend(x, y, timestamps)
+            if interrupted:
+                break
+    finally:
+        pvs['TSCurrentPoint'].remove_callback(current_index)
 
 
 def convert_px_to_um(data: ArrayLike, pixel_size: float, bin: int) -> NDArray:
@@ -209,6 +1013,138 @@ def calc_angular_displacement(centered_data: NDArray,
     return [theta, theta_avg, theta_std]
 
 
+def resample_uniform(timestamps: NDArray, data: NDArray) -> tuple[float, NDArray]:
+    """
+    Resample data taken at uneven timestamps onto an evenly spaced time grid.
+
+    The grid uses the median sample spacing, and values are linearly
+    interpolated, so the occasional late or dropped frame doesn't distort
+    the spectrum.
+
+    Parameters
+    -----------
+    timestamps (NDArray):
+        Sample times in seconds.
+    data (NDArray):
+        Data with shape (..., n_samples).
+
+    Returns
+    --------
+    tuple[float, NDArray]: the sample rate in Hz and the resampled data.
+    """
+    order = np.argsort(timestamps, kind='stable')
+    timestamps = timestamps[order]
+    data = np.asarray(data)[..., order]
+    period = np.median(np.diff(timestamps))
+    if not period > 0:
+        raise ValueError('The timestamps must increase to calculate a spectrum.')
+    grid = np.arange(timestamps[0], timestamps[-1], period)
+    resampled = np.stack([np.interp(grid, timestamps, _row)
+                          for _row in data.reshape(-1, data.shape[-1])])
+    return 1/period, resampled.reshape(data.shape[:-1] + grid.shape)
+
+
+def calc_psd(data: NDArray, sample_rate: float,
+             segment_length: int = 1024) -> tuple[NDArray, NDArray]:
+    """
+    Welch's power spectral density estimate, vectorized over all segments.
+
+    The data is split into half-overlapping, mean-subtracted, Hann windowed
+    segments that are transformed in one rfft call and averaged.
+
+    Parameters
+    -----------
+    data (NDArray):
+        Evenly sampled data with shape (..., n_samples).
+    sample_rate (float):
+        Sample rate in Hz.
+    segment_length (int, optional):
+        Samples per segment. Defaults to 1024, or the data length if shorter.
+
+    Returns
+    --------
+    tuple[NDArray, NDArray]: the frequencies in Hz and the one-sided PSD in
+    data units squared per Hz, with shape (..., n_frequencies).
+    """
+    segment_length = min(segment_length, data.shape[-1])
+    step = max(segment_length//2, 1)
+    segments = np.lib.stride_tricks.sliding_window_view(
+        data, segment_length, axis=-1)[..., ::step, :]
+    segments = segments - segments.mean(axis=-1, keepdims=True)
+    window = np.hanning(segment_length)
+    spectra = np.abs(np.fft.rfft(segments*window, axis=-1))**2
+    psd = spectra.mean(axis=-2)/(sample_rate*np.sum(window**2))
+    # One-sided: double everything except DC and, for even lengths, Nyquist
+    psd[..., 1:(segment_length + 1)//2] *= 2
+    freqs = np.fft.rfftfreq(segment_length, d=1/sample_rate)
+    return freqs, psd
+
+
+def calc_integrated_rms(freqs: NDArray, psd: NDArray) -> NDArray:
+    """
+    Cumulative RMS from the lowest frequency up to each frequency.
+    Returns NDArray with the same shape as psd.
+    """
+    return np.sqrt(np.cumsum(psd, axis=-1)*(freqs[1] - freqs[0]))
+
+
+def calc_band_stabilities(freqs: NDArray, psd: NDArray,
+                          edges: list[float]) -> dict[str, NDArray]:
+    """
+    Positional stability (4 times the RMS) within each frequency band.
+
+    Parameters
+    -----------
+    freqs (NDArray):
+        Frequencies in Hz.
+    psd (NDArray):
+        Power spectral density with shape (..., n_frequencies).
+    edges (list[float]):
+        Band edges in Hz. The last band runs up to the highest frequency.
+
+    Returns
+    --------
+    dict[str, NDArray]: the stabilities keyed by band label, e.g. '1-10'.
+    """
+    resolution = freqs[1] - freqs[0]
+    bounds = list(edges) + [freqs[-1]]
+    bands = {}
+    for low, high in zip(bounds[:-1], bounds[1:]):
+        if low >= freqs[-1]:
+            break
+        # Skip DC, it only holds the mean we already removed
+        mask = (freqs > 0) & (freqs >= low) & (freqs < high)
+        if high == freqs[-1]:
+            mask |= freqs == high
+        bands[f'{low:g}-{high:g}'] = 4*np.sqrt(np.sum(psd[..., mask], axis=-1)*resolution)
+    return bands
+
+
+def get_pyplot(headless: bool = False):
+    """
+    Import matplotlib.pyplot on first use, with the Agg backend if headless.
+
+    Figures are only made at the end of a run, if at all, so this keeps the
+    matplotlib import and GUI backend startup out of the capture.
+    """
+    import matplotlib
+    if headless:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def calc_hist_bins(data: NDArray, max_bins: int = 200) -> NDArray:
+    """
+    Freedman-Diaconis histogram bins, capped so large captures render quickly.
+    Returns the bin edges.
+    """
+    edges = np.histogram_bin_edges(data, bins='fd')
+    if len(edges) > max_bins + 1:
+        edges = np.histogram_bin_edges(data, bins=max_bins)
+    return edges
+
+
 def make_figures(x_positions: NDArray,
                  y_positions: NDArray,
                  pos_stabilities: list[float],
@@ -216,8 +1152,12 @@ def make_figures(x_positions: NDArray,
                  theta_x: Optional[NDArray] = None,
                  theta_y: Optional[NDArray] = None,
                  theta_x_std: Optional[float] = None,
-                 theta_y_std: Optional[float] = None
-                 ) -> Figure:
+                 theta_y_std: Optional[float] = None,
+                 freqs: Optional[NDArray] = None,
+                 psd: Optional[NDArray] = None,
+                 band_stabilities: Optional[dict[str, NDArray]] = None,
+                 max_points: int = 20000
+                 ) -> 'Figure':
     """
     Generate the figures for the pointing stability output. Optionally
     include the angular data. Returns a matplotlib Figure.
@@ -235,7 +1175,7 @@ def make_figures(x_positions: NDArray,
     num_plots (int, optional):
         Number of plots to use. Defaults to 3.
     quiet (bool, optional):
-        Surpress printing the graphic. Defaults to False.
+        Surpress printing the graphic, rendering with Agg instead. Defaults to False.
     theta_x (NDArray, optional):
         Angular data in X. Defaults to None.
     theta_y (NDArray, optional):
@@ -244,6 +1184,15 @@ def make_figures(x_positions: NDArray,
         Standard deviation in theta_x
     theta_y_std (float, optional):
         Standard deviation in theta_y
+    freqs (NDArray, optional):
+        Frequencies in Hz for the PSD panels.
+    psd (NDArray, optional):
+        Positional PSD in X and Y, with shape (2, n_frequencies).
+    band_stabilities (dict[str, NDArray], optional):
+        Positional stabilities in X and Y for each frequency band.
+    max_points (int, optional):
+        Most points to draw in the scatter plot, larger captures are evenly
+        decimated. Defaults to 20000.
 
     Returns
     --------
@@ -251,13 +1200,17 @@ def make_figures(x_positions: NDArray,
     """
     if any([_item is None for _item in [theta_x, theta_y]]):
         num_plots = 2
+    if psd is not None:
+        num_plots += 2
+    plt = get_pyplot(headless=quiet)
     fig, axs = plt.subplots(num_plots,
                             height_ratios=(num_plots-1)*[1]+[0.5])
     # Positional displacement plot
     _positions = np.asarray([x_positions, y_positions])
     _min = _positions.min()*1.05
     _max = _positions.max()*1.05
-    axs[0].scatter(x=x_positions, y=y_positions)
+    step = max(len(x_positions)//max_points, 1)
+    axs[0].scatter(x=x_positions[::step], y=y_positions[::step])
     axs[0].axhline(y=0, color='black', linestyle='--')
     axs[0].axvline(x=0, color='black', linestyle='--')
     axs[0].set_xlim(_min, _max)
@@ -271,11 +1224,11 @@ def make_figures(x_positions: NDArray,
     table_data = [pos_stabilities]
     # Angular displacement subplot
     if not any([_item is None for _item in [theta_x, theta_y]]):
-        axs[1].hist(theta_x, bins='fd',
+        axs[1].hist(theta_x, bins=calc_hist_bins(theta_x),
                     fc=(0, 0, 1, 0.5),
                     edgecolor='black',
                     label='X')
-        axs[1].hist(theta_y, bins='fd',
+        axs[1].hist(theta_y, bins=calc_hist_bins(theta_y),
                     fc=(1, 0.25, 0.25, 0.5),
                     edgecolor='black',
                     label='Y')
@@ -285,6 +1238,21 @@ def make_figures(x_positions: NDArray,
         axs[1].set_box_aspect(1)
         row_labels = row_labels + ['\u03b8 std_dev (\u03bcrad)']
         table_data = table_data + [[theta_x_std, theta_y_std]]
+    # Jitter spectrum subplots
+    if psd is not None:
+        for _psd, _label in zip(psd, ['X', 'Y']):
+            axs[-3].loglog(freqs[1:], _psd[1:], label=_label)
+        axs[-3].set_xlabel('Frequency (Hz)')
+        axs[-3].set_ylabel('PSD (\u03bcm\u00b2/Hz)')
+        axs[-3].legend(loc='upper right')
+        for _rms, _label in zip(calc_integrated_rms(freqs, psd), ['X', 'Y']):
+            axs[-2].semilogx(freqs[1:], _rms[1:], label=_label)
+        axs[-2].set_xlabel('Frequency (Hz)')
+        axs[-2].set_ylabel('Integrated RMS (\u03bcm)')
+        axs[-2].legend(loc='upper left')
+    if band_stabilities:
+        row_labels = row_labels + [f'\u0394 {_band} Hz (\u03bcm)' for _band in band_stabilities]
+        table_data = table_data + [list(_values) for _values in band_stabilities.values()]
     # Now add the table
     table_data = [[f'{item:2.3e}' for item in row] for row in table_data]
     axs[-1].table(cellText=table_data,
@@ -296,26 +1264,24 @@ def make_figures(x_positions: NDArray,
     axs[-1].axis('Off')
     plt.suptitle(f'{camera}')
     plt.subplots_adjust(hspace=0.4)
-    fig.set_figheight(10)
+    fig.set_figheight(10 if psd is None else 16)
     fig.set_figwidth(10)
     plt.tight_layout()
 
     return fig
 
 
-def main():
-    # Build parser and initialize lists
-    parser = build_parser()
-    args = parser.parse_args()
-
-    # Make sure the prefix matches AD standard
-    camera = args.cam + ':' if args.cam[-1] != ':' else args.cam
+def get_camera_info(camera: str, plugin: str = 'Stats2') -> tuple[str, int, int]:
+    """
+    Get the camera model and the binning of the plugin's input.
+    Returns the model, x binning, and y binning.
+    """
     model = caget(f'{camera}Model_RBV', connection_timeout=5)
     if not model:
         raise Exception(f'Could not connect to {camera}Model_RBV.')
     # Make sure you're capturing if the bin is != 1
     # First check the source of the stats plugin
-    stats_input_port = caget(f'{camera}Stats2:NDArrayPort', connection_timeout=5)
+    stats_input_port = caget(f'{camera}{plugin}:NDArrayPort', connection_timeout=5)
     port = camera if 'CAM' in stats_input_port else f'{camera}{stats_input_port}:'
     bin_x = caget(f'{port}BinX_RBV', connection_timeout=5)
     bin_y = caget(f'{port}BinY_RBV', connection_timeout=5)
@@ -324,101 +1290,595 @@ def main():
                         '\n'.join([f'{port}{_suffix}'
                                    for _suffix in ['BinX_RBV', 'BinY_RBV']])
                         )
-    # Initialize lists and connect to centroid PVs
-    total = args.size
-    x_samples = []
-    y_samples = []
+    return model, bin_x, bin_y
+
 
-    centroid_x_pv, centroid_y_pv = connect_centroids(camera)
+def capture_monitors(cameras: list[str], captures: list[CentroidCapture],
+                     progress: Optional[Callable] = None,
+                     timeout: Optional[float] = None,
+                     stall_timeout: Optional[float] = None) -> None:
+    """
+    Fill the captures from the per-frame centroid monitors.
+
+    All cameras start together and stop together, either when the first
+    capture is full or on Ctrl+C, so every capture covers the same time span.
+    See wait_for_captures for the timeouts.
+    """
+    disconnected = []
+    on_connection = partial(record_disconnect, disconnected, captures[0].wake)
+    all_pvs = [connect_centroids(camera, connection_callback=on_connection)
+               for camera in cameras]
 
     # Collect data
-    centroid_x_pv.add_callback(partial(build_data, x_samples))
-    centroid_y_pv.add_callback(partial(build_data, y_samples))
+    callbacks = []
+    for capture, (centroid_x_pv, centroid_y_pv, unique_id_pv) in zip(captures, all_pvs):
+        callbacks.extend([(centroid_x_pv, centroid_x_pv.add_callback(capture.add_x)),
+                          (centroid_y_pv, centroid_y_pv.add_callback(capture.add_y)),
+                          (unique_id_pv, unique_id_pv.add_callback(capture.add_unique_id))])
 
-    while min(len(x_samples), len(y_samples)) < total:
-        if not args.quiet:
-            print_progress_bar(min(len(x_samples), len(y_samples)) + 1,
-                               total=total,
-                               prefix='Collecting data...', fill="\u2588")
-        time.sleep(0.1)
+    try:
+        wait_for_captures(captures, progress=progress, timeout=timeout,
+                          stall_timeout=stall_timeout, disconnected=disconnected)
+    finally:
+        # Stop every capture at the same point, then remove callbacks after collection
+        for capture in captures:
+            capture.stop()
+        for pv, index in callbacks:
+            pv.remove_callback(index)
 
-    # Remove callback after collection
-    centroid_x_pv.remove_callback(1)
-    centroid_y_pv.remove_callback(1)
 
-    # Convert focal length to micron
-    focal_length = args.focal_length*1E4
+def capture_images(cameras: list[str], captures: list[CentroidCapture],
+                   progress: Optional[Callable] = None,
+                   background: Optional[NDArray] = None, threshold: float = 0,
+                   roi: Optional[tuple[int, int, int, int]] = None,
+                   timeout: Optional[float] = None,
+                   stall_timeout: Optional[float] = None) -> None:
+    """
+    Fill the captures with centroids calculated here from the Image1 arrays.
+
+    Like capture_monitors, all cameras start together and stop together.
+    See ImageCentroider for the image parameters and wait_for_captures
+    for the timeouts.
+    """
+    disconnected = []
+    on_connection = partial(record_disconnect, disconnected, captures[0].wake)
+    centroiders = []
+    all_pvs = []
+    for camera, capture in zip(cameras, captures):
+        width = caget(f'{camera}Image1:ArraySize0_RBV', connection_timeout=5)
+        height = caget(f'{camera}Image1:ArraySize1_RBV', connection_timeout=5)
+        if not width or not height:
+            raise Exception(f'Could not read the image size from {camera}Image1.')
+        centroiders.append(ImageCentroider(capture, (height, width), background=background,
+                                           threshold=threshold, roi=roi))
+        # Large arrays are not monitored unless we ask for it
+        array_pv = PV(f'{camera}Image1:ArrayData', connection_timeout=5, auto_monitor=True,
+                      connection_callback=on_connection)
+        unique_id_pv = PV(f'{camera}Image1:UniqueId_RBV', connection_timeout=5,
+                          connection_callback=on_connection)
+        array_pv.wait_for_connection(timeout=5)
+        unique_id_pv.wait_for_connection(timeout=5)
+        all_pvs.append((array_pv, unique_id_pv))
+
+    # Collect data
+    callbacks = []
+    for centroider, (array_pv, unique_id_pv) in zip(centroiders, all_pvs):
+        callbacks.extend([
+            (array_pv, array_pv.add_callback(centroider.add_frame)),
+            (unique_id_pv, unique_id_pv.add_callback(centroider.capture.add_unique_id))])
+
+    def process():
+        for centroider in centroiders:
+            centroider.process()
+
+    try:
+        wait_for_captures(captures, progress=progress, process=process, timeout=timeout,
+                          stall_timeout=stall_timeout, disconnected=disconnected)
+    finally:
+        # Stop every capture at the same point, then remove callbacks after collection
+        for capture in captures:
+            capture.stop()
+        for pv, index in callbacks:
+            pv.remove_callback(index)
+
+
+def capture_all_time_series(cameras: list[str], captures: list[CentroidCapture],
+                            progress: Optional[Callable] = None,
+                            timeout: Optional[float] = None,
+                            stall_timeout: Optional[float] = None) -> None:
+    """
+    Run capture_time_series for every camera at once, one thread per camera.
+    Like capture_monitors, all of them stop when the first one is done, so
+    every capture covers the same time span. Ctrl+C, or an error from any
+    camera, stops all of them early.
+    """
+    if len(cameras) == 1:
+        return capture_time_series(cameras[0], captures[0], progress=progress,
+                                   timeout=timeout, stall_timeout=stall_timeout)
+    stop = threading.Event()
+    finished = threading.Event()
+    errors = []
+
+    def run_one(camera: str, capture: CentroidCapture):
+        try:
+            capture_time_series(camera, capture, stop=stop, timeout=timeout,
+                                stall_timeout=stall_timeout)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            # The first camera to finish stops the others
+            stop.set()
+            finished.set()
+
+    threads = [CAThread(target=run_one, args=(camera, capture))
+               for camera, capture in zip(cameras, captures)]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(_thread.is_alive() for _thread in threads):
+            if progress is not None:
+                progress()
+            finished.wait(POLL_PERIOD)
+            finished.clear()
+    except KeyboardInterrupt:
+        stop.set()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
 
-    # Trim to same array lengths if necessary
-    if len(x_samples) != len(y_samples):
-        _length = min(len(x_samples), len(y_samples))
-        x_samples = x_samples[:_length]
-        y_samples = y_samples[:_length]
 
-    # Convert from pixels to real dimensions using vendor's data and account for binning
-    if args.pixel_size:
-        pixel_size = args.pixel_size
+def align_captures(timestamps: list[NDArray], columns: list[NDArray]) -> NDArray:
+    """
+    Align the samples from several cameras onto the first camera's timestamps.
+
+    Each sample is matched to the other cameras' samples with the nearest
+    timestamp, as long as they are within half of the first camera's typical
+    frame period. Samples without a match are NaN.
+
+    Parameters
+    -----------
+    timestamps (list[NDArray]):
+        The sample timestamps for each camera.
+    columns (list[NDArray]):
+        The data for each camera, with shape (n_columns, n_samples).
+
+    Returns
+    --------
+    NDArray: the reference timestamps followed by every camera's aligned
+    columns, with shape (1 + total columns, n_reference_samples).
+    """
+    reference = timestamps[0]
+    if len(reference) > 1:
+        tolerance = np.median(np.diff(reference))/2
     else:
-        pixel_size = CAMERA_PIXEL_DICT[model]
-    x_samples_um = convert_px_to_um(x_samples, pixel_size, bin_x)
-    y_samples_um = convert_px_to_um(y_samples, pixel_size, bin_y)
+        tolerance = np.inf
+    aligned = [reference[np.newaxis, :], columns[0]]
+    for _timestamps, _columns in zip(timestamps[1:], columns[1:]):
+        order = np.argsort(_timestamps)
+        _timestamps = _timestamps[order]
+        _columns = _columns[:, order]
+        right = np.clip(np.searchsorted(_timestamps, reference), 1, len(_timestamps) - 1)
+        left = right - 1
+        nearest = np.where(reference - _timestamps[left] <= _timestamps[right] - reference,
+                           left, right)
+        matched = np.abs(_timestamps[nearest] - reference) <= tolerance
+        _aligned = np.where(matched, _columns[:, nearest], np.nan)
+        aligned.append(_aligned)
+    return np.concatenate(aligned)
 
-    # Now let's do some fun math
-    x_centered = center_dataset(x_samples_um)
-    y_centered = center_dataset(y_samples_um)
 
-    pos_stabilities = [calc_pos_stability(x_centered), calc_pos_stability(y_centered)]
+def calc_results(x_um: NDArray, y_um: NDArray, timestamps: Optional[NDArray],
+                 focal_length: float, near_field: bool,
+                 bands: Optional[list[float]] = None) -> dict:
+    """
+    Calculate the stability results for one camera.
+
+    Parameters
+    -----------
+    x_um (NDArray):
+        X positions in micron.
+    y_um (NDArray):
+        Y positions in micron.
+    timestamps (NDArray, optional):
+        Sample times in seconds, needed for the jitter spectrum.
+    focal_length (float):
+        Focal length of the lens in micron.
+    near_field (bool):
+        Skip the angular results.
+    bands (list[float], optional):
+        Frequency band edges in Hz. If given, also calculate the jitter
+        spectrum and the positional stability in each band.
+
+    Returns
+    --------
+    dict: keyword arguments for make_figures, plus theta_means and theta_stds.
+    """
+    # Now let's do some fun math
+    x_centered = center_dataset(x_um)
+    y_centered = center_dataset(y_um)
+    results = {
+        'x_positions': x_centered,
+        'y_positions': y_centered,
+        'pos_stabilities': [calc_pos_stability(x_centered), calc_pos_stability(y_centered)],
+        'band_stabilities': {},
+    }
 
     # Now let's look at angular displacements
-    if not args.near_field:
+    if not near_field:
         theta_x, theta_x_avg, theta_x_std = calc_angular_displacement(x_centered, focal_length)
         theta_y, theta_y_avg, theta_y_std = calc_angular_displacement(y_centered, focal_length)
+        results.update(theta_x=theta_x, theta_y=theta_y,
+                       theta_x_std=theta_x_std, theta_y_std=theta_y_std,
+                       theta_means=[theta_x_avg, theta_y_avg],
+                       theta_stds=[theta_x_std, theta_y_std])
 
-        theta_means = [theta_x_avg, theta_y_avg]
-        theta_stds = [theta_x_std, theta_y_std]
+    # And the jitter spectrum
+    if bands is not None:
+        try:
+            if timestamps is None:
+                raise ValueError('No timestamps were saved.')
+            sample_rate, resampled = resample_uniform(timestamps,
+                                                      np.stack((x_centered, y_centered)))
+        except ValueError as exc:
+            print(f'Skipping the spectrum: {exc}')
+        else:
+            # Resolve the lowest band edge with a few frequency bins
+            lowest = min([_edge for _edge in bands if _edge > 0], default=1)
+            freqs, psd = calc_psd(resampled, sample_rate,
+                                  segment_length=int(np.ceil(4*sample_rate/lowest)))
+            results.update(freqs=freqs, psd=psd,
+                           band_stabilities=calc_band_stabilities(freqs, psd, bands))
+    return results
 
-    if not args.quiet:
-        print('\nPositional stability \u0394 :\n\t'
+
+def render_figure(results: dict, camera: str, file_dest: str, quiet: bool) -> None:
+    """
+    Make the figure from calc_results and save it as file_dest.png.
+    """
+    fig = make_figures(camera=camera, quiet=quiet,
+                       **{_key: _value for _key, _value in results.items()
+                          if _key not in ('theta_means', 'theta_stds')})
+    fig.savefig(f"{file_dest}.png")
+
+
+def analyze_capture(camera: str, capture: CentroidCapture,
+                    x_samples: NDArray, y_samples: NDArray, timestamps: NDArray,
+                    scale: NDArray, focal_length: float, near_field: bool,
+                    quiet: bool, file_dest: str, settings: dict,
+                    group: Optional['h5py.Group'] = None,
+                    bands: Optional[list[float]] = None,
+                    figures: bool = True) -> tuple[NDArray, NDArray]:
+    """
+    Calculate, print, plot, and save the stability results for one camera.
+
+    The results are saved as attrs in the HDF5 group if one is given,
+    otherwise the centered data is saved to a CSV file.
+    If bands are given, also calculate the jitter spectrum and the
+    positional stability in each frequency band.
+    Returns the mean-centered x and y positions in micron.
+    """
+    x_samples_um = convert_px_to_um(x_samples, scale[0], 1)
+    y_samples_um = convert_px_to_um(y_samples, scale[1], 1)
+
+    results = calc_results(x_samples_um, y_samples_um, timestamps,
+                           focal_length=focal_length, near_field=near_field, bands=bands)
+    x_centered = results['x_positions']
+    y_centered = results['y_positions']
+    pos_stabilities = results['pos_stabilities']
+    band_stabilities = results['band_stabilities']
+
+    if not quiet:
+        print(f'{camera} captured {capture.count} paired samples, '
+              f'{capture.unpaired} unpaired updates, {capture.dropped} dropped frames')
+        print('Positional stability \u0394 :\n\t'
               + '('
               + ', '.join([f'{_s:2.3e}'
                           for _s in pos_stabilities]
                           )
               + ') \u03bcm')
 
-    if not args.near_field and not args.quiet:
+    if not near_field and not quiet:
         # Print (Θ_x ± σ_x, Θ_y ± σ_y)
         print('Angular pointing:\n\t'
               + '('
               + ', '.join([f'{_m:2.3f} \u00b1 {_std:2.3e}'
-                          for _m, _std in zip(theta_means, theta_stds)]
+                          for _m, _std in zip(results['theta_means'], results['theta_stds'])]
                           )
               + ') \u03bcrad')
+
+    if band_stabilities and not quiet:
+        print('Positional stability by band:')
+        for _band, _values in band_stabilities.items():
+            print(f'\t{_band} Hz: ('
+                  + ', '.join([f'{_s:2.3e}' for _s in _values])
+                  + ') \u03bcm')
+
+    # Format the data for saving
+    if group is not None:
+        group.attrs['unpaired'] = capture.unpaired
+        group.attrs['dropped'] = capture.dropped
+        group.attrs['pos_stability_um'] = pos_stabilities
+        if not near_field:
+            group.attrs['theta_std_urad'] = results['theta_stds']
+        for _band, _values in band_stabilities.items():
+            group.attrs[f'pos_stability_{_band}_hz_um'] = _values
+    else:
+        camera_header = (f"{camera.replace(':', '_').lower()}_imaging_distance_{focal_length*1E-4}"
+                         + f'\nunpaired_{capture.unpaired}_dropped_{capture.dropped}'
+                         + f'_pixel_size_{settings["pixel_size"]}'
+                         + f'_bin_x_{settings["bin_x"]}_bin_y_{settings["bin_y"]}'
+                         + ''.join([f'\nband_{_band}_hz_pos_stability_{_x:2.3e}_{_y:2.3e}'
+                                    for _band, (_x, _y) in band_stabilities.items()])
+                         + '\nx_centered (\u03bcm),y_centered (\u03bcm),timestamp (s)')
+        data = np.stack((x_centered, y_centered, timestamps))
+
+        np.savetxt(f"{file_dest}.csv", np.transpose(data), delimiter=',', header=camera_header)
+
     # #-----------------------------------------------------------------------------------------# #
     # Plotting outputs
     # #-----------------------------------------------------------------------------------------# #
-    if not args.near_field:
-        fig = make_figures(x_positions=x_centered,
-                           y_positions=y_centered,
-                           pos_stabilities=pos_stabilities,
-                           theta_x=theta_x,
-                           theta_y=theta_y,
-                           theta_x_std=theta_x_std,
-                           theta_y_std=theta_y_std,
-                           camera=camera,
-                           quiet=args.quiet)
+    if figures:
+        render_figure(results, camera=camera, file_dest=file_dest, quiet=quiet)
+
+    return x_centered, y_centered
+
+
+def find_capture_files(paths: list[str]) -> list[str]:
+    """
+    Expand directories into the capture files inside them.
+    Returns a sorted list of files.
+    """
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files.update(glob.glob(os.path.join(path, 'data_*.csv')))
+            files.update(glob.glob(os.path.join(path, '*.h5')))
+        else:
+            files.add(path)
+    return sorted(files)
+
+
+def load_capture_file(path: str, pixel_size: Optional[float] = None) -> list[dict]:
+    """
+    Load the centroids from one saved capture.
+
+    Returns one dict per camera with the keys file, camera, time, focal_length,
+    x, y, and timestamps, where x and y are positions in micron and
+    timestamps is None for old CSV files without them. If pixel_size is given,
+    the positions are rescaled to use it.
+    Combined multi-camera CSV files are skipped.
+    """
+    if path.endswith('.h5'):
+        import h5py
+        entries = []
+        with h5py.File(path, 'r') as h5:
+            for name, group in h5.items():
+                if not isinstance(group, h5py.Group):
+                    continue
+                attrs = group.attrs
+                _pixel_size = pixel_size or attrs['pixel_size']
+                timestamps = group['timestamp'][()]
+                entries.append({
+                    'file': path,
+                    'camera': name,
+                    'time': timestamps[0] if len(timestamps) else os.path.getmtime(path),
+                    'focal_length': h5.attrs['focal_length_cm'],
+                    'x': convert_px_to_um(group['x_px'][()], _pixel_size, attrs['bin_x']),
+                    'y': convert_px_to_um(group['y_px'][()], _pixel_size, attrs['bin_y']),
+                    'timestamps': timestamps,
+                })
+        return entries
+
+    header = []
+    with open(path, 'r') as fd:
+        for line in fd:
+            if not line.startswith('#'):
+                break
+            header.append(line[1:].strip())
+    match = re.match(r'(.*)_imaging_distance_(\S+)$', header[0]) if header else None
+    if match is None or match.group(1) == 'combined':
+        return []
+    data = np.loadtxt(path, delimiter=',', ndmin=2)
+    x, y = data[:, 0], data[:, 1]
+    saved = re.search(r'pixel_size_([^_]+)_bin', ''.join(header))
+    if pixel_size and saved:
+        x = x*pixel_size/float(saved.group(1))
+        y = y*pixel_size/float(saved.group(1))
+    timestamps = data[:, 2] if data.shape[1] > 2 else None
+    if timestamps is not None and len(timestamps):
+        start = timestamps[0]
     else:
-        fig = make_figures(x_positions=x_centered,
-                           y_positions=y_centered,
-                           pos_stabilities=pos_stabilities,
-                           camera=camera,
-                           quiet=args.quiet)
+        start = os.path.getmtime(path)
+    return [{
+        'file': path,
+        'camera': match.group(1).rstrip('_'),
+        'time': start,
+        'focal_length': float(match.group(2)),
+        'x': x,
+        'y': y,
+        'timestamps': timestamps,
+    }]
 
-    # Format the data for saving
 
-    camera_header = (f"{camera.replace(':', '_').lower()}_imaging_distance_{focal_length*1E-4}"
-                     + '\nx_centered (\u03bcm),y_centered (\u03bcm)')
-    data = np.concatenate((x_centered, y_centered))
-    data = np.resize(data, (2, total))
+def calc_batch_stabilities(positions: list[NDArray],
+                           focal_lengths: Optional[ArrayLike] = None) -> dict[str, NDArray]:
+    """
+    Vectorized positional and angular stabilities for many captures at once.
+
+    The captures are joined into one array and reduced per capture, which
+    gives the same results as center_dataset, calc_pos_stability, and
+    calc_angular_displacement for each capture, without a python loop.
+
+    Parameters
+    -----------
+    positions (list[NDArray]):
+        Positions in micron for each capture.
+    focal_lengths (ArrayLike, optional):
+        Focal length in micron for each capture. Skips the angular results if omitted.
+
+    Returns
+    --------
+    dict[str, NDArray]: the count, pos_stability, and if available the
+    theta_mean and theta_std for each capture.
+    """
+    lengths = np.array([len(_pos) for _pos in positions])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    values = np.concatenate(positions).astype(float)
+    means = np.add.reduceat(values, starts)/lengths
+    centered = values - np.repeat(means, lengths)
+    results = {
+        'count': lengths,
+        'pos_stability': 4*np.sqrt(np.add.reduceat(centered**2, starts)/(lengths - 1)),
+    }
+    if focal_lengths is not None:
+        theta = np.arctan(centered/np.repeat(focal_lengths, lengths))*1E6
+        theta_mean = np.add.reduceat(theta, starts)/lengths
+        theta_centered = theta - np.repeat(theta_mean, lengths)
+        results['theta_mean'] = theta_mean
+        results['theta_std'] = np.sqrt(np.add.reduceat(theta_centered**2, starts)/(lengths - 1))
+    return results
+
+
+def main_analyze(args: argparse.Namespace):
+    """
+    Recalculate and summarize the stabilities for many saved captures.
+    """
+    files = find_capture_files(args.paths)
+    if not files:
+        raise Exception(f'No capture files found in {args.paths}')
+    loader = partial(load_capture_file, pixel_size=args.pixel_size)
+    # Parsing the files is the slow part, so spread it over processes for large batches
+    if args.jobs > 1 and len(files) > 10:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            loaded = list(executor.map(loader, files, chunksize=8))
+    else:
+        loaded = [loader(_file) for _file in files]
+    entries = [_entry for _entries in loaded for _entry in _entries
+               if len(_entry['x']) > 1]
+    if not entries:
+        raise Exception('No captures with at least 2 samples were found.')
+    entries.sort(key=lambda _entry: _entry['time'])
+
+    if args.near_field:
+        focal_lengths = None
+    elif args.focal_length:
+        focal_lengths = np.full(len(entries), args.focal_length*1E4)
+    else:
+        focal_lengths = np.array([_entry['focal_length']*1E4 for _entry in entries])
+    x_results = calc_batch_stabilities([_entry['x'] for _entry in entries], focal_lengths)
+    y_results = calc_batch_stabilities([_entry['y'] for _entry in entries], focal_lengths)
+
+    columns = ['file', 'camera', 'time', 'samples',
+               'x_stability (\u03bcm)', 'y_stability (\u03bcm)']
+    if focal_lengths is not None:
+        columns += ['\u03b8x std_dev (\u03bcrad)', '\u03b8y std_dev (\u03bcrad)']
+    rows = []
+    for i, entry in enumerate(entries):
+        row = [os.path.basename(entry['file']), entry['camera'],
+               time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['time'])),
+               str(x_results['count'][i]),
+               f"{x_results['pos_stability'][i]:2.3e}",
+               f"{y_results['pos_stability'][i]:2.3e}"]
+        if focal_lengths is not None:
+            row += [f"{x_results['theta_std'][i]:2.3e}",
+                    f"{y_results['theta_std'][i]:2.3e}"]
+        rows.append(row)
+
+    widths = [max(len(_row[i]) for _row in [columns] + rows) for i in range(len(columns))]
+    for row in [columns] + rows:
+        print('  '.join(_item.ljust(_width) for _item, _width in zip(row, widths)).rstrip())
+
+    if args.output:
+        with open(args.output, 'w', newline='') as fd:
+            writer = csv.writer(fd)
+            writer.writerow(columns)
+            writer.writerows(rows)
+
+    if args.plot:
+        times = np.array([_entry['time'] for _entry in entries])
+        cameras = np.array([_entry['camera'] for _entry in entries])
+        num_plots = 1 if focal_lengths is None else 2
+        plt = get_pyplot(headless=True)
+        fig, axs = plt.subplots(num_plots, squeeze=False, sharex=True)
+        for camera in np.unique(cameras):
+            mask = cameras == camera
+            dates = times[mask].astype('datetime64[s]')
+            axs[0, 0].plot(dates, x_results['pos_stability'][mask], 'o-', label=f'{camera} X')
+            axs[0, 0].plot(dates, y_results['pos_stability'][mask], 's--', label=f'{camera} Y')
+            if focal_lengths is not None:
+                axs[1, 0].plot(dates, x_results['theta_std'][mask], 'o-', label=f'{camera} X')
+                axs[1, 0].plot(dates, y_results['theta_std'][mask], 's--', label=f'{camera} Y')
+        axs[0, 0].set_ylabel('\u0394 (\u03bcm)')
+        if focal_lengths is not None:
+            axs[1, 0].set_ylabel('\u03b8 std_dev (\u03bcrad)')
+        axs[0, 0].legend(loc='upper right')
+        fig.autofmt_xdate()
+        fig.set_figwidth(10)
+        fig.savefig(args.plot)
+
+
+def main_render(args: argparse.Namespace):
+    """
+    Make the figures for saved captures, e.g. after a run with --no_figures.
+    """
+    files = find_capture_files(args.paths)
+    if not files:
+        raise Exception(f'No capture files found in {args.paths}')
+    bands = None
+    if args.psd:
+        bands = sorted(float(_edge) for _edge in args.bands.split(','))
+    for path in files:
+        entries = load_capture_file(path, pixel_size=args.pixel_size)
+        for entry in entries:
+            if len(entry['x']) < 2:
+                continue
+            file_dest = os.path.splitext(path)[0]
+            if len(entries) > 1:
+                file_dest += f"_{entry['camera']}"
+            focal_length = (args.focal_length or entry['focal_length'])*1E4
+            results = calc_results(entry['x'], entry['y'], entry['timestamps'],
+                                   focal_length=focal_length, near_field=args.near_field,
+                                   bands=bands)
+            render_figure(results, camera=entry['camera'], file_dest=file_dest, quiet=True)
+            print(f'Saved {file_dest}.png')
+
+
+def main():
+    # Subcommands take over before the capture parser sees the arguments
+    if sys.argv[1:2] == ['analyze']:
+        return main_analyze(build_analyze_parser().parse_args(sys.argv[2:]))
+    if sys.argv[1:2] == ['render']:
+        return main_render(build_render_parser().parse_args(sys.argv[2:]))
+
+    # Build parser and initialize lists
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.image and args.time_series:
+        parser.error('--image and --time_series can not be used together')
+    roi = None
+    if args.roi:
+        roi = tuple(int(_value) for _value in args.roi.split(','))
+        if len(roi) != 4:
+            parser.error('--roi must be x,y,width,height')
+    background = np.load(args.background) if args.background else None
+    if args.size < 0:
+        parser.error('--size must be positive, or 0 to capture until stopped')
+    if args.size == 0 and args.window < 2:
+        parser.error('--size 0 needs a --window of at least 2 samples to keep')
+    if args.format == 'hdf5' and importlib.util.find_spec('h5py') is None:
+        parser.error('--format hdf5 needs h5py, which is not installed')
+
+    # Make sure the prefixes match AD standard
+    cameras = [_cam + ':' if _cam[-1] != ':' else _cam for _cam in args.cam]
+    cam_names = [_camera.replace(':', '_').lower() for _camera in cameras]
+
+    # Convert focal length to micron
+    focal_length = args.focal_length*1E4
+
+    bands = None
+    if args.psd:
+        bands = sorted(float(_edge) for _edge in args.bands.split(','))
 
     timestamp = time.strftime('D%Y_%m_%d_T%H_%M_%S')
 
@@ -430,15 +1890,135 @@ def main():
             os.makedirs(_dir)
 
     # Set a default file name and use the user-specified one if it supplied
-    file_dest = f"{_dir}/data_{camera.replace(':', '_').lower()}{timestamp}"
+    file_dests = []
+    for cam_name in cam_names:
+        file_dest = f"{_dir}/data_{cam_name}{timestamp}"
+        if args.filename:
+            file_dest = f"{_dir}/{args.filename}"
+            if len(cameras) > 1:
+                file_dest += f"_{cam_name}"
+        file_dests.append(file_dest)
+    combined_dest = f"{_dir}/data_combined_{timestamp}"
     if args.filename:
-        file_dest = f"{_dir}/{args.filename}"
+        combined_dest = f"{_dir}/{args.filename}_combined"
 
-    np.savetxt(f"{file_dest}.csv", np.transpose(data), delimiter=',', header=camera_header)
-    fig.savefig(f"{file_dest}.png")
+    # Initialize the capture buffers for every camera
+    total = args.size
+    wake = threading.Event()
+    captures = []
+    scales = []
+    all_settings = []
+    for camera, cam_name in zip(cameras, cam_names):
+        model, bin_x, bin_y = get_camera_info(camera,
+                                              plugin='Image1' if args.image else 'Stats2')
+        # Convert from pixels to real dimensions using vendor's data and account for binning
+        if args.pixel_size:
+            pixel_size = args.pixel_size
+        else:
+            pixel_size = CAMERA_PIXEL_DICT[model]
+        scales.append(np.array([pixel_size*bin_x, pixel_size*bin_y]))
+        # With hdf5, the samples are only kept on disk until the analysis.
+        # Unbounded captures only keep the window in memory.
+        keep = None
+        if not total:
+            keep = args.window
+        elif args.format == 'hdf5':
+            keep = 0
+        captures.append(CentroidCapture(total, stats=RunningStats(window=args.window),
+                                        wake=wake, spool=args.format == 'hdf5', keep=keep))
+        all_settings.append({'camera': camera, 'model': model, 'pixel_size': pixel_size,
+                             'bin_x': bin_x, 'bin_y': bin_y})
+
+    # Only create the file once every camera has answered
+    writer = None
+    groups = [None]*len(cameras)
+    if args.format == 'hdf5':
+        h5_dest = file_dests[0] if len(cameras) == 1 else combined_dest
+        writer = CaptureWriter(f'{h5_dest}.h5', focal_length=args.focal_length,
+                               near_field=args.near_field)
+        groups = [writer.add_camera(cam_name.rstrip('_'), capture, settings)
+                  for cam_name, capture, settings in zip(cam_names, captures, all_settings)]
+
+    def poll(extra: int = 0):
+        # Called periodically during the capture
+        if writer is not None:
+            writer.update()
+        if not args.quiet:
+            print_capture_progress(captures, scales,
+                                   None if args.near_field else focal_length,
+                                   extra=extra)
+
+    try:
+        if args.time_series:
+            capture_all_time_series(cameras, captures, progress=poll, timeout=args.timeout,
+                                    stall_timeout=args.stall_timeout)
+        elif args.image:
+            capture_images(cameras, captures, progress=poll, background=background,
+                           threshold=args.threshold, roi=roi, timeout=args.timeout,
+                           stall_timeout=args.stall_timeout)
+        else:
+            capture_monitors(cameras, captures, progress=poll, timeout=args.timeout,
+                             stall_timeout=args.stall_timeout)
+        if not args.quiet:
+            print()
+
+        all_timestamps = []
+        all_columns = []
+        for camera, capture, scale, file_dest, settings, group in zip(
+                cameras, captures, scales, file_dests, all_settings, groups):
+            x_samples, y_samples, timestamps = capture.finish()
+            if group is not None:
+                writer.update()
+                if total:
+                    x_samples, y_samples, timestamps = writer.read(group)
+                else:
+                    group.attrs['analyzed_samples'] = len(x_samples)
+            if capture.count < 2:
+                raise Exception(f'Only captured {capture.count} samples from {camera},'
+                                ' need at least 2.')
+            if not total and not args.quiet:
+                print(f'Analyzing the last {len(x_samples)} samples from {camera}')
+
+            x_centered, y_centered = analyze_capture(
+                camera=camera, capture=capture,
+                x_samples=x_samples, y_samples=y_samples, timestamps=timestamps,
+                scale=scale, focal_length=focal_length, near_field=args.near_field,
+                quiet=args.quiet, file_dest=file_dest, settings=settings, group=group,
+                bands=bands, figures=not args.no_figures)
+            all_timestamps.append(timestamps)
+            all_columns.append(np.stack((x_centered, y_centered)))
+
+        # Save one time-aligned file with every camera's columns
+        if len(cameras) > 1 and writer is not None:
+            combined = writer.file.create_dataset(
+                'combined', data=align_captures(all_timestamps, all_columns))
+            combined.attrs['columns'] = (['timestamp (s)']
+                                         + [f'{_name}{_axis}_centered (um)'
+                                            for _name in cam_names
+                                            for _axis in ['x', 'y']])
+        elif len(cameras) > 1:
+            combined_header = (f"combined_imaging_distance_{focal_length*1E-4}\n"
+                               + ','.join(['timestamp (s)']
+                                          + [f'{_name}{_axis}_centered (\u03bcm)'
+                                             for _name in cam_names
+                                             for _axis in ['x', 'y']]))
+            data = align_captures(all_timestamps, all_columns)
+            np.savetxt(f"{combined_dest}.csv", np.transpose(data), delimiter=',',
+                       header=combined_header)
+    except BaseException:
+        if writer is not None:
+            # Keep any samples taken before the error, but not an empty file
+            for capture in captures:
+                capture.finish()
+            writer.close()
+            if not any(_capture.count for _capture in captures):
+                os.remove(writer.path)
+        raise
+    if writer is not None:
+        writer.close()
 
-    if not args.quiet:
-        plt.show()
+    if not args.quiet and not args.no_figures:
+        get_pyplot().show()
 
 
 if __name__ == '__main__':
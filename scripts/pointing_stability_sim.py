@@ -0,0 +1,322 @@
+"""
+A simulated AreaDetector camera for exercising pointing_stability without a live IOC,
+and a benchmark of the pointing_stability acquisition path.
+
+Run the soft IOC with:
+    python pointing_stability_sim.py --prefix SIM:CAM: --rate 100 --tone 30:0.5
+then point pointing_stability at it:
+    pointing_stability SIM:CAM -s 1000
+or centroid the simulated images instead:
+    pointing_stability SIM:CAM -s 1000 --image
+
+Benchmark capture throughput, lost samples, and latency at several frame rates with:
+    python pointing_stability_sim.py bench --rates 10 100 1000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+from caproto import ChannelType
+from caproto.server import PVGroup, pvproperty, run, template_arg_parser
+
+TS_MAX_POINTS = 2048
+# POSIX time of the EPICS epoch, 1990-01-01 UTC, that NDArray timestamps count from
+EPICS_EPOCH = 631152000
+# Small enough to fit the default EPICS_CA_MAX_ARRAY_BYTES
+IMAGE_HEIGHT = 96
+IMAGE_WIDTH = 128
+SPOT_SIGMA = 4.
+
+
+class SimCamera(PVGroup):
+    """
+    The camera, Stats2, and Image1 PVs that pointing_stability uses.
+
+    Every frame, the centroid is the image center plus white noise and any
+    number of sine tones. CentroidX_RBV and CentroidY_RBV are posted with the
+    same timestamp, like a real Stats plugin. Image1 gets a matching frame
+    with a Gaussian spot at the centroid. Dropouts can skip a single
+    axis update, or a whole frame, which also bumps DroppedArrays_RBV and
+    leaves a gap in UniqueId_RBV.
+
+    Parameters
+    -----------
+    rate (float):
+        Frame rate in Hz.
+    noise (float):
+        Standard deviation of the white noise in pixels.
+    tones (list[tuple[float, float]]):
+        Sine components as (frequency in Hz, amplitude in pixels).
+    axis_drop (float):
+        Probability that one axis update of a frame is not posted.
+    frame_drop (float):
+        Probability that a whole frame is dropped by the plugin.
+    image (bool):
+        Whether to post the Image1 frames.
+    """
+    model = pvproperty(name='Model_RBV', value='Manta_G-125B', read_only=True,
+                       dtype=ChannelType.STRING)
+    array_port = pvproperty(name='Stats2:NDArrayPort', value='CAM', read_only=True,
+                            dtype=ChannelType.STRING)
+    image_port = pvproperty(name='Image1:NDArrayPort', value='CAM', read_only=True,
+                            dtype=ChannelType.STRING)
+    bin_x = pvproperty(name='BinX_RBV', value=1, read_only=True)
+    bin_y = pvproperty(name='BinY_RBV', value=1, read_only=True)
+    size_x = pvproperty(name='Image1:ArraySize0_RBV', value=IMAGE_WIDTH, read_only=True)
+    size_y = pvproperty(name='Image1:ArraySize1_RBV', value=IMAGE_HEIGHT, read_only=True)
+    image_data = pvproperty(name='Image1:ArrayData', value=[0]*(IMAGE_WIDTH*IMAGE_HEIGHT),
+                            max_length=IMAGE_WIDTH*IMAGE_HEIGHT, dtype=ChannelType.CHAR,
+                            read_only=True)
+    image_unique_id = pvproperty(name='Image1:UniqueId_RBV', value=0, read_only=True)
+    centroid_x = pvproperty(name='Stats2:CentroidX_RBV', value=0.0, read_only=True)
+    centroid_y = pvproperty(name='Stats2:CentroidY_RBV', value=0.0, read_only=True)
+    unique_id = pvproperty(name='Stats2:UniqueId_RBV', value=0, read_only=True)
+    dropped_arrays = pvproperty(name='Stats2:DroppedArrays_RBV', value=0, read_only=True)
+    ts_control = pvproperty(name='Stats2:TSControl', value='Stop',
+                            enum_strings=['Erase/Start', 'Start', 'Stop', 'Read'],
+                            dtype=ChannelType.ENUM)
+    ts_num_points = pvproperty(name='Stats2:TSNumPoints', value=TS_MAX_POINTS)
+    ts_current_point = pvproperty(name='Stats2:TSCurrentPoint', value=0, read_only=True)
+    ts_centroid_x = pvproperty(name='Stats2:TSCentroidX', value=[0.0]*TS_MAX_POINTS,
+                               max_length=TS_MAX_POINTS, read_only=True)
+    ts_centroid_y = pvproperty(name='Stats2:TSCentroidY', value=[0.0]*TS_MAX_POINTS,
+                               max_length=TS_MAX_POINTS, read_only=True)
+    ts_timestamp = pvproperty(name='Stats2:TSTimestamp', value=[0.0]*TS_MAX_POINTS,
+                              max_length=TS_MAX_POINTS, read_only=True)
+
+    def __init__(self, *args, rate: float = 100, noise: float = 0.5,
+                 tones: list[tuple[float, float]] = (), axis_drop: float = 0,
+                 frame_drop: float = 0, image: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate = rate
+        self.noise = noise
+        self.tones = list(tones)
+        self.axis_drop = axis_drop
+        self.frame_drop = frame_drop
+        self.image = image
+        self._rng = np.random.default_rng()
+        self._ts_acquiring = False
+        self._ts_data = np.zeros((3, TS_MAX_POINTS))
+
+    def make_frame(self, timestamp: float) -> tuple[float, float]:
+        """The centroid for a frame at this time"""
+        x, y = np.array([IMAGE_WIDTH, IMAGE_HEIGHT])/2 + self._rng.normal(0, self.noise, 2)
+        for freq, amplitude in self.tones:
+            phase = 2*np.pi*freq*timestamp
+            x += amplitude*np.sin(phase)
+            y += amplitude*np.cos(phase)
+        return x, y
+
+    def make_image(self, x: float, y: float) -> np.ndarray:
+        """The flattened 8-bit frame with a Gaussian spot at this centroid"""
+        profile_x = np.exp(-0.5*((np.arange(IMAGE_WIDTH) - x)/SPOT_SIGMA)**2)
+        profile_y = np.exp(-0.5*((np.arange(IMAGE_HEIGHT) - y)/SPOT_SIGMA)**2)
+        return (250*np.outer(profile_y, profile_x)).astype(np.uint8).ravel()
+
+    @model.startup
+    async def model(self, instance, async_lib):
+        """Post a new frame at the frame rate until the IOC exits"""
+        period = 1/self.rate
+        next_frame = time.monotonic()
+        uid = 0
+        dropped = 0
+        while True:
+            next_frame += period
+            await async_lib.library.sleep(max(next_frame - time.monotonic(), 0))
+            uid += 1
+            if self._rng.random() < self.frame_drop:
+                dropped += 1
+                await self.dropped_arrays.write(dropped)
+                continue
+            timestamp = time.time()
+            x, y = self.make_frame(timestamp)
+            await self.unique_id.write(uid, timestamp=timestamp)
+            if self._rng.random() >= self.axis_drop:
+                await self.centroid_x.write(x, timestamp=timestamp)
+            if self._rng.random() >= self.axis_drop:
+                await self.centroid_y.write(y, timestamp=timestamp)
+            if self.image:
+                await self.image_unique_id.write(uid, timestamp=timestamp)
+                await self.image_data.write(self.make_image(x, y), timestamp=timestamp)
+            if self._ts_acquiring:
+                await self._add_ts_point(x, y, timestamp)
+
+    async def _add_ts_point(self, x: float, y: float, timestamp: float):
+        current = self.ts_current_point.value
+        # Like the real plugin, TSTimestamp holds the NDArray timestamps
+        self._ts_data[:, current] = x, y, timestamp - EPICS_EPOCH
+        current += 1
+        await self.ts_current_point.write(current)
+        if current >= min(self.ts_num_points.value, TS_MAX_POINTS):
+            self._ts_acquiring = False
+            await self._post_ts_arrays()
+
+    async def _post_ts_arrays(self):
+        count = self.ts_current_point.value
+        await self.ts_centroid_x.write(self._ts_data[0, :count].tolist())
+        await self.ts_centroid_y.write(self._ts_data[1, :count].tolist())
+        await self.ts_timestamp.write(self._ts_data[2, :count].tolist())
+
+    @ts_control.putter
+    async def ts_control(self, instance, value):
+        if value == 'Erase/Start':
+            await self.ts_current_point.write(0)
+            self._ts_acquiring = True
+        elif value == 'Start':
+            self._ts_acquiring = True
+        elif value == 'Stop':
+            self._ts_acquiring = False
+        elif value == 'Read':
+            await self._post_ts_arrays()
+        return value
+
+
+def parse_tone(text: str) -> tuple[float, float]:
+    """Parse a FREQ:AMPLITUDE tone argument"""
+    freq, amplitude = text.split(':')
+    return float(freq), float(amplitude)
+
+
+def main_ioc():
+    parser, split_args = template_arg_parser(
+        default_prefix='SIM:CAM:',
+        desc='Simulated AreaDetector camera for pointing_stability.')
+    parser.add_argument('--rate', type=float, default=100,
+                        help='Frame rate in Hz. Defaults to 100.')
+    parser.add_argument('--noise', type=float, default=0.5,
+                        help='Standard deviation of the centroid white noise in pixels.'
+                        ' Defaults to 0.5.')
+    parser.add_argument('--tone', type=parse_tone, action='append', default=[],
+                        help='Add a sine component as FREQ:AMPLITUDE in Hz and pixels.'
+                        ' Can be repeated.')
+    parser.add_argument('--axis_drop', type=float, default=0,
+                        help='Probability that one axis update of a frame is not posted.')
+    parser.add_argument('--frame_drop', type=float, default=0,
+                        help='Probability that a whole frame is dropped.')
+    parser.add_argument('--no_image', action='store_true', default=False,
+                        help='Skip posting the Image1 frames, e.g. to benchmark the'
+                        ' centroid monitors alone.')
+    args = parser.parse_args()
+    ioc_options, run_options = split_args(args)
+    ioc = SimCamera(rate=args.rate, noise=args.noise, tones=args.tone,
+                    axis_drop=args.axis_drop, frame_drop=args.frame_drop,
+                    image=not args.no_image, **ioc_options)
+    run(ioc.pvdb, **run_options)
+
+
+def build_bench_parser():
+    """
+    Constructs the parser for the bench subcommand.
+    Returns:
+        parser: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog='pointing_stability_sim bench',
+        description='Start a simulated camera at each frame rate and measure how'
+        ' pointing_stability keeps up.')
+    parser.add_argument('--rates', type=float, nargs='+', default=[10, 100, 1000],
+                        help='Frame rates to test in Hz. Defaults to 10 100 1000.')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds to capture at each rate. Defaults to 10.')
+    parser.add_argument('--time_series', action='store_true', default=False,
+                        help='Benchmark the time-series capture instead of the monitors.')
+    parser.add_argument('--prefix', type=str, default='SIM:BENCH:',
+                        help='PV prefix for the simulated camera.')
+    return parser
+
+
+def bench_rate(prefix: str, rate: float, duration: float, time_series: bool) -> dict:
+    """
+    Run one simulated camera at this rate and capture from it for the duration,
+    through the same capture_monitors or capture_time_series path as a real run.
+
+    Returns a dict with the expected frames, the frames the simulator actually
+    published, from the change in its Stats2:UniqueId_RBV, the paired samples,
+    throughput, unpaired and dropped counts, and the median and 99th percentile
+    latency. For the monitors, the latency runs from each frame's timestamp to
+    its CentroidX_RBV callback. For the time series, from the newest frame in
+    each chunk to the chunk arriving in the capture.
+    """
+    # Import here so the CA environment below applies
+    from epics import caget
+    from pointing_stability import (CentroidCapture, capture_monitors,
+                                    capture_time_series)
+
+    ioc = subprocess.Popen([sys.executable, os.path.abspath(__file__),
+                            '--prefix', prefix, '--rate', str(rate), '--no_image'],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if caget(f'{prefix}Model_RBV', connection_timeout=10) is None:
+            raise Exception(f'The simulated camera at {prefix} did not start.')
+        # Unbounded, so the timeout ends the capture after the duration
+        capture = CentroidCapture(0)
+        latencies = []
+        add_x = capture.add_x
+        extend = capture.extend
+
+        def record_latency(value, timestamp=None, **kw):
+            latencies.append(time.time() - timestamp)
+            add_x(value, timestamp=timestamp, **kw)
+
+        def record_chunk_latency(x, y, timestamps):
+            if len(timestamps):
+                latencies.append(time.time() - np.max(timestamps))
+            extend(x, y, timestamps)
+
+        # The capture functions call whatever add_x and extend the capture has
+        capture.add_x = record_latency
+        capture.extend = record_chunk_latency
+        unique_id = f'{prefix}Stats2:UniqueId_RBV'
+        first_id = caget(unique_id, use_monitor=False)
+        start = time.monotonic()
+        if time_series:
+            capture_time_series(prefix, capture, timeout=duration)
+        else:
+            capture_monitors([prefix], [capture], timeout=duration)
+        elapsed = time.monotonic() - start
+        published = caget(unique_id, use_monitor=False) - first_id
+        capture.finish()
+    finally:
+        ioc.terminate()
+        ioc.wait()
+    latencies = np.asarray(latencies)*1E3
+    return {
+        'rate': rate,
+        'expected': int(rate*duration),
+        'published': published,
+        'paired': capture.count,
+        'throughput': capture.count/elapsed,
+        'unpaired': capture.unpaired,
+        'dropped': capture.dropped,
+        'latency_median': np.median(latencies) if len(latencies) else np.nan,
+        'latency_p99': np.percentile(latencies, 99) if len(latencies) else np.nan,
+    }
+
+
+def main_bench(args: argparse.Namespace):
+    # Keep the benchmark on this machine
+    os.environ.setdefault('EPICS_CA_AUTO_ADDR_LIST', 'NO')
+    os.environ.setdefault('EPICS_CA_ADDR_LIST', '127.0.0.1')
+    columns = ['rate (Hz)', 'expected', 'published', 'paired', 'throughput (Hz)',
+               'unpaired', 'dropped', 'latency p50 (ms)', 'latency p99 (ms)']
+    print('  '.join(columns))
+    for rate in args.rates:
+        result = bench_rate(args.prefix, rate, args.duration, args.time_series)
+        row = [f"{result['rate']:g}", str(result['expected']), str(result['published']),
+               str(result['paired']),
+               f"{result['throughput']:.1f}", str(result['unpaired']),
+               str(result['dropped']), f"{result['latency_median']:.2f}",
+               f"{result['latency_p99']:.2f}"]
+        print('  '.join(_item.ljust(len(_column))
+                        for _item, _column in zip(row, columns)).rstrip())
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['bench']:
+        main_bench(build_bench_parser().parse_args(sys.argv[2:]))
+    else:
+        main_ioc()